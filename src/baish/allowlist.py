@@ -0,0 +1,206 @@
+"""Local allowlist of SHA-256 hashes of vetted scripts.
+
+Hashes live in SQLite, fronted by a Bloom filter file that is rebuilt on
+every change. Most scripts aren't on the allowlist, and the filter answers
+those without opening the database.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import struct
+import time
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from .config import Config
+from .file_analyzer import NON_SCRIPT_PREFIX
+from .logger import setup_logger
+from .retention import locate, read_stored
+from .static_filter import STATIC_PREFIX
+
+logger = setup_logger()
+
+ALLOWLISTED_TYPE = "allowlisted"
+BLOOM_ERROR_RATE = 0.01
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_BLOOM_HEADER = struct.Struct("<QI")  # size in bits, number of hashes
+# Verdicts that no LLM gave. Importing them would let the static filter, or
+# an earlier allowlist hit, vouch for a script forever.
+_NON_LLM_PREFIXES = (STATIC_PREFIX, NON_SCRIPT_PREFIX)
+
+
+def hash_script(script: str) -> str:
+    return hashlib.sha256(script.encode("utf-8")).hexdigest()
+
+
+def _is_llm_verdict(results: dict) -> bool:
+    if results["file_type"] == ALLOWLISTED_TYPE:
+        return False
+    return not str(results["explanation"]).startswith(_NON_LLM_PREFIXES)
+
+
+class BloomFilter:
+    """Bloom filter over SHA-256 hex digests.
+
+    The keys are already uniformly distributed, so the bit positions are
+    derived from the digest itself with double hashing.
+    """
+
+    def __init__(self, size: int, num_hashes: int, bits: Optional[bytearray] = None):
+        self.size = size
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(
+        cls, capacity: int, error_rate: float = BLOOM_ERROR_RATE
+    ) -> "BloomFilter":
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(size / capacity * math.log(2)))
+        return cls(size, num_hashes)
+
+    def _positions(self, sha256: str) -> Iterable[int]:
+        digest = bytes.fromhex(sha256)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.num_hashes))
+
+    def add(self, sha256: str) -> None:
+        for pos in self._positions(sha256):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, sha256: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(sha256)
+        )
+
+    def to_bytes(self) -> bytes:
+        return _BLOOM_HEADER.pack(self.size, self.num_hashes) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        size, num_hashes = _BLOOM_HEADER.unpack_from(data)
+        return cls(size, num_hashes, bytearray(data[_BLOOM_HEADER.size :]))
+
+
+@lru_cache(maxsize=4)
+def _load_bloom(path: Path, _mtime_ns: int) -> BloomFilter:
+    # Keyed on mtime so long-running processes pick up changes
+    return BloomFilter.from_bytes(path.read_bytes())
+
+
+class Allowlist:
+    def __init__(self, config: Config):
+        self.db_path = Path(config.baish_dir) / "allowlist.db"
+        self.bloom_path = Path(config.baish_dir) / "allowlist.bloom"
+        self.results_dir = Path(config.baish_dir) / "results"
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.db_path)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                sha256 TEXT PRIMARY KEY,
+                note TEXT,
+                added REAL NOT NULL
+            )
+            """)
+        return db
+
+    def contains(self, sha256: str) -> bool:
+        try:
+            bloom = _load_bloom(self.bloom_path, self.bloom_path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return False  # nothing has been allowlisted
+        if sha256 not in bloom:
+            return False
+
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT 1 FROM hashes WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def add(self, entries: Iterable[Tuple[str, str]]) -> int:
+        """Add (sha256, note) pairs, returning how many were new"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            with db:
+                before = db.total_changes
+                db.executemany(
+                    "INSERT OR IGNORE INTO hashes (sha256, note, added) "
+                    "VALUES (?, ?, ?)",
+                    ((sha256.lower(), note, now) for sha256, note in entries),
+                )
+                added = db.total_changes - before
+            self._rebuild_bloom(db)
+        return added
+
+    def _rebuild_bloom(self, db: sqlite3.Connection) -> None:
+        count = db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        # Leave headroom so small allowlists don't need a resize on every add
+        bloom = BloomFilter.for_capacity(max(count * 2, 1024))
+        for (sha256,) in db.execute("SELECT sha256 FROM hashes"):
+            bloom.add(sha256)
+
+        tmp_path = self.bloom_path.with_suffix(".tmp")
+        tmp_path.write_bytes(bloom.to_bytes())
+        os.replace(tmp_path, self.bloom_path)
+
+    def add_files(self, paths: Iterable[str]) -> int:
+        return self.add(
+            (hashlib.sha256(Path(path).read_bytes()).hexdigest(), str(path))
+            for path in paths
+        )
+
+    def import_file(self, path: str) -> int:
+        """Import hashes from a file with one hash per line. `sha256sum` output
+        works as is; anything after the hash is kept as the note."""
+        entries = []
+        with open(path) as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                sha256, _, note = line.partition(" ")
+                sha256 = sha256.lower()
+                if not _SHA256_RE.match(sha256):
+                    logger.warning(f"{path}:{lineno}: not a SHA-256 hash, skipping")
+                    continue
+                entries.append((sha256, note.strip(" *") or f"imported from {path}"))
+        return self.add(entries)
+
+    def import_results(self, max_harm: int) -> int:
+        """Allowlist saved scripts whose past LLM verdict was at most max_harm"""
+        entries = []
+        for results_file, text in read_stored(self.results_dir, "*_results.json"):
+            try:
+                results = json.loads(text)
+                harm_score = results["harm_score"]
+                if not isinstance(harm_score, int) or harm_score > max_harm:
+                    continue
+                if not _is_llm_verdict(results):
+                    continue
+                script = locate(results["script_path"]).read_bytes()
+            except (OSError, ValueError, KeyError) as e:
+                logger.debug(f"Skipping {results_file.name}: {e}")
+                continue
+            entries.append(
+                (
+                    hashlib.sha256(script).hexdigest(),
+                    f"harm {harm_score} in {results_file.name}",
+                )
+            )
+        return self.add(entries)
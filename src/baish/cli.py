@@ -1,9 +1,13 @@
 import argparse
 import datetime
+import importlib
 import json
 import os
+import sqlite3
 import sys
+import tarfile
 import uuid
+from dataclasses import asdict
 from pathlib import Path
 from typing import Any, Dict, Tuple
 
@@ -12,11 +16,39 @@ from rich.panel import Panel
 from rich.spinner import Spinner
 
 from .__version__ import __version__
+from .allowlist import Allowlist
 from .config import BaishConfigError, Config
-from .llm import APIError
+from .daemon import analyze_via_daemon, run_daemon
+from .file_analyzer import detect_file_type, shebang_mime_type
+from .history import History
 from .logger import setup_logger
-from .main import analyze_script, console, save_results_json, save_script
 from .results_manager import ResultsManager
+from .retention import Retention, sweep_if_due
+from .scanner import scan_paths
+from .storage import InputError, save_results_json, save_script, spool_input
+from .timings import Timings, collect, stage
+
+# The analysis stack is only imported when it is needed, so a run that is
+# served by the daemon stays cheap
+_LAZY_IMPORTS = {
+    "APIError": ".llm",
+    "analyze_script": ".script_analyzer",
+    "console": ".main",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __package__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _lazy(name: str) -> Any:
+    # Look the name up at call time so the lazy import (and any patching) applies
+    return globals().get(name) or __getattr__(name)
 
 
 class BaishCLI:
@@ -32,6 +64,8 @@ class BaishCLI:
             self.results_mgr = ResultsManager(self.config)
             self.results_mgr.current_id = self.unique_id
             self.results_mgr.current_date = self.date_str
+            self.spooled = None
+            self.timings = Timings() if args.timings else None
             self.logger.debug(f"Starting analysis session {self.unique_id}")
         except ValueError as e:
             if "Config file not found" in str(e):
@@ -51,7 +85,8 @@ class BaishCLI:
                 return 1
 
             self.logger.debug("Analyzing script")
-            results = self._analyze_script(script)
+            with collect(self.timings):
+                results = self._analyze_script(script)
             if not results:
                 return 1
 
@@ -63,64 +98,83 @@ class BaishCLI:
 
         except Exception as e:
             return self._handle_error(e)
+        finally:
+            # save_script moves the spool file into place. If the run stopped
+            # before that, don't leave the .partial file behind.
+            if self.spooled:
+                self.spooled.discard()
 
     def _read_input(self) -> str | None:
         try:
             if self.args.input:
                 with open(self.args.input, "rb") as f:
-                    raw_data = f.read()
+                    self.spooled = spool_input(
+                        f, self.config, self.date_str, self.unique_id
+                    )
             else:
                 if sys.stdin.isatty():
                     self._error("No input provided", show_usage=True)
                     return None
-                raw_data = sys.stdin.buffer.read()
-
-            if self._is_binary(raw_data):
-                self._error("Input appears to be binary data")
-                return None
+                self.spooled = spool_input(
+                    sys.stdin.buffer, self.config, self.date_str, self.unique_id
+                )
 
-            return raw_data.decode("utf-8")
-        except (FileNotFoundError, UnicodeDecodeError) as e:
+            self.logger.debug(
+                f"Read {self.spooled.size} bytes, sha256 {self.spooled.sha256}"
+            )
+            try:
+                script = self.spooled.read_text()
+            finally:
+                if not self.spooled.size:
+                    self.spooled.discard()
+            return script
+        except UnicodeDecodeError as e:
+            self.spooled.discard()
+            self._error(f"Error reading input: {e}")
+            return None
+        except FileNotFoundError as e:
             self._error(f"Error reading input: {e}")
             return None
+        except InputError as e:
+            self._error(str(e))
+            return None
 
     def _analyze_script(self, script: str) -> Dict[str, Any] | None:
         try:
-            script_path = save_script(
-                script,
-                config=self.config,
-                date_str=self.date_str,
-                unique_id=self.unique_id,
-            )
-
-            if self.args.output == "json":
-                results = analyze_script(
-                    script,
-                    self.results_mgr,
-                    False,
-                    config=self.config,
-                    cli_provider=self.args.llm,
-                )
-            else:
-                if not self.args.shield:
+            # Only the shebang is checked here. Loading libmagic would undo
+            # the cheap path through the daemon, so scripts without a clear
+            # shebang are left to the daemon or analyze_script to detect.
+            file_info = None
+            if shebang_mime_type(script):
+                with stage("libmagic"):
+                    file_info = detect_file_type(script)
+
+            results = None
+            try:
+                if self.args.output == "json":
+                    results = self._run_analysis(script, False, file_info)
+                elif not self.args.shield:
                     with Live(
                         Spinner("dots", text="Analyzing file..."), refresh_per_second=10
                     ):
-                        results = analyze_script(
-                            script,
-                            self.results_mgr,
-                            self.args.debug,
-                            config=self.config,
-                            cli_provider=self.args.llm,
+                        results = self._run_analysis(
+                            script, self.args.debug, file_info
                         )
                 else:
-                    results = analyze_script(
-                        script,
-                        self.results_mgr,
-                        self.args.debug,
-                        config=self.config,
-                        cli_provider=self.args.llm,
-                    )
+                    results = self._run_analysis(script, self.args.debug, file_info)
+            finally:
+                # The analysis reports the type it detected. The script is
+                # kept even if the analysis fails.
+                if file_info is None and results and results[4]:
+                    file_info = {"mime_type": results[4]}
+                script_path = save_script(
+                    script,
+                    config=self.config,
+                    date_str=self.date_str,
+                    unique_id=self.unique_id,
+                    spooled=self.spooled,
+                    file_info=file_info,
+                )
 
             if results[0] == 0 and results[1] == 0:  # If harm and complexity are 0
                 self._error(results[2])
@@ -143,8 +197,62 @@ class BaishCLI:
             self._error(f"Error analyzing script: {e}")
             return None
 
+    def _run_analysis(self, script: str, debug: bool, file_info: dict) -> Tuple:
+        use_cache = not self.args.no_cache
+        # Shield mode only needs to know whether to block, so the map phase
+        # can stop at the first chunk that settles it
+        if self.args.shield and self.config.early_exit == "shield":
+            self.config.early_exit = "always"
+        if self.args.record:
+            self.config.record_file = self.args.record
+        # The daemon's LLM calls wouldn't reach this process's cassette, and
+        # its stages wouldn't be timed here
+        if not (self.args.record or self.args.timings or self.args.no_daemon):
+            results = analyze_via_daemon(
+                self.config,
+                script,
+                self.results_mgr,
+                debug=debug,
+                cli_provider=self.args.llm,
+                use_cache=use_cache,
+                file_info=file_info,
+            )
+            if results is not None:
+                self.logger.debug("Analysis served by the baish daemon")
+                return results
+
+        # Importing the analysis stack is a large part of a cold run
+        with stage("import"):
+            analyze_script = _lazy("analyze_script")
+        return analyze_script(
+            script,
+            self.results_mgr,
+            debug,
+            config=self.config,
+            cli_provider=self.args.llm,
+            use_cache=use_cache,
+            file_info=file_info,
+        )
+
+    def _record_history(
+        self, results: Dict[str, Any], results_path: Path | None = None
+    ) -> None:
+        llm = self.config.llms.get(self.args.llm or self.config.default_llm)
+        try:
+            History(self.config).record(
+                f"{self.date_str}_{self.unique_id}",
+                results,
+                self.spooled.sha256 if self.spooled else None,
+                provider=llm.provider if llm else None,
+                model=llm.model if llm else None,
+                results_path=results_path,
+            )
+        except (sqlite3.Error, OSError) as e:
+            self.logger.warning(f"Could not add the run to the history index: {e}")
+
     def _handle_shield_mode(self, script: str, results: Dict[str, Any]) -> int:
-        if results["harm_score"] >= 6 or not isinstance(
+        self._record_history(results)
+        if results["harm_score"] >= self.config.block_harm_score or not isinstance(
             results["harm_score"], (int, float)
         ):
             print('echo "Script unsafe: High risk score detected"')
@@ -161,14 +269,22 @@ class BaishCLI:
             self._error(results["explanation"])
             return 1
 
+        if self.timings:
+            results["timings"] = self.timings.to_dict()
+
         # Save results to JSON file
-        save_results_json(
-            results,
-            Path(results["script_path"]),
-            self.date_str,
-            self.unique_id,
-            self.config,
-        )
+        with collect(self.timings):
+            results_path = save_results_json(
+                results,
+                Path(results["script_path"]),
+                self.date_str,
+                self.unique_id,
+                self.config,
+            )
+        if self.timings:
+            # The results file can't include the time taken to write it
+            results["timings"] = self.timings.to_dict()
+        self._record_history(results, results_path)
 
         if self.args.output == "json":
             print(json.dumps(results, indent=2))
@@ -178,7 +294,7 @@ class BaishCLI:
 
     def _display_rich_panel(self, results: Dict[str, Any]) -> None:
         harm_color = self._get_harm_color(results["harm_score"])
-        console.print(
+        _lazy("console").print(
             Panel.fit(
                 f"[bold]Analysis Results - {os.path.basename(results['script_path'])}[/bold]\n\n"
                 f"Harm Score:       [{harm_color}]{results['harm_score']}/10[/{harm_color}] {self._get_bar_graph(results['harm_score'])}\n"
@@ -195,20 +311,6 @@ class BaishCLI:
             )
         )
 
-    @staticmethod
-    def _is_binary(data: bytes) -> bool:
-        binary_sigs = [
-            b"\x89PNG",  # PNG
-            b"GIF8",  # GIF
-            b"\xFF\xD8\xFF",  # JPEG
-            b"SQLite",  # SQLite DB
-            b"PK\x03\x04",  # ZIP
-            bytes([0]),  # Null bytes
-        ]
-        return (
-            any(data.startswith(sig) for sig in binary_sigs) or b"\x00" in data[:1024]
-        )
-
     @staticmethod
     def _get_harm_color(harm_score: int | str) -> str:
         if harm_score == "unknown":
@@ -229,12 +331,12 @@ class BaishCLI:
         elif self.args.output == "json":
             print(json.dumps({"error": str(message)}))
         else:
-            console.print(f"[red]Error: {message}[/red]")
+            _lazy("console").print(f"[red]Error: {message}[/red]")
             if show_usage:
-                console.print("Usage: cat script.sh | baish")
+                _lazy("console").print("Usage: cat script.sh | baish")
 
     def _handle_error(self, error: Exception) -> int:
-        if isinstance(error, APIError):
+        if isinstance(error, _lazy("APIError")):
             self.results_mgr.error(f"API Error: {error}")
             self._error(str(error))
         else:
@@ -253,6 +355,13 @@ Examples:
   cat script.sh | baish
   baish < script.sh
   curl https://example.com/script.sh | baish -s | bash  # shield mode
+  baish daemon  # keep a warm analysis daemon running for faster checks
+  baish scan ./repo 'tools/**/*.sh' > results.jsonl  # bulk scan to JSONL
+  baish allowlist add install.sh  # mark a vetted script as known-good
+  baish history --min-harm 6 --since 2024-01-01  # past verdicts
+  baish gc  # apply the retention limits to ~/.baish now
+  baish --no-cache --record run.jsonl scan ./corpus  # record LLM traffic
+  baish --timings -o json < script.sh  # where the time went, per stage
         """,
     )
 
@@ -276,6 +385,92 @@ Examples:
         help="Output format (text or json)",
     )
     parser.add_argument("--llm", help="Set LLM model configuration name")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Skip the verdict cache and always run a fresh analysis",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="CASSETTE",
+        help="Append every LLM prompt and response to this cassette file",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Analyze in this process even if a baish daemon is running",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Add per-stage timings to the results file and JSON output",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser(
+        "daemon",
+        help="Run a warm analysis daemon on a per-user Unix socket",
+    )
+    scan_parser = subparsers.add_parser(
+        "scan",
+        help="Analyze files, directories and globs, one JSON line per script",
+    )
+    scan_parser.add_argument(
+        "paths", nargs="+", help="Files, directories or glob patterns to scan"
+    )
+    scan_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        help="Number of files to analyze concurrently (default: scan.workers)",
+    )
+    allowlist_parser = subparsers.add_parser(
+        "allowlist", help="Manage the allowlist of known-good script hashes"
+    )
+    allowlist_commands = allowlist_parser.add_subparsers(
+        dest="allowlist_command", required=True
+    )
+    allowlist_add = allowlist_commands.add_parser(
+        "add", help="Allowlist the given script files"
+    )
+    allowlist_add.add_argument("files", nargs="+", help="Script files to allowlist")
+    allowlist_import = allowlist_commands.add_parser(
+        "import", help="Import hashes from a file, e.g. sha256sum output"
+    )
+    allowlist_import.add_argument("file", help="File with one SHA-256 hash per line")
+    allowlist_results = allowlist_commands.add_parser(
+        "import-results", help="Allowlist previously analyzed scripts"
+    )
+    allowlist_results.add_argument(
+        "--max-harm",
+        type=int,
+        default=2,
+        help="Only import scripts whose harm score was at most this (default: 2)",
+    )
+
+    history_parser = subparsers.add_parser(
+        "history", help="Query past analyses, most recent first"
+    )
+    history_commands = history_parser.add_subparsers(dest="history_command")
+    history_commands.add_parser(
+        "import", help="Index the results files of earlier runs"
+    )
+    history_parser.add_argument("--sha256", help="Script hash or hash prefix")
+    history_parser.add_argument(
+        "--since", help="Only runs at or after this date (YYYY-MM-DD)"
+    )
+    history_parser.add_argument("--min-harm", type=int, help="Minimum harm score")
+    history_parser.add_argument("--max-harm", type=int, help="Maximum harm score")
+    history_parser.add_argument("--file-type", help="File type, e.g. shellscript")
+    history_parser.add_argument("--model", help="Model that produced the verdict")
+    history_parser.add_argument(
+        "--limit", type=int, default=20, help="Number of runs to show (default: 20)"
+    )
+
+    subparsers.add_parser(
+        "gc",
+        help="Archive and prune stored scripts, results and logs now",
+    )
 
     # First parse to get config
     args, _ = parser.parse_known_args()
@@ -292,11 +487,113 @@ Examples:
     return parser.parse_args()
 
 
+def run_allowlist_command(args: argparse.Namespace, config: Config) -> int:
+    allowlist = Allowlist(config)
+    try:
+        if args.allowlist_command == "add":
+            added = allowlist.add_files(args.files)
+        elif args.allowlist_command == "import":
+            added = allowlist.import_file(args.file)
+        else:
+            added = allowlist.import_results(args.max_harm)
+    except OSError as e:
+        setup_logger().error(f"Error updating allowlist: {e}")
+        return 1
+
+    print(f"Added {added} new entries, {len(allowlist)} hashes allowlisted")
+    return 0
+
+
+def run_history_command(args: argparse.Namespace, config: Config) -> int:
+    history = History(config)
+    try:
+        if args.history_command == "import":
+            indexed = history.import_results()
+            print(f"Indexed {indexed} runs from {history.results_dir}")
+            return 0
+        runs = history.query(
+            sha256=args.sha256,
+            since=args.since,
+            min_harm=args.min_harm,
+            max_harm=args.max_harm,
+            file_type=args.file_type,
+            model=args.model,
+            limit=args.limit,
+        )
+    except sqlite3.Error as e:
+        setup_logger().error(f"Error reading history: {e}")
+        return 1
+
+    if args.output == "json":
+        print(json.dumps(runs, indent=2))
+        return 0
+    print(f"{'TIMESTAMP':<19}  HARM  CPLX  {'SHA256':<12}  {'MODEL':<24}  SCRIPT")
+    for run in runs:
+        print(
+            f"{run['timestamp'][:19]:<19}  {run['harm_score']:>4}  "
+            f"{run['complexity_score']:>4}  {(run['sha256'] or '-')[:12]:<12}  "
+            f"{run['model'] or '-':<24}  {run['script_path']}"
+        )
+    return 0
+
+
+def run_gc_command(args: argparse.Namespace, config: Config) -> int:
+    try:
+        stats = Retention(config).sweep()
+    except (OSError, tarfile.TarError) as e:
+        setup_logger().error(f"Error applying retention limits: {e}")
+        return 1
+    if stats is None:
+        setup_logger().error("Another baish process is already cleaning up")
+        return 1
+
+    if args.output == "json":
+        print(json.dumps(asdict(stats), indent=2))
+        return 0
+    print(
+        f"Moved {stats.moved} files into day directories, archived "
+        f"{stats.archived} days, deleted {stats.deleted} days "
+        f"({stats.freed_bytes / (1024 * 1024):.1f} MiB freed)"
+    )
+    return 0
+
+
 def main():
     try:
         args = parse_args()
+        if args.command == "daemon":
+            setup_logger(debug=args.debug)
+            config = Config.load(args.config) if args.config else Config.load()
+            sys.exit(run_daemon(config))
+        if args.command == "scan":
+            setup_logger(debug=args.debug)
+            config = Config.load(args.config) if args.config else Config.load()
+            config.record_file = args.record
+            sys.exit(
+                scan_paths(
+                    args.paths,
+                    config,
+                    workers=args.workers,
+                    cli_provider=args.llm,
+                    use_cache=not args.no_cache,
+                    timings=args.timings,
+                )
+            )
+        if args.command == "allowlist":
+            setup_logger(debug=args.debug)
+            config = Config.load(args.config) if args.config else Config.load()
+            sys.exit(run_allowlist_command(args, config))
+        if args.command == "history":
+            setup_logger(debug=args.debug)
+            config = Config.load(args.config) if args.config else Config.load()
+            sys.exit(run_history_command(args, config))
+        if args.command == "gc":
+            setup_logger(debug=args.debug)
+            config = Config.load(args.config) if args.config else Config.load()
+            sys.exit(run_gc_command(args, config))
         cli = BaishCLI(args)
         cli.run()
+        sweep_if_due(cli.config)
     except BaishConfigError:
         sys.exit(1)  # Error already logged by BaishConfigError
     except Exception as e:
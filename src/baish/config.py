@@ -1,8 +1,8 @@
 import os
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from urllib.parse import urlparse
 
 import yaml
@@ -29,7 +29,12 @@ class LLMConfig:
     api_key: Optional[str] = None
     temperature: float = 0.1
     token_limit: int = 8000
+    # Tokens kept free in every request for the model's reply
+    response_tokens: int = 1000
     url: Optional[str] = None
+    max_concurrency: int = 4
+    # Provider specific settings, e.g. the latency of the fake provider
+    options: Dict[str, Any] = field(default_factory=dict)
 
     def __post_init__(self):
         if self.provider == "ollama":
@@ -54,8 +59,44 @@ class Config:
     baish_dir: Path = Path.home() / ".baish"
     current_id: Optional[str] = None
     current_date: Optional[str] = None
-
-    SUPPORTED_PROVIDERS = ["groq", "anthropic", "ollama", "openai", "cohere"]
+    cache_enabled: bool = True
+    cache_max_entries: int = 1000
+    cache_max_age_days: int = 30
+    static_filter_enabled: bool = True
+    token_count_mode: str = "exact"
+    scan_workers: int = 4
+    max_input_bytes: int = 10 * 1024 * 1024
+    # Map summaries combined per reduce request
+    reduce_fan_in: int = 8
+    # Shield mode blocks scripts with at least this harm score
+    block_harm_score: int = 6
+    # When to stop the map phase at the first chunk that reaches
+    # block_harm_score: "shield", "always" or "never"
+    early_exit: str = "shield"
+    # Limits for the scripts, results and logs directories, 0 disables one
+    retention_max_age_days: int = 180
+    retention_max_bytes: int = 1024 * 1024 * 1024
+    retention_max_runs: int = 10000
+    # Logs and results older than this are packed into one archive per day
+    retention_archive_after_days: int = 7
+    # Hours between automatic sweeps, 0 leaves retention to `baish gc`
+    retention_sweep_hours: int = 24
+    # Cassette that LLM prompts and responses are appended to (--record)
+    record_file: Optional[str] = None
+    config_file: Optional[str] = None
+
+    SUPPORTED_PROVIDERS = [
+        "groq",
+        "anthropic",
+        "ollama",
+        "openai",
+        "cohere",
+        "fake",
+        "replay",
+    ]
+    KEYLESS_PROVIDERS = ["ollama", "fake", "replay"]
+    TOKEN_COUNT_MODES = ["exact", "approximate"]
+    EARLY_EXIT_MODES = ["shield", "always", "never"]
 
     @staticmethod
     def validate_llm_name(name: str) -> bool:
@@ -63,6 +104,12 @@ class Config:
 
         return bool(re.match(r"^[a-zA-Z0-9_]{1,32}$", name))
 
+    @staticmethod
+    def _plugin_providers() -> list[str]:
+        from .llm import plugin_provider_names
+
+        return plugin_provider_names()
+
     @classmethod
     def load(cls, config_file: Optional[str] = None) -> "Config":
         """Load config from file"""
@@ -108,13 +155,15 @@ class Config:
                     raise BaishConfigError(f"Invalid LLM name: {name}")
 
                 provider = llm_data["provider"]
-                if provider not in cls.SUPPORTED_PROVIDERS:
+                builtin = provider in cls.SUPPORTED_PROVIDERS
+                if not builtin and provider not in cls._plugin_providers():
                     raise BaishConfigError(f"Unsupported provider: {provider}")
 
                 api_key = llm_data.get("api_key") or os.getenv(
                     f"{provider.upper()}_API_KEY"
                 )
-                if not api_key and provider != "ollama":
+                # Plugin providers check their own credentials
+                if not api_key and builtin and provider not in cls.KEYLESS_PROVIDERS:
                     raise BaishConfigError(f"No API key found for {provider}")
 
                 configured_llms[name] = LLMConfig(
@@ -124,15 +173,50 @@ class Config:
                     api_key=api_key,
                     temperature=llm_data.get("temperature", 0.1),
                     token_limit=llm_data.get("token_limit", 4000),
+                    response_tokens=llm_data.get("response_tokens", 1000),
                     url=llm_data.get("url"),
+                    max_concurrency=llm_data.get("max_concurrency", 4),
+                    options=llm_data.get("options") or {},
                 )
 
             default_llm = config_data.get("default_llm")
             if not default_llm:
                 raise BaishConfigError("No default LLM specified")
 
+            cache_data = config_data.get("cache") or {}
+            scan_data = config_data.get("scan") or {}
+            retention_data = config_data.get("retention") or {}
+
+            token_count_mode = config_data.get("token_count_mode", "exact")
+            if token_count_mode not in cls.TOKEN_COUNT_MODES:
+                raise BaishConfigError(f"Invalid token_count_mode: {token_count_mode}")
+
+            early_exit = config_data.get("early_exit", "shield")
+            if early_exit not in cls.EARLY_EXIT_MODES:
+                raise BaishConfigError(f"Invalid early_exit: {early_exit}")
+
             return cls(
-                llms=configured_llms, default_llm=default_llm, baish_dir=baish_dir
+                llms=configured_llms,
+                default_llm=default_llm,
+                baish_dir=baish_dir,
+                cache_enabled=cache_data.get("enabled", True),
+                cache_max_entries=cache_data.get("max_entries", 1000),
+                cache_max_age_days=cache_data.get("max_age_days", 30),
+                static_filter_enabled=config_data.get("static_filter", True),
+                token_count_mode=token_count_mode,
+                scan_workers=scan_data.get("workers", 4),
+                max_input_bytes=config_data.get("max_input_bytes", 10 * 1024 * 1024),
+                reduce_fan_in=config_data.get("reduce_fan_in", 8),
+                block_harm_score=config_data.get("block_harm_score", 6),
+                early_exit=early_exit,
+                retention_max_age_days=retention_data.get("max_age_days", 180),
+                retention_max_bytes=retention_data.get("max_bytes", 1024 * 1024 * 1024),
+                retention_max_runs=retention_data.get("max_runs", 10000),
+                retention_archive_after_days=retention_data.get(
+                    "archive_after_days", 7
+                ),
+                retention_sweep_hours=retention_data.get("sweep_hours", 24),
+                config_file=str(Path(config_path).resolve()),
             )
 
         except BaishConfigError:
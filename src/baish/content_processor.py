@@ -1,45 +1,61 @@
-from .token_counter import count_tokens
+from typing import Optional
 
+from .token_counter import DEFAULT_MODEL, token_offsets
 
-def chunk_content(content: str, chunk_size: int) -> list[str]:
-    """Split content into chunks based on token count."""
+
+def chunk_content(
+    content: str,
+    chunk_size: int,
+    offsets: Optional[list[int]] = None,
+    model: str = DEFAULT_MODEL,
+) -> list[str]:
+    """Split content into chunks based on token count.
+
+    The content is encoded once; ``offsets`` (from ``token_offsets``) can be
+    passed in when the caller has already encoded it. Each token is assigned
+    to the line it starts on, lines are packed greedily into chunks, and lines
+    longer than ``chunk_size`` are cut at token boundaries.
+    """
     if not content:
         return [""]
 
-    # Count total tokens first
-    total_tokens = count_tokens(content)
-    if total_tokens <= chunk_size:
+    if offsets is None:
+        offsets = token_offsets(content, model)
+    if len(offsets) <= chunk_size:
         return [content]
 
     chunks = []
     current_chunk = []
     current_size = 0
+    token_index = 0
+    line_start = 0
+
+    lines = content.split("\n")
+    if lines[-1] == "":
+        lines.pop()
 
-    for line in content.splitlines():
-        line_tokens = count_tokens(line + "\n")
+    for line in lines:
+        line_end = line_start + len(line)
+        first_token = token_index
+        # Tokens starting on this line, including its trailing newline
+        while token_index < len(offsets) and offsets[token_index] <= line_end:
+            token_index += 1
+        line_tokens = token_index - first_token
 
         # Handle single long lines
         if line_tokens > chunk_size:
-            words = line.split()
-            current_word_chunk = []
-            current_word_size = 0
-
-            for word in words:
-                word_tokens = count_tokens(word + " ")
-                if current_word_size + word_tokens > chunk_size:
-                    if current_word_chunk:
-                        chunks.append(" ".join(current_word_chunk))
-                    current_word_chunk = [word]
-                    current_word_size = word_tokens
-                else:
-                    current_word_chunk.append(word)
-                    current_word_size += word_tokens
-
-            if current_word_chunk:
-                chunks.append(" ".join(current_word_chunk))
-            continue
-
-        if current_size + line_tokens > chunk_size:
+            if current_chunk:
+                chunks.append("\n".join(current_chunk))
+                current_chunk = []
+                current_size = 0
+            for start in range(first_token, token_index, chunk_size):
+                stop = start + chunk_size
+                piece_start = max(offsets[start], line_start)
+                piece_end = offsets[stop] if stop < token_index else line_end
+                piece = content[piece_start : min(piece_end, line_end)].strip()
+                if piece:
+                    chunks.append(piece)
+        elif current_size + line_tokens > chunk_size:
             if current_chunk:
                 chunks.append("\n".join(current_chunk))
             current_chunk = [line]
@@ -48,6 +64,8 @@ def chunk_content(content: str, chunk_size: int) -> list[str]:
             current_chunk.append(line)
             current_size += line_tokens
 
+        line_start = line_end + 1
+
     if current_chunk:
         chunks.append("\n".join(current_chunk))
 
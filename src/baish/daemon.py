@@ -0,0 +1,228 @@
+"""Warm analysis daemon serving requests over a per-user Unix socket.
+
+The client half of this module only uses the standard library so that a
+``baish`` run talking to the daemon doesn't pay for importing the analysis
+stack. Server-side imports are deferred into the methods that need them.
+"""
+
+import copy
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .config import Config
+from .logger import setup_logger
+from .results_manager import ResultsManager
+
+logger = setup_logger()
+
+SOCKET_NAME = "daemon.sock"
+CONNECT_TIMEOUT = 0.5  # seconds
+
+
+class DaemonError(Exception):
+    """Analysis failed inside the daemon"""
+
+    pass
+
+
+def socket_path(config: Config) -> Path:
+    return Path(config.baish_dir) / SOCKET_NAME
+
+
+def analyze_via_daemon(
+    config: Config,
+    script: str,
+    results_mgr: ResultsManager,
+    debug: bool = False,
+    cli_provider: Optional[str] = None,
+    use_cache: bool = True,
+    file_info: Optional[Dict[str, Any]] = None,
+) -> Optional[Tuple[int, int, str, bool, str]]:
+    """Analyze a script in a running daemon.
+
+    Returns None when no daemon is reachable, or it can't serve this config,
+    so the caller can fall back to analyzing in-process.
+    """
+    path = socket_path(config)
+    if not path.exists():
+        return None
+
+    request = {
+        "script": script,
+        "config_file": config.config_file,
+        "llm": cli_provider,
+        "use_cache": use_cache,
+        "early_exit": config.early_exit,
+        "debug": debug,
+        "file_info": file_info,
+        "date_str": results_mgr.current_date,
+        "unique_id": results_mgr.current_id,
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(path))
+            # The analysis itself takes as long as the LLM does
+            sock.settimeout(None)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError as e:
+        logger.debug(f"Daemon not available, analyzing in-process: {e}")
+        return None
+
+    if not line:
+        logger.debug("Daemon closed the connection, analyzing in-process")
+        return None
+
+    response = json.loads(line)
+    if "fallback" in response:
+        logger.debug(f"Daemon declined request: {response['fallback']}")
+        return None
+    if "error" in response:
+        raise DaemonError(response["error"])
+    return tuple(response["results"])
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.baish_daemon.handle_request(request)
+        except Exception as e:
+            logger.debug(f"Daemon request failed: {repr(e)}")
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    def verify_request(self, request, client_address) -> bool:
+        # The socket is already private to the user, but double check the
+        # peer where the platform lets us
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        creds = request.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        _, uid, _ = struct.unpack("3i", creds)
+        return uid == os.getuid()
+
+
+class BaishDaemon:
+    """Keeps config, provider imports, YARA rules, libmagic and the tokenizer
+    loaded between analyses."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._config_mtime = self._mtime(config.config_file)
+        self._lock = threading.Lock()
+        self.server: Optional[_UnixServer] = None
+
+    @staticmethod
+    def _mtime(path: Optional[str]) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime if path else None
+        except OSError:
+            return None
+
+    def warm_up(self) -> None:
+        from .file_analyzer import detect_file_type
+        from .llm import get_llm
+        from .token_counter import get_encoding
+        from .yara_checker import get_yara_checker
+
+        get_yara_checker(Path(self.config.baish_dir) / "cache")
+        detect_file_type("#!/bin/sh\n")
+        get_encoding(self.config.llm.model)
+        get_llm(self.config)
+
+    def _current_config(self) -> Config:
+        """Reload the config file if it changed since it was last read"""
+        with self._lock:
+            mtime = self._mtime(self.config.config_file)
+            if mtime != self._config_mtime:
+                logger.info("Config file changed, reloading")
+                self.config = Config.load(self.config.config_file)
+                self._config_mtime = mtime
+            return self.config
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from .script_analyzer import analyze_script
+
+        config = self._current_config()
+        if request.get("config_file") != config.config_file:
+            return {"fallback": "config mismatch"}
+
+        # analyze_script mutates the config, so each request gets its own copy
+        config = copy.copy(config)
+        config.early_exit = request.get("early_exit", config.early_exit)
+        results_mgr = ResultsManager(config)
+        results_mgr.current_date = request.get("date_str")
+        results_mgr.current_id = request.get("unique_id")
+
+        results = analyze_script(
+            request["script"],
+            results_mgr,
+            request.get("debug", False),
+            config=config,
+            cli_provider=request.get("llm"),
+            use_cache=request.get("use_cache", True),
+            file_info=request.get("file_info"),
+        )
+        return {"results": list(results)}
+
+    def serve(self) -> None:
+        path = socket_path(self.config)
+        if path.exists():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                if sock.connect_ex(str(path)) == 0:
+                    raise DaemonError(f"A daemon is already listening on {path}")
+            path.unlink()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        old_umask = os.umask(0o177)
+        try:
+            server = _UnixServer(str(path), _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        server.baish_daemon = self
+        self.server = server
+
+        logger.info(f"Baish daemon listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            path.unlink(missing_ok=True)
+
+    def shutdown(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+
+
+def run_daemon(config: Config) -> int:
+    if os.geteuid() == 0:
+        logger.error("Running as root is not allowed for security reasons")
+        return 1
+
+    daemon = BaishDaemon(config)
+    # Stop cleanly on SIGTERM so the socket is removed
+    signal.signal(
+        signal.SIGTERM, lambda *_: threading.Thread(target=daemon.shutdown).start()
+    )
+    daemon.warm_up()
+    try:
+        daemon.serve()
+    except DaemonError as e:
+        logger.error(str(e))
+        return 1
+    return 0
@@ -0,0 +1,160 @@
+"""Offline chat model behind the `fake` provider.
+
+Every prompt is answered with a JSON verdict, either a canned one from the
+config or one derived from a few rules, after a simulated latency. Jitter and
+which calls fail are derived from a hash of the prompt and a seed rather than
+a shared random stream, so a run gives the same answers however its requests
+are interleaved. Used for load testing and benchmarks without API calls.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from .token_counter import count_tokens
+
+# (pattern, harm score, explanation) for the rule-generated verdicts
+RULES = [
+    (
+        re.compile(r"/dev/tcp/|\bnc\b[^\n]*\s-e\s|\bbash\s+-i\b"),
+        9,
+        "opens a reverse shell",
+    ),
+    (
+        re.compile(r"\brm\s+-\w*r\w*\s+(/|~)(\s|$)|\bmkfs\b|\bdd\b[^\n]*of=/dev/"),
+        8,
+        "destroys data",
+    ),
+    (
+        re.compile(r"\b(curl|wget)\b[^\n]*\s(-d|--data\S*|-F|-T|--upload-file)\s"),
+        7,
+        "uploads local data",
+    ),
+    (
+        re.compile(r"\bbase64\s+(-d|--decode)\b|\beval\b"),
+        5,
+        "decodes or evaluates generated code",
+    ),
+    (
+        re.compile(r"\b(curl|wget)\b[^\n|]*\|\s*(sudo\s+)?(ba|z)?sh\b"),
+        3,
+        "pipes a download into a shell",
+    ),
+]
+_ROOT_RE = re.compile(r"\bsudo\b|\bsystemctl\b|\bapt(-get)?\s+install\b|\s/etc/")
+# Map verdicts as they appear in a reduce request
+_SUMMARY_RE = re.compile(r"['\"](harm_score|complexity_score)['\"]:\s*(\d+)")
+_SUMMARY_ROOT_RE = re.compile(r"['\"]requires_root['\"]:\s*(True|true)")
+REDUCE_REQUEST = "Combine these analyses"
+
+
+class SimulatedError(Exception):
+    """Failure injected by the fake provider's error_rate"""
+
+    pass
+
+
+def rule_verdict(content: str) -> Dict[str, Any]:
+    """Verdict for a script section, or the combination of the section
+    verdicts in a reduce request"""
+    if content.startswith(REDUCE_REQUEST):
+        scores = {"harm_score": [1], "complexity_score": [1]}
+        for name, value in _SUMMARY_RE.findall(content):
+            scores[name].append(int(value))
+        return {
+            "harm_score": max(scores["harm_score"]),
+            "complexity_score": max(scores["complexity_score"]),
+            "requires_root": bool(_SUMMARY_ROOT_RE.search(content)),
+            "explanation": "Combined verdict of the script's sections.",
+        }
+
+    matches = [
+        (score, reason) for regex, score, reason in RULES if regex.search(content)
+    ]
+    explanation = "No risky operations found."
+    if matches:
+        explanation = f"The script {', '.join(reason for _, reason in matches)}."
+    return {
+        "harm_score": max([1] + [score for score, _ in matches]),
+        "complexity_score": min(10, 1 + content.count("\n") // 50),
+        "requires_root": bool(_ROOT_RE.search(content)),
+        "explanation": explanation,
+    }
+
+
+class FakeChatModel(BaseChatModel):
+    model_config = ConfigDict(extra="forbid")
+
+    model_name: str = "fake"
+    # Returned as is instead of a rule-generated verdict
+    verdict: Optional[Dict[str, Any]] = None
+    # Seconds before the reply starts, plus up to latency_jitter more
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Reply speed, 0 returns the whole reply at once
+    tokens_per_second: float = 0.0
+    # Fraction of requests that fail after their latency
+    error_rate: float = 0.0
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def _respond(
+        self, messages: List[BaseMessage]
+    ) -> Tuple[float, Optional[ChatResult]]:
+        """The delay before replying, and the reply, which is None for
+        requests picked by error_rate"""
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(f"{self.seed}\0{prompt}".encode("utf-8")).digest()
+        fail_draw, jitter_draw = (v / 2**32 for v in struct.unpack(">II", digest[:8]))
+
+        content = str(messages[-1].content) if messages else ""
+        text = json.dumps(self.verdict or rule_verdict(content))
+        output_tokens = count_tokens(text, self.model_name, mode="approximate")
+        delay = self.latency + self.latency_jitter * jitter_draw
+        if self.tokens_per_second:
+            delay += output_tokens / self.tokens_per_second
+
+        if fail_draw < self.error_rate:
+            return delay, None
+        input_tokens = count_tokens(prompt, self.model_name, mode="approximate")
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return delay, ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        delay, result = self._respond(messages)
+        time.sleep(delay)
+        if result is None:
+            raise SimulatedError("Simulated provider error")
+        return result
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], **kwargs: Any
+    ) -> ChatResult:
+        delay, result = self._respond(messages)
+        await asyncio.sleep(delay)
+        if result is None:
+            raise SimulatedError("Simulated provider error")
+        return result
@@ -1,14 +1,86 @@
+import os
+import re
+from functools import lru_cache
 from typing import Optional, Tuple
 
 from magic import Magic
 
+# Text types that are never worth sending to the LLM
+NON_SCRIPT_TYPES = ["text/markdown", "text/plain"]
+# Explanation of the verdict given to them
+NON_SCRIPT_PREFIX = "Non-script file detected: "
+
+BINARY_SIGNATURES = [
+    b"\x89PNG",  # PNG
+    b"GIF8",  # GIF
+    b"\xff\xd8\xff",  # JPEG
+    b"SQLite",  # SQLite DB
+    b"PK\x03\x04",  # ZIP
+    bytes([0]),  # Null bytes
+]
+
+
+# libmagic never looks further than this into a buffer
+DETECT_BYTES = 1024 * 1024
+
+# Interpreters that are unambiguous from the shebang alone, with the MIME type
+# libmagic reports for them
+SHEBANG_MIME_TYPES = {
+    "sh": "text/x-shellscript",
+    "bash": "text/x-shellscript",
+    "dash": "text/x-shellscript",
+    "ash": "text/x-shellscript",
+    "ksh": "text/x-shellscript",
+    "zsh": "text/x-shellscript",
+    "python": "text/x-script.python",
+}
+
+_SHEBANG_RE = re.compile(r"#![ \t]*(\S+)([^\n]*)")
+
+
+@lru_cache(maxsize=1)
+def get_magic() -> Magic:
+    """Process-wide libmagic handle, so the magic database is loaded once.
+    python-magic serializes calls on a handle with its own lock."""
+    return Magic(mime=True)
+
+
+def shebang_mime_type(content: str) -> Optional[str]:
+    """MIME type for scripts with an obvious shell or python shebang"""
+    match = _SHEBANG_RE.match(content)
+    if not match:
+        return None
+
+    interpreter = os.path.basename(match.group(1))
+    if interpreter == "env":
+        # Skip env options like -S and VAR=value assignments
+        args = [
+            arg
+            for arg in match.group(2).split()
+            if not arg.startswith("-") and "=" not in arg
+        ]
+        interpreter = os.path.basename(args[0]) if args else ""
+    # python3, python3.12, ...
+    interpreter = interpreter.rstrip("0123456789.")
+    return SHEBANG_MIME_TYPES.get(interpreter)
+
 
 def evaluate_file_type(content: str) -> str:
-    magic = Magic(mime=True)
-    return magic.from_buffer(content)
+    return get_magic().from_buffer(content[:DETECT_BYTES])
 
 
 def detect_file_type(content: str) -> dict:
-    mime_type = evaluate_file_type(content)
+    mime_type = shebang_mime_type(content) or evaluate_file_type(content)
     is_text = mime_type.startswith("text/") or (mime_type == "application/x-empty")
     return {"mime_type": mime_type, "is_text": is_text}
+
+
+def is_script(file_info: dict) -> bool:
+    return file_info["is_text"] and file_info["mime_type"] not in NON_SCRIPT_TYPES
+
+
+def is_binary(data: bytes) -> bool:
+    """Check the start of the input for binary signatures or null bytes"""
+    return (
+        any(data.startswith(sig) for sig in BINARY_SIGNATURES) or b"\x00" in data[:1024]
+    )
@@ -0,0 +1,183 @@
+"""SQLite index of past analyses.
+
+Every run is recorded with its script hash, verdict, model and the paths of
+its stored script and results, so "have we seen this script before and what
+did we decide" is one indexed query instead of a walk over `results/`.
+"""
+
+import hashlib
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .config import Config
+from .logger import setup_logger
+from .retention import locate, read_stored
+
+logger = setup_logger()
+
+COLUMNS = [
+    "run_id",
+    "sha256",
+    "timestamp",
+    "provider",
+    "model",
+    "harm_score",
+    "complexity_score",
+    "uses_root",
+    "file_type",
+    "explanation",
+    "script_path",
+    "results_path",
+]
+
+
+class History:
+    def __init__(self, config: Config):
+        self.db_path = Path(config.baish_dir) / "history.db"
+        self.results_dir = Path(config.baish_dir) / "results"
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.db_path)
+        db.row_factory = sqlite3.Row
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                sha256 TEXT,
+                timestamp TEXT NOT NULL,
+                provider TEXT,
+                model TEXT,
+                harm_score INTEGER,
+                complexity_score INTEGER,
+                uses_root INTEGER,
+                file_type TEXT,
+                explanation TEXT,
+                script_path TEXT,
+                results_path TEXT
+            );
+            CREATE INDEX IF NOT EXISTS runs_sha256 ON runs (sha256);
+            CREATE INDEX IF NOT EXISTS runs_timestamp ON runs (timestamp);
+            """)
+        return db
+
+    @staticmethod
+    def _row(
+        run_id: str,
+        results: Dict[str, Any],
+        sha256: Optional[str],
+        provider: Optional[str],
+        model: Optional[str],
+        results_path: Optional[Path],
+    ) -> tuple:
+        return (
+            run_id,
+            sha256,
+            results.get("timestamp") or datetime.now().isoformat(),
+            provider,
+            model,
+            results.get("harm_score"),
+            results.get("complexity_score"),
+            results.get("uses_root"),
+            results.get("file_type"),
+            results.get("explanation"),
+            results.get("script_path"),
+            str(results_path) if results_path else None,
+        )
+
+    def _insert(self, rows: Iterable[tuple]) -> int:
+        with closing(self._connect()) as db:
+            with db:
+                before = db.total_changes
+                db.executemany(
+                    f"INSERT OR REPLACE INTO runs ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                    rows,
+                )
+                return db.total_changes - before
+
+    def record(
+        self,
+        run_id: str,
+        results: Dict[str, Any],
+        sha256: Optional[str],
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        results_path: Optional[Path] = None,
+    ) -> None:
+        self._insert(
+            [self._row(run_id, results, sha256, provider, model, results_path)]
+        )
+
+    def import_results(self) -> int:
+        """Index every results file in the results directory in one transaction.
+        Runs that are already indexed are updated, so this can be rerun."""
+        rows = []
+        for results_file, text in read_stored(self.results_dir, "*_results.json"):
+            try:
+                results = json.loads(text)
+                script_path = results.get("script_path")
+                try:
+                    sha256 = hashlib.sha256(
+                        locate(script_path).read_bytes()
+                    ).hexdigest()
+                except (OSError, TypeError):
+                    sha256 = None  # the script was moved or deleted
+                rows.append(
+                    self._row(
+                        results_file.name[: -len("_results.json")],
+                        results,
+                        sha256,
+                        results.get("provider"),
+                        results.get("model"),
+                        results_file,
+                    )
+                )
+            except (OSError, ValueError, KeyError) as e:
+                logger.debug(f"Skipping {results_file.name}: {e}")
+        return self._insert(rows)
+
+    def query(
+        self,
+        sha256: Optional[str] = None,
+        since: Optional[str] = None,
+        min_harm: Optional[int] = None,
+        max_harm: Optional[int] = None,
+        file_type: Optional[str] = None,
+        model: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[Dict[str, Any]]:
+        """Most recent runs first. sha256 matches on a prefix, since is an
+        ISO date or timestamp."""
+        clauses = []
+        params = []
+        for clause, value in [
+            ("sha256 LIKE ?", sha256 and f"{sha256.lower()}%"),
+            ("timestamp >= ?", since),
+            ("harm_score >= ?", min_harm),
+            ("harm_score <= ?", max_harm),
+            ("file_type LIKE ?", file_type and f"%{file_type}%"),
+            ("model = ?", model),
+        ]:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                f"SELECT * FROM runs {where} ORDER BY timestamp DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            {
+                **row,
+                "uses_root": (
+                    None if row["uses_root"] is None else bool(row["uses_root"])
+                ),
+            }
+            for row in map(dict, rows)
+        ]
@@ -1,26 +1,49 @@
 import datetime
+import importlib
 import json
 import re
+import time
 import uuid
-from typing import Any, Dict, Optional
-
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import Runnable
-from langchain_anthropic import ChatAnthropic
-from langchain_groq import ChatGroq
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
-from langchain_cohere import ChatCohere
-
-from .config import Config
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import Runnable
+
+from .config import Config, LLMConfig
 from .logger import setup_logger
 from .prompts.security import PROMPT as SECURITY_PROMPT
 from .results_manager import ResultsManager
+from .timings import Timings, current_timings, stage
 
 # Initialize logger at module level
 logger = setup_logger()
 
+PROVIDER_ENTRY_POINT_GROUP = "baish.providers"
+
+# Provider integrations are slow to import, so they are only imported when
+# the provider is actually selected
+_LAZY_IMPORTS = {
+    "ChatAnthropic": "langchain_anthropic",
+    "ChatCohere": "langchain_cohere",
+    "ChatGroq": "langchain_groq",
+    "ChatOllama": "langchain_ollama",
+    "ChatOpenAI": "langchain_openai",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _chat_class(name: str) -> Any:
+    # Look the class up at call time so the lazy import (and any patching) applies
+    return globals().get(name) or __getattr__(name)
+
 
 class CustomJsonParser(Runnable):
     def invoke(self, input: Any, config: Optional[Dict] = None) -> Dict:
@@ -29,6 +52,10 @@ class CustomJsonParser(Runnable):
         else:
             text = str(input)
 
+        with stage("parse"):
+            return self._parse(text)
+
+    def _parse(self, text: str) -> Dict:
         if not text.strip():
             raise ValueError("Empty response from LLM")
 
@@ -60,6 +87,12 @@ class CustomJsonParser(Runnable):
             f"No JSON found in response, this is usually due to a short context window in the LLM provider"
         )
 
+    async def ainvoke(
+        self, input: Any, config: Optional[Dict] = None, **kwargs: Any
+    ) -> Dict:
+        # Parsing is cheap, so skip the default hop to a worker thread
+        return self.invoke(input, config)
+
 
 class LLMError(Exception):
     """Base exception for LLM-related errors"""
@@ -119,6 +152,8 @@ class LLMLoggingCallback(BaseCallbackHandler):
             "response": "",
             "error": None,
             "script_id": self._current_id,
+            # Pairs a prompt with its response when requests run concurrently
+            "run_id": str(kwargs.get("run_id", "")),
         }
         self.results_mgr.write_log_entry(
             self._current_date, self._current_id, log_entry
@@ -139,6 +174,7 @@ class LLMLoggingCallback(BaseCallbackHandler):
             "response": text,
             "error": None,
             "script_id": self._current_id,
+            "run_id": str(kwargs.get("run_id", "")),
         }
         self.results_mgr.write_log_entry(
             self._current_date, self._current_id, log_entry
@@ -154,81 +190,184 @@ class LLMLoggingCallback(BaseCallbackHandler):
             "response": "",
             "error": str(error),
             "script_id": self._current_id,
+            "run_id": str(kwargs.get("run_id", "")),
         }
         self.results_mgr.write_log_entry(
             self._current_date, self._current_id, log_entry
         )
 
 
+def _total_tokens(response: Any) -> int:
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return usage.get("total_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("total_tokens", 0)
+
+
+class LLMTimingCallback(BaseCallbackHandler):
+    """Records each LLM request as a call of the `llm` stage, with the tokens
+    the provider reported. Concurrent requests overlap, so the stage's time
+    can exceed the wall time of the phase that made them."""
+
+    def __init__(self, timings: Timings):
+        super().__init__()
+        self.timings = timings
+        self._started: Dict[Any, float] = {}
+
+    def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: list[str], **kwargs: Any
+    ) -> None:
+        self._started[kwargs.get("run_id")] = time.perf_counter()
+
+    def _finish(self, run_id: Any, tokens: int = 0) -> None:
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            self.timings.add("llm", time.perf_counter() - start, tokens)
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        self._finish(kwargs.get("run_id"), _total_tokens(response))
+
+    def on_llm_error(self, error: Exception, **kwargs: Any) -> None:
+        self._finish(kwargs.get("run_id"))
+
+
+def _cohere(llm_config: LLMConfig, callbacks: list) -> Any:
+    if not llm_config.api_key:
+        raise APIError("Cohere", "API key not found in environment or config file")
+    return _chat_class("ChatCohere")(
+        temperature=llm_config.temperature,
+        cohere_api_key=llm_config.api_key,
+        model_name=llm_config.model,
+        callbacks=callbacks,
+    )
+
+
+def _ollama(llm_config: LLMConfig, callbacks: list) -> Any:
+    # NOTE(curtis - don't remove): We set the context window to 4096 to support the
+    # long prompt. Otherwise the prompt will be truncated and the LLM will not be
+    # able to see the entire prompt including the request to return json.
+    return _chat_class("ChatOllama")(
+        temperature=llm_config.temperature,
+        model=llm_config.model,
+        base_url=llm_config.url,
+        format="json",
+        num_ctx=4096,
+        callbacks=callbacks,
+    )
+
+
+def _groq(llm_config: LLMConfig, callbacks: list) -> Any:
+    if not llm_config.api_key:
+        raise APIError("Groq", "API key not found in environment or config file")
+    return _chat_class("ChatGroq")(
+        temperature=llm_config.temperature,
+        groq_api_key=llm_config.api_key,
+        model_name=llm_config.model,
+        callbacks=callbacks,
+    )
+
+
+def _anthropic(llm_config: LLMConfig, callbacks: list) -> Any:
+    if not llm_config.api_key:
+        raise APIError("Anthropic", "API key not found in environment or config file")
+    return _chat_class("ChatAnthropic")(
+        temperature=llm_config.temperature,
+        anthropic_api_key=llm_config.api_key,
+        model_name=llm_config.model,
+        callbacks=callbacks,
+    )
+
+
+def _openai(llm_config: LLMConfig, callbacks: list) -> Any:
+    if not llm_config.api_key:
+        raise APIError("OpenAI", "API key not found in environment or config file")
+    return _chat_class("ChatOpenAI")(
+        temperature=llm_config.temperature,
+        api_key=llm_config.api_key,
+        model_name=llm_config.model,
+        callbacks=callbacks,
+    )
+
+
+def _replay(llm_config: LLMConfig, callbacks: list) -> Any:
+    from .replay import create_replay_llm
+
+    return create_replay_llm(llm_config, callbacks)
+
+
+def _fake(llm_config: LLMConfig, callbacks: list) -> Any:
+    from .fake_llm import FakeChatModel
+
+    return FakeChatModel(
+        model_name=llm_config.model, callbacks=callbacks, **llm_config.options
+    )
+
+
+# Maps a provider name to a factory taking (llm_config, callbacks) and
+# returning a LangChain chat model
+PROVIDERS: Dict[str, Callable[[LLMConfig, list], Any]] = {
+    "cohere": _cohere,
+    "ollama": _ollama,
+    "groq": _groq,
+    "anthropic": _anthropic,
+    "openai": _openai,
+    "fake": _fake,
+    "replay": _replay,
+}
+
+
+def register_provider(name: str, factory: Callable[[LLMConfig, list], Any]) -> None:
+    """Register a provider factory under the given name"""
+    PROVIDERS[name] = factory
+
+
+def plugin_provider_names() -> list[str]:
+    """Names of providers installed by other packages via entry points"""
+    return [ep.name for ep in entry_points(group=PROVIDER_ENTRY_POINT_GROUP)]
+
+
+def get_provider(name: str) -> Optional[Callable[[LLMConfig, list], Any]]:
+    """Look up a provider factory, loading it from an entry point if needed"""
+    if name not in PROVIDERS:
+        for ep in entry_points(group=PROVIDER_ENTRY_POINT_GROUP, name=name):
+            register_provider(name, ep.load())
+            break
+    return PROVIDERS.get(name)
+
+
 def get_llm(config: Config, results_mgr: ResultsManager = None):
     """Get LLM instance based on config"""
     try:
         if not hasattr(get_llm, "_callback"):
             get_llm._callback = LLMLoggingCallback(config)
+        callback = get_llm._callback
 
-        # Use the results manager's ID if provided
+        # Use the results manager's ID if provided. Each session gets its own
+        # callback so concurrent analyses (e.g. in the daemon) don't log into
+        # each other's files.
         if results_mgr and hasattr(results_mgr, "current_id"):
-            get_llm._callback._current_id = results_mgr.current_id
-            get_llm._callback._current_date = results_mgr.current_date
-            get_llm._callback.results_mgr = results_mgr
-
-        # NOTE(curtis - don't remove): We set the context window to 4096 to support the
-        # long prompt. Otherwise the prompt will be truncated and the LLM will not be
-        # able to see the entire prompt including the request to return json.
-        if config.llm.provider == "cohere":
-            if not config.llm.api_key:
-                raise APIError(
-                    "Cohere", "API key not found in environment or config file"
-                )
-            return ChatCohere(
-                temperature=config.llm.temperature,
-                cohere_api_key=config.llm.api_key,
-                model_name=config.llm.model,
-                callbacks=[get_llm._callback],
-            )
-        elif config.llm.provider == "ollama":
-            return ChatOllama(
-                temperature=config.llm.temperature,
-                model=config.llm.model,
-                base_url=config.llm.url,
-                format="json",
-                num_ctx=4096,
-                callbacks=[get_llm._callback],
-            )
-        elif config.llm.provider == "groq":
-            if not config.llm.api_key:
-                raise APIError(
-                    "Groq", "API key not found in environment or config file"
-                )
-            return ChatGroq(
-                temperature=config.llm.temperature,
-                groq_api_key=config.llm.api_key,
-                model_name=config.llm.model,
-                callbacks=[get_llm._callback],
-            )
-        elif config.llm.provider == "anthropic":
-            if not config.llm.api_key:
-                raise APIError(
-                    "Anthropic", "API key not found in environment or config file"
-                )
-            return ChatAnthropic(
-                temperature=config.llm.temperature,
-                anthropic_api_key=config.llm.api_key,
-                model_name=config.llm.model,
-                callbacks=[get_llm._callback],
-            )
-        elif config.llm.provider == "openai":
-            if not config.llm.api_key:
-                raise APIError(
-                    "OpenAI", "API key not found in environment or config file"
-                )
-            return ChatOpenAI(
-                temperature=config.llm.temperature,
-                api_key=config.llm.api_key,
-                model_name=config.llm.model,
-                callbacks=[get_llm._callback],
-            )
-        raise ValueError(f"Unsupported LLM provider: {config.llm.provider}")
+            callback = LLMLoggingCallback(config)
+            callback._current_id = results_mgr.current_id
+            callback._current_date = results_mgr.current_date
+            callback.results_mgr = results_mgr
+
+        callbacks = [callback]
+        if config.record_file:
+            from .replay import get_recorder
+
+            callbacks.append(get_recorder(config.record_file))
+        timings = current_timings()
+        if timings:
+            callbacks.append(LLMTimingCallback(timings))
+
+        factory = get_provider(config.llm.provider)
+        if factory is None:
+            raise ValueError(f"Unsupported LLM provider: {config.llm.provider}")
+        return factory(config.llm, callbacks)
     except Exception as e:
         if "credit balance is too low" in str(e):
             raise APIError(
@@ -5,13 +5,14 @@ from rich.console import Console
 from .content_processor import chunk_content
 from .file_analyzer import detect_file_type, evaluate_file_type
 from .llm import create_security_chain
-from .script_analyzer import analyze_script
+from .script_analyzer import analyze_script, analyze_script_async
 from .storage import save_results_json, save_script
 
 console = Console()
 
 __all__ = [
     "analyze_script",
+    "analyze_script_async",
     "save_script",
     "save_results_json",
     "console",
@@ -0,0 +1,394 @@
+"""Replace large embedded payloads with short descriptors before LLM analysis.
+
+Self-extracting installers carry base64, hex or uuencoded archives, either
+inline or after an `exit`/`__ARCHIVE__` marker. The LLM can't read those
+anyway, so they are swapped for a one line description (size, decoded
+type, entropy and hash) before token counting. Payloads that decode to text
+are shown decoded instead. Only data that is proven never to run is
+removed: heredocs fed to a decoder, quoted assignments and trailers after
+an exit that always runs. Only the LLM input changes; YARA and the verdict cache still see
+the original script.
+"""
+
+import base64
+import binascii
+import hashlib
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Tuple
+
+from .file_analyzer import DETECT_BYTES, get_magic
+from .logger import setup_logger
+
+logger = setup_logger()
+
+# Smaller blobs (keys, checksums, short tokens) are left for the LLM to see
+MIN_PAYLOAD_BYTES = 4096
+
+_BASE64_LINE = r"[A-Za-z0-9+/]{40,}={0,2}"
+_HEX_LINE = r"[0-9a-fA-F]{40,}"
+_UU_LINE = r"M[\x20-\x60]{60}"
+_ENCODED_LINE_RE = re.compile(rf"[ \t]*(?:{_BASE64_LINE}|{_HEX_LINE}|{_UU_LINE})[ \t]*")
+# The shorter last line of a run. It needs a digit or +/= so that a heredoc
+# terminator like EOF isn't taken for part of the payload.
+_LAST_LINE_RE = re.compile(r"[ \t]*(?=[A-Za-z]*[0-9+/=])[A-Za-z0-9+/]+={0,2}[ \t]*")
+_ENCODED_TOKEN_RE = re.compile(rf"[A-Za-z0-9+/]{{{MIN_PAYLOAD_BYTES},}}={{0,2}}")
+_HEX_RE = re.compile(r"[0-9a-fA-F\s]+")
+_BASE64_RE = re.compile(r"[A-Za-z0-9+/=\s]+")
+_UU_RE = re.compile(rf"(?:{_UU_LINE}\s*)+")
+
+# Data appended after a top-level exit often starts with one of these lines
+_TRAILER_MARKER_RE = re.compile(
+    r"(?:__(?:ARCHIVE|PAYLOAD|DATA|BINARY)(?:_BELOW|_FOLLOWS)?__|__END__)[ \t]*\n"
+)
+# For finding the exits that always run
+_EXIT_LINE_RE = re.compile(r"exit(?:[ \t]+[\w$?]+)?[ \t]*(?:#.*)?")
+_HEREDOC_RE = re.compile(r"(?<!<)<<-?[ \t]*\\?(['\"]?)([A-Za-z_][\w-]*)\1")
+_QUOTED_RE = re.compile(r"'[^']*'|\"(?:[^\"\\]|\\.)*\"")
+_COMMENT_RE = re.compile(r"(?:^|\s)#.*")
+_BLOCK_RE = re.compile(
+    r"(?<![\w$.-])(?:if|case|while|until|for|select|fi|esac|done)(?![\w.-])|[{}()]"
+)
+_OPENERS = {"if", "case", "while", "until", "for", "select", "{", "("}
+_CONTINUATIONS = ("&&", "||", "|", "\\")
+# Text types are shown to the LLM decoded rather than described
+_READABLE_MIME_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/x-sh",
+    "application/x-shellscript",
+}
+
+_DECODE_RE = re.compile(
+    r"base64\s+(?:-d|-D|--decode)\b|xxd\s+-r|uudecode|openssl\s+(?:enc|base64)\b"
+)
+_INTERPRETER_RE = re.compile(
+    r"\|\s*(?:sudo\s+)?(?:\S*/)?(?:ba|da|z|k)?sh\b|\|\s*(?:\S*/)?"
+    r"(?:python[0-9.]*|perl|ruby|node)\b|\beval\b|\bsource\s+<\(|\.\s+<\("
+)
+# Heredoc commands whose body is only ever data: a decoder, or cat piped
+# into one
+_HEREDOC_SINK_RE = re.compile(
+    r"[ \t]*(?:sudo[ \t]+)?(?:\S*/)?(?:base64|xxd|uudecode|openssl|cat)\b"
+)
+_COMMAND_LIST_RE = re.compile(r";|&&|\|\|")
+# An assignment opening a quoted value, e.g. DATA=" or export DATA='
+_QUOTED_ASSIGNMENT_RE = re.compile(
+    r"[ \t]*(?:(?:export|readonly|local|declare(?:[ \t]+-\w+)*)[ \t]+)?"
+    r"[A-Za-z_]\w*=(['\"])"
+)
+# Files a decode command writes to
+_OUTPUT_FILE_RE = re.compile(r"(?:>|-out\b|-o\b)[ \t]*['\"]?([^\s'\";|&<>()]+)")
+# How a file is run, the path follows
+_RUN_PREFIX = (
+    r"(?:^|[;&|({]|\b(?:sudo|exec|source|(?:ba|da|z|k)?sh|python[0-9.]*|perl|ruby|"
+    r"node)\b|(?<![\w.])\.|\bchmod\s+\S*x\S*)"
+)
+
+
+@dataclass
+class Payload:
+    kind: str
+    size: int
+    decoded_size: int
+    mime_type: str
+    entropy: float
+    sha256: str
+    # The decoded payload, for payloads that decode to text
+    text: Optional[str] = field(default=None, repr=False)
+
+    def describe(self, executed: bool) -> str:
+        verb = "removed" if self.text is None else "decoded"
+        description = (
+            f"[baish: {verb} {self.size} byte {self.kind} payload, "
+            f"{self.decoded_size} bytes of {self.mime_type}, "
+            f"entropy {self.entropy:.2f} bits/byte, sha256 {self.sha256}"
+        )
+        if executed:
+            description += (
+                ". WARNING: the script decodes embedded data and runs it with "
+                "an interpreter"
+            )
+        if self.text is None:
+            return description + "]"
+        return (
+            f"{description}. The decoded text follows]\n{self.text.rstrip()}\n"
+            "[baish: end of decoded payload]"
+        )
+
+
+def _entropy(data: bytes) -> float:
+    if not data:
+        return 0.0
+    counts = Counter(data)
+    return -sum(n / len(data) * math.log2(n / len(data)) for n in counts.values())
+
+
+def _decode(text: str) -> Tuple[str, bytes]:
+    """Guess the encoding of a payload and decode it"""
+    stripped = "".join(text.split())
+    try:
+        if _HEX_RE.fullmatch(text) and len(stripped) % 2 == 0:
+            return "hex", bytes.fromhex(stripped)
+        if _UU_RE.fullmatch(text.strip()):
+            return "uuencoded", b"".join(
+                binascii.a2b_uu(line) for line in text.split("\n") if line.strip()
+            )
+        if _BASE64_RE.fullmatch(text):
+            return "base64", base64.b64decode(stripped + "=" * (-len(stripped) % 4))
+    except (ValueError, binascii.Error):
+        pass
+    return "raw", text.encode("utf-8", "surrogateescape")
+
+
+def _describe(text: str) -> Payload:
+    kind, data = _decode(text)
+    sample = data[:DETECT_BYTES]
+    mime_type = get_magic().from_buffer(sample) if data else "empty"
+    readable = (
+        mime_type.startswith("text/")
+        or mime_type in _READABLE_MIME_TYPES
+        or data.startswith(b"#!")
+    )
+    return Payload(
+        kind=kind,
+        size=len(text),
+        decoded_size=len(data),
+        mime_type=mime_type,
+        entropy=_entropy(sample),
+        sha256=hashlib.sha256(data).hexdigest(),
+        text=data.decode("utf-8", "replace") if readable else None,
+    )
+
+
+def _looks_like_data(text: str) -> bool:
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return False
+    encoded = sum(1 for line in lines if _ENCODED_LINE_RE.fullmatch(line))
+    unprintable = sum(
+        1 for c in text[:DETECT_BYTES] if not c.isprintable() and c not in "\n\r\t"
+    )
+    return encoded / len(lines) >= 0.9 or unprintable / len(text[:DETECT_BYTES]) > 0.1
+
+
+def _top_level_exits(content: str) -> Iterator[int]:
+    """End offsets of the `exit` lines that always run: outside any block,
+    subshell or heredoc, and not the end of an && or || list. The scan stops
+    where the nesting stops making sense, so nothing after that point is
+    ever taken for data."""
+    depth = 0
+    in_case = 0
+    heredoc = None
+    continued = False
+    offset = 0
+    for line in content.splitlines(keepends=True):
+        offset += len(line)
+        text = line.strip()
+        if heredoc:
+            if text == heredoc:
+                heredoc = None
+            continue
+        if not text or text.startswith("#"):
+            continue
+        if depth == 0 and not continued and _EXIT_LINE_RE.fullmatch(text):
+            yield offset
+        match = _HEREDOC_RE.search(text)
+        if match:
+            heredoc = match.group(2)
+        code = _COMMENT_RE.sub("", _QUOTED_RE.sub("''", text))
+        for token in _BLOCK_RE.findall(code):
+            # Case patterns end in an unmatched ")", so parentheses are
+            # ignored inside a case
+            if in_case and token in "()":
+                continue
+            depth += 1 if token in _OPENERS else -1
+            in_case += {"case": 1, "esac": -1}.get(token, 0)
+            if depth < 0:
+                return
+        continued = code.endswith(_CONTINUATIONS)
+
+
+def _split_trailer(content: str) -> Tuple[str, Optional[str]]:
+    """Split off data appended after a top-level exit, optionally behind an
+    archive marker line"""
+    for end in _top_level_exits(content):
+        split = end + len(content[end:]) - len(content[end:].lstrip("\n"))
+        marker = _TRAILER_MARKER_RE.match(content, split)
+        if marker:
+            split = marker.end()
+        trailer = content[split:].lstrip("\n")
+        if len(trailer) >= MIN_PAYLOAD_BYTES and _looks_like_data(trailer):
+            return content[:split], trailer
+    return content, None
+
+
+def _split_data_lines(trailer: str) -> Tuple[str, str]:
+    """The data in a trailer, and the lines that look like text. Bash runs
+    everything after an exit that doesn't happen, so those stay visible. The
+    short last line of an encoded run could be a command too, so it is both
+    decoded and shown."""
+    data = []
+    text = []
+    after_encoded = False
+    for line in trailer.splitlines(keepends=True):
+        stripped = line.strip()
+        encoded = bool(_ENCODED_LINE_RE.fullmatch(stripped))
+        if not stripped or encoded or not stripped.isprintable():
+            data.append(line)
+        else:
+            if after_encoded and _LAST_LINE_RE.fullmatch(stripped):
+                data.append(line)
+            text.append(line)
+        after_encoded = encoded
+    return "".join(data), "".join(text)
+
+
+def _runs_decoded_data(content: str) -> bool:
+    """Whether the script pipes decoded data into an interpreter, or writes
+    it to a file that it later runs"""
+    files = set()
+    for line in content.splitlines():
+        if _DECODE_RE.search(line):
+            if _INTERPRETER_RE.search(line):
+                return True
+            for match in _OUTPUT_FILE_RE.finditer(line):
+                files.add(match.group(1).removeprefix("./"))
+    files.discard("/dev/null")
+    return any(
+        re.search(
+            rf"{_RUN_PREFIX}\s*['\"]?(?:\./)?{re.escape(path)}(?![\w./-])",
+            content,
+            re.MULTILINE,
+        )
+        for path in files
+    )
+
+
+def _heredoc_is_data(line: str, heredoc_start: int) -> bool:
+    """Whether the heredoc opened at heredoc_start feeds a decoder, so that
+    its body is data and never a command"""
+    start = max(
+        (m.end() for m in _COMMAND_LIST_RE.finditer(line, 0, heredoc_start)),
+        default=0,
+    )
+    end = _COMMAND_LIST_RE.search(line, heredoc_start)
+    pipeline = line[start : end.start() if end else len(line)]
+    stages = pipeline.split("|")
+    # The stage that reads the heredoc, and the ones it pipes into
+    first = next(i for i, text in enumerate(stages) if "<<" in text)
+    if not _HEREDOC_SINK_RE.match(stages[first]):
+        return False
+    return any(_DECODE_RE.search(text) for text in stages[first:])
+
+
+def _data_lines(content: str) -> list[bool]:
+    """For each line, whether it is proven to be data rather than something
+    bash could run: the body of a heredoc fed to a decoder, or the inside of
+    a quoted assignment spanning several lines"""
+    flags = []
+    heredoc = None
+    heredoc_data = False
+    quote = None
+    for line in content.splitlines():
+        if heredoc:
+            if line.strip() == heredoc:
+                heredoc = None
+                flags.append(False)
+            else:
+                flags.append(heredoc_data)
+            continue
+        if quote:
+            if quote in line:
+                quote = None
+                flags.append(False)
+            else:
+                flags.append(True)
+            continue
+        flags.append(False)
+        match = _HEREDOC_RE.search(line)
+        if match:
+            heredoc = match.group(2)
+            heredoc_data = _heredoc_is_data(line, match.start())
+            continue
+        match = _QUOTED_ASSIGNMENT_RE.match(line)
+        if match and match.group(1) not in line[match.end() :]:
+            quote = match.group(1)
+    return flags
+
+
+def _encoded_spans(content: str) -> list[Tuple[int, int]]:
+    """Runs of encoded lines that are proven data, and long encoded tokens
+    quoted in assignments. Encoded-looking lines anywhere else are left
+    alone, as bash would run them (`/////usr/bin/shutdown` is valid base64)."""
+    spans = []
+    run_start = None
+    offset = 0
+    lines = content.splitlines(keepends=True)
+    for line, is_data in zip(lines, _data_lines(content)):
+        stripped = line.rstrip("\r\n")
+        if is_data and _ENCODED_LINE_RE.fullmatch(stripped):
+            if run_start is None:
+                run_start = offset
+        elif run_start is not None and is_data and _LAST_LINE_RE.fullmatch(stripped):
+            if offset + len(line) - run_start >= MIN_PAYLOAD_BYTES:
+                spans.append((run_start, offset + len(line)))
+            run_start = None
+        else:
+            if run_start is not None and offset - run_start >= MIN_PAYLOAD_BYTES:
+                spans.append((run_start, offset))
+            run_start = None
+            match = _QUOTED_ASSIGNMENT_RE.match(stripped)
+            if match:
+                token = _ENCODED_TOKEN_RE.match(stripped, match.end())
+                if token and stripped.startswith(match.group(1), token.end()):
+                    spans.append((offset + token.start(), offset + token.end()))
+        offset += len(line)
+    if run_start is not None and offset - run_start >= MIN_PAYLOAD_BYTES:
+        spans.append((run_start, offset))
+    return spans
+
+
+def extract_payloads(content: str) -> Tuple[str, list[Payload]]:
+    """Return the content with embedded payloads replaced by descriptors,
+    and the payloads that were found"""
+    if len(content) < MIN_PAYLOAD_BYTES:
+        return content, []
+
+    head, trailer = _split_trailer(content)
+    spans = _encoded_spans(head)
+    if not spans and trailer is None:
+        return content, []
+
+    # The lines that do the decoding stay in the script, but make sure the
+    # LLM can't miss that the hidden data gets executed
+    executed = _runs_decoded_data(head)
+
+    payloads = []
+    parts = []
+    pos = 0
+    for start, end in spans:
+        payload = _describe(head[start:end])
+        if payload.kind == "raw" and payload.text is not None:
+            continue  # already readable as it is
+        payloads.append(payload)
+        trailing_newline = "\n" if head[start:end].endswith("\n") else ""
+        parts.append(head[pos:start] + payload.describe(executed) + trailing_newline)
+        pos = end
+    parts.append(head[pos:])
+    if trailer is not None:
+        data, text = _split_data_lines(trailer)
+        payload = _describe(data)
+        if payload.kind == "raw" and payload.text is not None:
+            parts.append(content[len(head) :])
+        else:
+            payloads.append(payload)
+            parts.append("\n" + payload.describe(executed) + "\n" + text)
+
+    logger.debug(
+        f"Replaced {len(payloads)} embedded payloads, "
+        f"{len(content)} -> {sum(len(p) for p in parts)} characters"
+    )
+    return "".join(parts), payloads
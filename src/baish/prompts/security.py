@@ -1,4 +1,4 @@
-from langchain.prompts import (ChatPromptTemplate, HumanMessagePromptTemplate,
+from langchain_core.prompts import (ChatPromptTemplate, HumanMessagePromptTemplate,
                                SystemMessagePromptTemplate)
 
 # NOTE(curtis - don't remove this comment): This prompt is currenlty more than 2048 tokens, so we need to set the context window to 4096 in Ollama and other models that have a smaller context window.
@@ -1,4 +1,4 @@
-from langchain.prompts import (ChatPromptTemplate, HumanMessagePromptTemplate,
+from langchain_core.prompts import (ChatPromptTemplate, HumanMessagePromptTemplate,
                                SystemMessagePromptTemplate)
 
 SECURITY_MAP_SYSTEM = SystemMessagePromptTemplate.from_template(
@@ -27,6 +27,7 @@ Remember:
 - Obfuscation/data exfiltration should have harm score > 7
 - Focus on ACTUAL harm, not potential risks
 - Don't mention scores in the explanation
+- A section with an "occurrences" count appears that many times in the script
 
 IMPORTANT: Return ONLY a raw JSON object with NO other text before or after. The format MUST be:
 {{
@@ -0,0 +1,212 @@
+"""Record and replay LLM traffic.
+
+The `replay` provider answers prompts from recorded responses instead of
+calling a model, so a regression corpus can be run through the whole
+pipeline offline. Responses are looked up by the SHA-256 of the prompt as
+the logging callback sees it. They come from the `logs/` JSONL files (and
+their retention archives), or from cassettes written with `--record`, which
+hold one prompt and its response per line.
+"""
+
+import datetime
+import glob
+import hashlib
+import json
+import os
+import tarfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, get_buffer_string
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from .config import LLMConfig
+from .logger import setup_logger
+
+logger = setup_logger()
+
+
+class ReplayMissError(Exception):
+    """A strict replay found no recorded response for a prompt"""
+
+    pass
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def _cassette_files(spec: str) -> list[Path]:
+    """Files for a cassette path, glob or directory of logs and archives"""
+    paths = [Path(p) for p in sorted(glob.glob(os.path.expanduser(spec)))]
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files += sorted(path.rglob("*.jsonl")) + sorted(path.rglob("*.tar.gz"))
+        else:
+            files.append(path)
+    return files
+
+
+def _read_lines(path: Path) -> Iterator[str]:
+    if path.name.endswith(".tar.gz"):
+        with tarfile.open(path) as tar:
+            for member in tar.getmembers():
+                if member.isfile() and member.name.endswith(".jsonl"):
+                    yield from tar.extractfile(member).read().decode().splitlines()
+    else:
+        with open(path) as f:
+            yield from f
+
+
+@lru_cache(maxsize=None)
+def load_cassettes(specs: Tuple[str, ...]) -> Dict[str, str]:
+    """Index recorded responses by prompt hash. Logs and cassettes are read
+    once per process. Later recordings of a prompt win."""
+    index = {}
+    for path in (f for spec in specs for f in _cassette_files(spec)):
+        # Log files hold a start entry with the prompt and an end or error
+        # entry, paired on run_id. Logs from before run_id was recorded are
+        # paired in order.
+        pending = {}
+        for line in _read_lines(path):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            run_id = entry.get("run_id")
+            if entry.get("prompt_sha256") and entry.get("response"):
+                index[entry["prompt_sha256"]] = entry["response"]
+            elif entry.get("prompt"):
+                pending[run_id] = entry["prompt"]
+            elif entry.get("response") and run_id in pending:
+                index[prompt_key(pending.pop(run_id))] = entry["response"]
+            else:
+                pending.pop(run_id, None)
+    logger.debug(f"Loaded {len(index)} recorded responses from {specs}")
+    return index
+
+
+class ReplayChatModel(BaseChatModel):
+    model_config = ConfigDict(extra="forbid")
+
+    model_name: str = "replay"
+    # prompt hash -> response, shared between instances rather than copied
+    index: Any = None
+    strict: bool = True
+    # Answers prompts that weren't recorded, unless strict
+    fallback: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def _lookup(self, messages: List[BaseMessage]) -> Optional[ChatResult]:
+        key = prompt_key(get_buffer_string(messages))
+        response = self.index.get(key)
+        if response is not None:
+            message = AIMessage(content=response)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        if self.strict or self.fallback is None:
+            raise ReplayMissError(f"No recorded response for prompt {key[:12]}")
+        logger.debug(f"No recorded response for prompt {key[:12]}, using fallback")
+        return None
+
+    def _generate(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        result = self._lookup(messages)
+        if result is None:
+            message = self.fallback.invoke(messages)
+            result = ChatResult(generations=[ChatGeneration(message=message)])
+        return result
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], **kwargs: Any
+    ) -> ChatResult:
+        result = self._lookup(messages)
+        if result is None:
+            message = await self.fallback.ainvoke(messages)
+            result = ChatResult(generations=[ChatGeneration(message=message)])
+        return result
+
+
+def create_replay_llm(llm_config: LLMConfig, callbacks: list) -> ReplayChatModel:
+    from .llm import get_provider
+
+    options = dict(llm_config.options)
+    cassettes = options.pop("cassettes", None)
+    if not cassettes:
+        raise ValueError("The replay provider needs a cassettes option")
+    if isinstance(cassettes, str):
+        cassettes = [cassettes]
+
+    fallback = options.pop("fallback", None)
+    if fallback and not options.get("strict", True):
+        fallback_config = LLMConfig(name="fallback", **fallback)
+        fallback_config.api_key = fallback_config.api_key or os.getenv(
+            f"{fallback_config.provider.upper()}_API_KEY"
+        )
+        factory = get_provider(fallback_config.provider)
+        if factory is None:
+            raise ValueError(
+                f"Unsupported fallback provider: {fallback_config.provider}"
+            )
+        # The replay model's own callbacks already see the fallback's traffic
+        fallback = factory(fallback_config, [])
+    else:
+        fallback = None
+
+    return ReplayChatModel(
+        model_name=llm_config.model,
+        index=load_cassettes(tuple(cassettes)),
+        fallback=fallback,
+        callbacks=callbacks,
+        **options,
+    )
+
+
+class CassetteRecorder(BaseCallbackHandler):
+    """Appends every completed prompt and response to a cassette file"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = Path(path).expanduser()
+        self._lock = threading.Lock()
+        self._prompts: Dict[Any, str] = {}
+
+    def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: list[str], **kwargs: Any
+    ) -> None:
+        if prompts:
+            self._prompts[kwargs.get("run_id")] = prompts[0]
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        prompt = self._prompts.pop(kwargs.get("run_id"), None)
+        if prompt is None or not response.generations:
+            return
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "prompt_sha256": prompt_key(prompt),
+            "prompt": prompt,
+            "response": response.generations[0][0].text,
+        }
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def on_llm_error(self, error: Exception, **kwargs: Any) -> None:
+        self._prompts.pop(kwargs.get("run_id"), None)
+
+
+@lru_cache(maxsize=None)
+def get_recorder(path: str) -> CassetteRecorder:
+    """One recorder per cassette, so concurrent analyses share its lock"""
+    return CassetteRecorder(path)
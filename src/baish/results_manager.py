@@ -1,7 +1,31 @@
+import atexit
 import json
+import os
+import threading
+import weakref
 from pathlib import Path
 
 from .config import Config
+from .retention import day_dir, stored_files
+
+# Buffered log lines are written out once they reach this size
+LOG_FLUSH_BYTES = 64 * 1024
+# Holds "<date> <id>" of the most recently written session
+LATEST_POINTER = "latest"
+
+# Managers with possibly unflushed entries, flushed when the process exits
+_managers = weakref.WeakSet()
+
+
+def _flush_all() -> None:
+    for results_mgr in list(_managers):
+        try:
+            results_mgr.flush()
+        except OSError:
+            pass  # baish_dir is gone, nothing to keep the entries for
+
+
+atexit.register(_flush_all)
 
 
 class ResultsManager:
@@ -10,6 +34,12 @@ class ResultsManager:
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.current_id = config.current_id
         self.current_date = config.current_date
+        # LLM callbacks fire from the map phase's worker threads
+        self._lock = threading.Lock()
+        self._buffer: dict[Path, list[str]] = {}
+        self._buffered_bytes = 0
+        self._latest = None
+        _managers.add(self)
 
     def write_log_entry(self, date_str: str, unique_id: str, log_entry: dict):
         if not date_str or not unique_id:
@@ -17,21 +47,57 @@ class ResultsManager:
         if not date_str or not unique_id:
             return
 
-        log_file = self.log_dir / f"{date_str}_{unique_id}_llm.jsonl"
-        with open(log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        line = json.dumps(log_entry) + "\n"
+        log_file = day_dir(self.log_dir, date_str) / f"{date_str}_{unique_id}_llm.jsonl"
+        with self._lock:
+            self._buffer.setdefault(log_file, []).append(line)
+            self._buffered_bytes += len(line)
+            self._latest = (date_str, unique_id)
+            if self._buffered_bytes >= LOG_FLUSH_BYTES:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write out buffered log entries. Called at the end of every run."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        for log_file, lines in self._buffer.items():
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(log_file, "a") as f:
+                f.write("".join(lines))
+        self._buffer = {}
+        self._buffered_bytes = 0
+        if self._latest:
+            self._write_latest(*self._latest)
+            self._latest = None
+
+    def _write_latest(self, date_str: str, unique_id: str) -> None:
+        pointer = self.log_dir / LATEST_POINTER
+        tmp_path = pointer.with_name(f".{LATEST_POINTER}.{os.getpid()}")
+        tmp_path.write_text(f"{date_str} {unique_id}\n")
+        os.replace(tmp_path, pointer)
 
     def get_latest_log(self):
         """Get the timestamp and ID of the latest log entry"""
         if not self.current_date or not self.current_id:
-            # Find the most recent log file
-            log_files = list(self.log_dir.glob("*_llm.jsonl"))
-            if not log_files:
-                return None, None
-            latest_file = max(log_files, key=lambda x: x.stat().st_mtime)
-            # Parse date and ID from filename
-            parts = latest_file.stem.split("_")
+            try:
+                parts = (self.log_dir / LATEST_POINTER).read_text().split()
+            except OSError:
+                parts = self._find_latest_log()
             if len(parts) >= 2:
                 self.current_date = parts[0]
                 self.current_id = parts[1]
         return self.current_date, self.current_id
+
+    def _find_latest_log(self) -> list[str]:
+        # Logs written before the pointer existed
+        log_files = list(stored_files(self.log_dir, "*_llm.jsonl"))
+        if not log_files:
+            return []
+        latest_file = max(log_files, key=lambda x: x.stat().st_mtime)
+        # <date>_<time>_<id>_llm, the date part contains an underscore itself
+        parts = latest_file.stem[: -len("_llm")].rsplit("_", 1)
+        if len(parts) == 2:
+            self._write_latest(*parts)
+        return parts
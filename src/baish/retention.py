@@ -0,0 +1,282 @@
+"""Retention for the scripts, results and logs directories.
+
+Each run's files are written to a subdirectory for its day, e.g.
+`scripts/2024-12-05/`. A sweep moves files left over from the old flat layout
+into their day, packs the logs and results of older days into one tar.gz per
+day, and deletes whole days, oldest first, once the age, size or run count
+limits are exceeded. Sizes of past days are cached in `retention.json`, so a
+sweep only lists the top level of each directory plus the days that changed.
+"""
+
+import fcntl
+import json
+import os
+import re
+import shutil
+import tarfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from fnmatch import fnmatch
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from .config import Config
+from .logger import setup_logger
+
+logger = setup_logger()
+
+KINDS = ["scripts", "results", "logs"]
+# Scripts stay unpacked, the allowlist and history import hash them in place.
+# Packed results are read with read_stored().
+ARCHIVED_KINDS = ["results", "logs"]
+ARCHIVE_SUFFIX = ".tar.gz"
+STATE_FILE = "retention.json"
+
+_DAY_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})")
+_UNIT_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(\.tar\.gz)?$")
+
+
+def day_dir(base: Path, date_str: str) -> Path:
+    """Directory for the files of a run started at date_str (YYYY-MM-DD_...)"""
+    match = _DAY_RE.match(date_str)
+    return base / match.group(1) if match else base
+
+
+def stored_files(base: Path, pattern: str) -> Iterator[Path]:
+    """Files matching pattern in base and its day directories"""
+    return chain(base.glob(pattern), base.glob(f"*/{pattern}"))
+
+
+def read_stored(base: Path, pattern: str) -> list[Tuple[Path, str]]:
+    """(path, text) of the files matching pattern in base, its day directories
+    and the archives of past days, sorted by path. Archived files are named
+    by their member path inside the archive, e.g.
+    `results/2024-12-05.tar.gz/2024-12-05/..._results.json`."""
+    files = []
+    for path in stored_files(base, pattern):
+        try:
+            files.append((path, path.read_text()))
+        except OSError as e:
+            logger.debug(f"Skipping {path}: {e}")
+    for archive in base.glob(f"*{ARCHIVE_SUFFIX}"):
+        try:
+            with tarfile.open(archive) as tar:
+                for member in tar.getmembers():
+                    if member.isfile() and fnmatch(Path(member.name).name, pattern):
+                        data = tar.extractfile(member).read()
+                        files.append((archive / member.name, data.decode()))
+        except (OSError, tarfile.TarError, UnicodeDecodeError) as e:
+            logger.debug(f"Skipping {archive}: {e}")
+    return sorted(files)
+
+
+def locate(path: str | Path) -> Path:
+    """Find a stored file whose recorded path predates the move into its day"""
+    path = Path(path)
+    if not path.exists():
+        moved = day_dir(path.parent, path.name) / path.name
+        if moved.exists():
+            return moved
+    return path
+
+
+@dataclass
+class SweepStats:
+    moved: int = 0
+    archived: int = 0
+    deleted: int = 0
+    freed_bytes: int = 0
+
+
+class Retention:
+    def __init__(self, config: Config):
+        self.baish_dir = Path(config.baish_dir)
+        self.state_path = self.baish_dir / STATE_FILE
+        self.max_age_days = config.retention_max_age_days
+        self.max_bytes = config.retention_max_bytes
+        self.max_runs = config.retention_max_runs
+        self.archive_after_days = config.retention_archive_after_days
+        self.sweep_hours = config.retention_sweep_hours
+
+    def _load_state(self) -> dict:
+        try:
+            return json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: dict) -> None:
+        tmp_path = self.state_path.with_name(f".{STATE_FILE}.{os.getpid()}")
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, self.state_path)
+
+    def due(self) -> bool:
+        if not self.sweep_hours:
+            return False
+        last_sweep = self._load_state().get("last_sweep", 0)
+        return time.time() - last_sweep >= self.sweep_hours * 3600
+
+    def sweep(self) -> Optional[SweepStats]:
+        """Apply the retention limits. Returns None if another process is
+        already sweeping."""
+        self.baish_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.baish_dir / "retention.lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            return self._sweep()
+
+    def _sweep(self) -> SweepStats:
+        stats = SweepStats()
+        state = self._load_state()
+        cache = state.get("units", {})
+        today = date.today()
+
+        for kind in KINDS:
+            stats.moved += self._move_flat_files(self.baish_dir / kind)
+
+        units = self._scan_units(cache, today.isoformat())
+
+        age_cutoff = (today - timedelta(days=self.max_age_days)).isoformat()
+        if self.archive_after_days:
+            cutoff = (today - timedelta(days=self.archive_after_days)).isoformat()
+            for (kind, day), unit in units.items():
+                if self.max_age_days and day < age_cutoff:
+                    continue  # about to be deleted
+                if day < cutoff and kind in ARCHIVED_KINDS and unit[0].is_dir():
+                    archive, files = self._pack(unit[0])
+                    units[kind, day] = (archive, archive.stat().st_size, files)
+                    stats.archived += 1
+
+        days = sorted({day for _, day in units})
+        total_bytes = sum(unit[1] for unit in units.values())
+        # Every run writes one file of each kind
+        runs: Dict[str, int] = {}
+        for (_, day), unit in units.items():
+            runs[day] = max(runs.get(day, 0), unit[2])
+        total_runs = sum(runs.values())
+        for day in days:
+            if day >= today.isoformat():
+                break  # today's runs may still be writing
+            if not (
+                (self.max_age_days and day < age_cutoff)
+                or (self.max_bytes and total_bytes > self.max_bytes)
+                or (self.max_runs and total_runs > self.max_runs)
+            ):
+                break
+            for kind in KINDS:
+                unit = units.pop((kind, day), None)
+                if unit is None:
+                    continue
+                if unit[0].is_dir():
+                    shutil.rmtree(unit[0])
+                else:
+                    unit[0].unlink()
+                total_bytes -= unit[1]
+                stats.freed_bytes += unit[1]
+            total_runs -= runs[day]
+            stats.deleted += 1
+
+        self._save_state(
+            {
+                "last_sweep": time.time(),
+                "units": {
+                    f"{kind}/{unit[0].name}": [
+                        unit[0].stat().st_mtime_ns,
+                        unit[1],
+                        unit[2],
+                    ]
+                    for (kind, day), unit in units.items()
+                    if day != today.isoformat()
+                },
+            }
+        )
+        return stats
+
+    @staticmethod
+    def _move_flat_files(base: Path) -> int:
+        moved = 0
+        if not base.is_dir():
+            return moved
+        for entry in os.scandir(base):
+            if (
+                entry.is_file()
+                and _DAY_RE.match(entry.name)
+                and not _UNIT_RE.match(entry.name)
+                and not entry.name.endswith(".partial")
+            ):
+                target = day_dir(base, entry.name)
+                target.mkdir(exist_ok=True)
+                os.replace(entry.path, target / entry.name)
+                moved += 1
+        return moved
+
+    def _scan_units(
+        self, cache: Dict[str, list], today: str
+    ) -> Dict[Tuple[str, str], Tuple[Path, int, int]]:
+        """(kind, day) -> (path, bytes, files) for every day directory and
+        archive, reusing cached sizes for past days that haven't changed"""
+        units = {}
+        for kind in KINDS:
+            base = self.baish_dir / kind
+            if not base.is_dir():
+                continue
+            for entry in os.scandir(base):
+                match = _UNIT_RE.match(entry.name)
+                if not match:
+                    continue
+                day = match.group(1)
+                path = Path(entry.path)
+                cached = cache.get(f"{kind}/{entry.name}")
+                if day != today and cached and cached[0] == entry.stat().st_mtime_ns:
+                    size, files = cached[1], cached[2]
+                elif entry.is_dir():
+                    sizes = [f.stat().st_size for f in os.scandir(path) if f.is_file()]
+                    size, files = sum(sizes), len(sizes)
+                else:
+                    with tarfile.open(path) as tar:
+                        files = len(tar.getmembers())
+                    size = entry.stat().st_size
+                if (kind, day) in units:
+                    # A late write next to an existing archive, pack them together
+                    path, files = self._pack(base / day)
+                    size = path.stat().st_size
+                units[kind, day] = (path, size, files)
+        return units
+
+    @staticmethod
+    def _pack(day_path: Path) -> Tuple[Path, int]:
+        """Replace a day directory with a tar.gz, merging any existing archive
+        for that day. Returns the archive and its number of files."""
+        archive = day_path.with_name(day_path.name + ARCHIVE_SUFFIX)
+        tmp_path = archive.with_name(f".{archive.name}.{os.getpid()}")
+        files = 0
+        with tarfile.open(tmp_path, "w:gz") as tar:
+            if archive.exists():
+                with tarfile.open(archive) as old:
+                    for member in old.getmembers():
+                        tar.addfile(member, old.extractfile(member))
+                        files += 1
+            for path in sorted(day_path.iterdir()):
+                tar.add(path, arcname=f"{day_path.name}/{path.name}")
+                files += 1
+        os.replace(tmp_path, archive)
+        shutil.rmtree(day_path)
+        return archive, files
+
+
+def sweep_if_due(config: Config) -> None:
+    """Cheap check run after every analysis, sweeps at most every
+    retention_sweep_hours"""
+    retention = Retention(config)
+    if not retention.due():
+        return
+    try:
+        stats = retention.sweep()
+    except (OSError, tarfile.TarError) as e:
+        logger.warning(f"Retention sweep failed: {e}")
+        return
+    if stats:
+        logger.debug(f"Retention sweep: {asdict(stats)}")
@@ -0,0 +1,170 @@
+"""Bulk analysis of files on disk, streamed as JSONL.
+
+Like the daemon, this module defers importing the analysis stack until a
+file actually needs analyzing.
+"""
+
+import copy
+import glob
+import json
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+from .config import Config
+from .logger import setup_logger
+from .results_manager import ResultsManager
+from .timings import Timings, collect, stage
+
+logger = setup_logger()
+
+# Version control metadata is never worth scanning
+SKIP_DIRS = {".git", ".hg", ".svn"}
+
+
+def iter_candidates(paths: Iterable[str]) -> Iterator[Path]:
+    """Expand files, directories and glob patterns into unique file paths"""
+    seen = set()
+    for pattern in paths:
+        matches = (
+            sorted(glob.glob(pattern, recursive=True))
+            if glob.has_magic(pattern)
+            else [pattern]
+        )
+        if not matches:
+            logger.warning(f"No files match {pattern}")
+
+        for match in matches:
+            if os.path.isdir(match):
+                files = []
+                for root, dirs, names in os.walk(match):
+                    dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+                    files.extend(Path(root) / name for name in sorted(names))
+            elif os.path.isfile(match):
+                files = [Path(match)]
+            else:
+                logger.warning(f"Not a file or directory: {match}")
+                continue
+
+            for path in files:
+                key = path.resolve()
+                if key not in seen and path.is_file():
+                    seen.add(key)
+                    yield path
+
+
+def scan_file(
+    path: Path,
+    config: Config,
+    cli_provider: Optional[str] = None,
+    use_cache: bool = True,
+    timings: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """Analyze one file. Returns None for files that aren't scripts. With
+    timings, results carry the file's per-stage timings."""
+    from .file_analyzer import detect_file_type, is_script
+    from .script_analyzer import analyze_script
+
+    try:
+        if path.stat().st_size > config.max_input_bytes:
+            return {
+                "path": str(path),
+                "error": f"File is larger than max_input_bytes "
+                f"({config.max_input_bytes} bytes)",
+            }
+        script = path.read_bytes().decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    except OSError as e:
+        return {"path": str(path), "error": str(e)}
+
+    file_timings = Timings() if timings else None
+    with collect(file_timings), stage("libmagic"):
+        file_info = detect_file_type(script)
+    if not is_script(file_info):
+        return None
+
+    # Each file is its own session with its own LLM log, and analyze_script
+    # mutates the config, so workers never share one
+    config = copy.copy(config)
+    results_mgr = ResultsManager(config)
+    results_mgr.current_date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    results_mgr.current_id = str(uuid.uuid4())[:8]
+
+    try:
+        with collect(file_timings):
+            harm_score, complexity_score, explanation, requires_root, file_type = (
+                analyze_script(
+                    script,
+                    results_mgr,
+                    config=config,
+                    cli_provider=cli_provider,
+                    use_cache=use_cache,
+                    file_info=file_info,
+                )
+            )
+    except Exception as e:
+        logger.debug(f"Error analyzing {path}: {repr(e)}")
+        return {"path": str(path), "error": str(e)}
+
+    if harm_score == 0 and complexity_score == 0:
+        return {"path": str(path), "error": explanation}
+
+    result = {
+        "path": str(path),
+        "harm_score": harm_score,
+        "complexity_score": complexity_score,
+        "uses_root": requires_root,
+        "file_type": file_type,
+        "explanation": explanation,
+    }
+    if file_timings:
+        result["timings"] = file_timings.to_dict()
+    return result
+
+
+def scan_paths(
+    paths: Iterable[str],
+    config: Config,
+    workers: Optional[int] = None,
+    cli_provider: Optional[str] = None,
+    use_cache: bool = True,
+    out: Optional[IO[str]] = None,
+    timings: bool = False,
+) -> int:
+    """Analyze every script under paths, writing one JSON line per result as
+    soon as it completes. Returns 1 if any file failed to analyze."""
+    if os.geteuid() == 0:
+        logger.error("Running as root is not allowed for security reasons")
+        return 1
+
+    out = out or sys.stdout
+    workers = workers or config.scan_workers
+    failed = 0
+    analyzed = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(scan_file, path, config, cli_provider, use_cache, timings)
+            for path in iter_candidates(paths)
+        ]
+        logger.debug(f"Scanning {len(futures)} files with {workers} workers")
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    continue
+                analyzed += 1
+                failed += "error" in result
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    logger.debug(f"Analyzed {analyzed} of {len(futures)} files, {failed} failed")
+    return 1 if failed else 0
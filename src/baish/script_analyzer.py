@@ -1,44 +1,54 @@
-from typing import Tuple
+import asyncio
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Tuple
 
-import magic
 from rich.console import Console
 
+from .allowlist import ALLOWLISTED_TYPE, Allowlist, hash_script
 from .config import Config
 from .content_processor import chunk_content
-from .file_analyzer import detect_file_type
+from .file_analyzer import NON_SCRIPT_PREFIX, detect_file_type, is_script
 from .llm import CustomJsonParser, create_security_chain, get_llm
 from .logger import setup_logger
+from .payload_extractor import extract_payloads
 from .prompts.security_map_reduce import MAP_PROMPT, REDUCE_PROMPT
 from .results_manager import ResultsManager
-from .token_counter import count_tokens
-from .yara_checker import YaraChecker
+from .static_filter import static_verdict
+from .timings import stage
+from .token_budget import plan_budget
+from .token_counter import count_tokens, token_offsets
+from .verdict_cache import VerdictCache
+from .yara_checker import get_yara_checker
 
 logger = setup_logger()
 
+EARLY_EXIT_PREFIX = "Early termination: "
 
-def calculate_chunk_size(config: Config, debug: bool = False) -> int:
-    llm_config = config.llms.get(config.default_llm)
-    total_limit = llm_config.token_limit if llm_config else 4000
 
-    empty_prompt = MAP_PROMPT.format_prompt(content="")
-    prompt_tokens = count_tokens(str(empty_prompt))
-    response_reserve = 1000
-    chunk_size = total_limit - prompt_tokens - response_reserve
+@dataclass
+class _Preparation:
+    """Outcome of the stages that run before the LLM is called"""
 
-    logger.debug(
-        f"Token limits - Total: {total_limit}, Prompt: {prompt_tokens}, Response: {response_reserve}, Available for chunk: {chunk_size}"
-    )
-
-    return chunk_size
+    config: Config
+    content: str
+    file_info: dict
+    result: Optional[Tuple[int, int, str, bool, str]] = None  # no LLM call needed
+    cache_key: Optional[str] = None  # the verdict should be cached under this key
 
 
-def analyze_script(
+def _prepare_analysis(
     script: str,
-    results_mgr: ResultsManager = None,
-    debug: bool = False,
-    config: Config = None,
-    cli_provider: str = None,
-) -> Tuple[int, int, str, bool, str]:
+    results_mgr: ResultsManager,
+    config: Config,
+    cli_provider: str,
+    use_cache: bool,
+    file_info: dict,
+) -> _Preparation:
+    """Allowlist, file type detection, YARA, the static filter and the verdict
+    cache. These block on libmagic, YARA and SQLite, so the async API runs
+    this in an executor."""
     if config is None:
         config = Config.load()
 
@@ -50,29 +60,52 @@ def analyze_script(
         config.current_date = results_mgr.current_date
 
     script_content = script.read() if hasattr(script, "read") else script
-    file_info = detect_file_type(script_content)
+
+    # Known-good scripts skip every other check
+    sha256 = hash_script(script_content)
+    with stage("allowlist"):
+        allowlisted = Allowlist(config).contains(sha256)
+    if allowlisted:
+        logger.debug(f"Script {sha256} is on the allowlist")
+        return _Preparation(
+            config,
+            script_content,
+            file_info,
+            result=(
+                1,
+                1,
+                f"Known-good script: SHA-256 {sha256} is on the local allowlist",
+                False,
+                ALLOWLISTED_TYPE,
+            ),
+        )
+
+    # Callers that already detected the type (e.g. to save the script) pass it in
+    if file_info is None:
+        with stage("libmagic"):
+            file_info = detect_file_type(script_content)
 
     logger.debug(f"File type detected: {file_info}")
+    prep = _Preparation(config, script_content, file_info)
 
     # Early returns for non-scripts
-    if not file_info["is_text"] or file_info["mime_type"] in [
-        "text/markdown",
-        "text/plain",
-    ]:
-        return (
+    if not is_script(file_info):
+        prep.result = (
             1,
             1,
-            f"Non-script file detected: {file_info['mime_type']}",
+            f"{NON_SCRIPT_PREFIX}{file_info['mime_type']}",
             False,
             file_info["mime_type"],
         )
+        return prep
 
     # YARA check first
-    yara_checker = YaraChecker()
-    matched, yara_details = yara_checker.check_content(script_content)
+    with stage("yara"):
+        yara_checker = get_yara_checker(Path(config.baish_dir) / "cache")
+        matched, yara_details = yara_checker.check_content(script_content)
     if matched:
         logger.debug(f"YARA match found: {yara_details}")
-        return (
+        prep.result = (
             10,
             10,
             " ".join(yara_details["explanations"])
@@ -80,54 +113,441 @@ def analyze_script(
             True,
             file_info["mime_type"],
         )
+        return prep
+
+    # Clearly benign scripts get a rule-based verdict without an LLM call
+    if config.static_filter_enabled:
+        with stage("static_filter"):
+            prep.result = static_verdict(script_content, file_info["mime_type"])
+        if prep.result:
+            logger.debug("Static filter verdict, skipping LLM analysis")
+            return prep
+
+    # Verdict cache is consulted only after YARA so rule changes always apply
+    if use_cache and config.cache_enabled:
+        with stage("cache"), VerdictCache(config) as cache:
+            cache_key = VerdictCache.make_key(script_content, config)
+            prep.result = cache.get(cache_key)
+            stats = cache.stats()
+        logger.debug(f"Verdict cache stats: {stats}")
+        if prep.result:
+            logger.debug("Verdict cache hit, skipping LLM analysis")
+        else:
+            prep.cache_key = cache_key
+
+    return prep
+
+
+def _store_verdict(prep: _Preparation, result: Tuple) -> None:
+    # Errors are reported as zero scores and are never cached, and neither
+    # are verdicts from a map phase that stopped early
+    if (
+        prep.cache_key
+        and not (result[0] == 0 and result[1] == 0)
+        and not result[2].startswith(EARLY_EXIT_PREFIX)
+    ):
+        with stage("cache"), VerdictCache(prep.config) as cache:
+            cache.put(prep.cache_key, result)
+
 
-    # Check if script needs chunking
-    chunk_size = calculate_chunk_size(config, debug)
-    script_tokens = count_tokens(script_content)
+def analyze_script(
+    script: str,
+    results_mgr: ResultsManager = None,
+    debug: bool = False,
+    config: Config = None,
+    cli_provider: str = None,
+    use_cache: bool = True,
+    file_info: dict = None,
+) -> Tuple[int, int, str, bool, str]:
+    prep = _prepare_analysis(
+        script, results_mgr, config, cli_provider, use_cache, file_info
+    )
+    if prep.result:
+        return prep.result
+
+    try:
+        result = _analyze_with_llm(
+            prep.content, prep.file_info, prep.config, results_mgr, debug
+        )
+    finally:
+        # LLM log entries are buffered for the length of the run
+        if results_mgr:
+            results_mgr.flush()
+    _store_verdict(prep, result)
+    return result
+
+
+async def analyze_script_async(
+    script: str,
+    results_mgr: ResultsManager = None,
+    debug: bool = False,
+    config: Config = None,
+    cli_provider: str = None,
+    use_cache: bool = True,
+    file_info: dict = None,
+) -> Tuple[int, int, str, bool, str]:
+    """Async counterpart of analyze_script.
+
+    LLM calls go through ainvoke/abatch, and the blocking stages (libmagic,
+    YARA, the verdict cache and tokenization) run in worker threads, so the
+    event loop can keep many analyses in flight. to_thread carries the
+    caller's context along, so their stages are timed like the sync API's.
+    """
+    prep = await asyncio.to_thread(
+        _prepare_analysis,
+        script,
+        results_mgr,
+        config,
+        cli_provider,
+        use_cache,
+        file_info,
+    )
+    if prep.result:
+        return prep.result
 
-    # For large scripts, use map-reduce
-    if script_tokens > chunk_size:
-        chunks = chunk_content(script_content, chunk_size=chunk_size)
+    try:
+        result = await _analyze_with_llm_async(
+            prep.content, prep.file_info, prep.config, results_mgr, debug
+        )
+    finally:
+        if results_mgr:
+            await asyncio.to_thread(results_mgr.flush)
+    await asyncio.to_thread(_store_verdict, prep, result)
+    return result
+
+
+def _plan_llm_input(
+    script_content: str, config: Config
+) -> Tuple[str, Optional[list[str]]]:
+    """Return the content to send to the LLM, with embedded payloads replaced
+    by descriptors, and the chunks to map-reduce over, or None if it fits in
+    one request"""
+    with stage("payloads"):
+        script_content, _ = extract_payloads(script_content)
+
+    budget = plan_budget(config)
+    with stage("tokenize") as timing:
+        if config.token_count_mode == "approximate":
+            # Budget check only, the chunker encodes exactly if it is needed
+            offsets = None
+            script_tokens = count_tokens(
+                script_content, budget.model, mode="approximate"
+            )
+        else:
+            # Encode once, the offsets are reused by the chunker
+            offsets = token_offsets(script_content, budget.model)
+            script_tokens = len(offsets)
+        timing.tokens = script_tokens
+
+    # Scripts that don't fit next to the full security prompt use map-reduce
+    if script_tokens > budget.direct_capacity:
+        with stage("chunk"):
+            chunks = chunk_content(
+                script_content,
+                chunk_size=budget.chunk_capacity,
+                offsets=offsets,
+                model=budget.model,
+            )
         logger.debug(
             f"Script too large ({script_tokens} tokens), using map-reduce analysis"
         )
         logger.debug(f"Split into {len(chunks)} chunks")
+        return script_content, chunks
+
+    logger.debug(f"Using direct analysis (script is {script_tokens} tokens)")
+    return script_content, None
+
+
+def _security_input(content: str, file_info: dict) -> dict:
+    return {
+        "content": content,
+        "mime_type": file_info["mime_type"],
+        "file_type": file_info.get("file_type", "unknown"),
+        "file_type_explanation": file_info.get("explanation", ""),
+    }
+
+
+def _check_result(raw_result: Any, what: str) -> dict:
+    if not isinstance(raw_result, dict):
+        raise ValueError(f"Expected dict, got {type(raw_result)}: {raw_result}")
+
+    if "harm_score" not in raw_result:
+        raise ValueError(f"Missing harm_score in {what}: {raw_result}")
+
+    return raw_result
+
+
+def _verdict(raw_result: dict, mime_type: str) -> Tuple[int, int, str, bool, str]:
+    return (
+        raw_result["harm_score"],
+        raw_result["complexity_score"],
+        raw_result["explanation"],
+        raw_result["requires_root"],
+        mime_type,
+    )
+
+
+def _analyze_with_llm(
+    script_content: str,
+    file_info: dict,
+    config: Config,
+    results_mgr: ResultsManager,
+    debug: bool,
+) -> Tuple[int, int, str, bool, str]:
+    script_content, chunks = _plan_llm_input(script_content, config)
+    if chunks is not None:
         return analyze_chunks(
             chunks, file_info["mime_type"], config, results_mgr, debug
         )
 
     # For small scripts, use direct analysis
-    if script_tokens < chunk_size:
-        logger.debug(f"Using direct analysis (script is {script_tokens} tokens)")
-        logger.debug("Sending to LLM...")
-        chain = create_security_chain(config, results_mgr)
-        try:
-            raw_result = chain.invoke(
-                {
-                    "content": script_content,
-                    "mime_type": file_info["mime_type"],
-                    "file_type": file_info.get("file_type", "unknown"),
-                    "file_type_explanation": file_info.get("explanation", ""),
-                }
-            )
+    logger.debug("Sending to LLM...")
+    chain = create_security_chain(config, results_mgr)
+    try:
+        with stage("direct"):
+            raw_result = chain.invoke(_security_input(script_content, file_info))
+        return _verdict(_check_result(raw_result, "response"), file_info["mime_type"])
+    except Exception as e:
+        logger.debug(f"Error in security analysis: {str(e)}")
+        logger.debug(f"Full error: {repr(e)}")
+        return 0, 0, str(e), False, file_info["mime_type"]
 
-            if not isinstance(raw_result, dict):
-                raise ValueError(f"Expected dict, got {type(raw_result)}: {raw_result}")
 
-            if "harm_score" not in raw_result:
-                raise ValueError(f"Missing harm_score in response: {raw_result}")
+async def _analyze_with_llm_async(
+    script_content: str,
+    file_info: dict,
+    config: Config,
+    results_mgr: ResultsManager,
+    debug: bool,
+) -> Tuple[int, int, str, bool, str]:
+    script_content, chunks = await asyncio.to_thread(
+        _plan_llm_input, script_content, config
+    )
+    if chunks is not None:
+        return await analyze_chunks_async(
+            chunks, file_info["mime_type"], config, results_mgr, debug
+        )
 
-            return (
-                raw_result["harm_score"],
-                raw_result["complexity_score"],
-                raw_result["explanation"],
-                raw_result["requires_root"],
-                file_info["mime_type"],
-            )
+    logger.debug("Sending to LLM...")
+    chain = create_security_chain(config, results_mgr)
+    try:
+        with stage("direct"):
+            raw_result = await chain.ainvoke(_security_input(script_content, file_info))
+        return _verdict(_check_result(raw_result, "response"), file_info["mime_type"])
+    except Exception as e:
+        logger.debug(f"Error in security analysis: {str(e)}")
+        logger.debug(f"Full error: {repr(e)}")
+        return 0, 0, str(e), False, file_info["mime_type"]
+
+
+def _dedupe_chunks(chunks: list[str]) -> Tuple[list[str], list[int]]:
+    """Distinct chunks in first-seen order, with how often each one occurs"""
+    counts = {}
+    for chunk in chunks:
+        counts[chunk] = counts.get(chunk, 0) + 1
+    if len(counts) < len(chunks):
+        logger.debug(f"{len(chunks) - len(counts)} duplicate chunks skipped")
+    return list(counts), list(counts.values())
+
+
+def _map_inputs(chunks: list[str], mime_type: str) -> list[dict]:
+    return [
+        {
+            "content": chunk,
+            "mime_type": mime_type,
+            "file_type": "unknown",
+            "file_type_explanation": "",
+        }
+        for chunk in chunks
+    ]
+
+
+def _collect_summaries(raw_results: list, counts: list[int]) -> list[dict]:
+    """Keep the valid map results, in chunk order. Results for repeated chunks
+    carry their occurrence count into the reduce input."""
+    summaries = []
+    for i, (raw_result, count) in enumerate(zip(raw_results, counts)):
+        if raw_result is None:
+            continue  # skipped by an early exit
+        try:
+            if isinstance(raw_result, Exception):
+                raise raw_result
+
+            logger.debug(f"Raw map result for chunk {i+1}: {raw_result}")
+            summary = _check_result(raw_result, "map result")
+            if count > 1:
+                summary = {**summary, "occurrences": count}
+            summaries.append(summary)
         except Exception as e:
-            logger.debug(f"Error in security analysis: {str(e)}")
+            logger.debug(f"Error analyzing chunk {i+1}: {str(e)}")
             logger.debug(f"Full error: {repr(e)}")
-            return 0, 0, str(e), False, file_info["mime_type"]
+            continue
+    return summaries
+
+
+def _blocks(raw_result: Any, config: Config) -> bool:
+    harm_score = raw_result.get("harm_score") if isinstance(raw_result, dict) else None
+    return (
+        isinstance(harm_score, (int, float)) and harm_score >= config.block_harm_score
+    )
+
+
+def _run_map(
+    map_chain: Any, chunks: list[str], mime_type: str, config: Config
+) -> Tuple[list, bool]:
+    """Map results in chunk order, and whether the phase stopped early. With
+    early exit on, results are taken as they complete and the chunks not
+    started yet are cancelled once one reaches block_harm_score; their
+    results are None."""
+    inputs = _map_inputs(chunks, mime_type)
+    run_config = {"max_concurrency": config.llm.max_concurrency}
+    if config.early_exit != "always":
+        return map_chain.batch(inputs, config=run_config, return_exceptions=True), False
+
+    raw_results = [None] * len(inputs)
+    with closing(
+        map_chain.batch_as_completed(inputs, config=run_config, return_exceptions=True)
+    ) as completed:
+        for i, raw_result in completed:
+            raw_results[i] = raw_result
+            if _blocks(raw_result, config):
+                return raw_results, True
+    return raw_results, False
+
+
+async def _run_map_async(
+    map_chain: Any, chunks: list[str], mime_type: str, config: Config
+) -> Tuple[list, bool]:
+    inputs = _map_inputs(chunks, mime_type)
+    max_concurrency = config.llm.max_concurrency
+    if config.early_exit != "always":
+        raw_results = await map_chain.abatch(
+            inputs,
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+        return raw_results, False
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(i: int, map_input: dict) -> Tuple[int, Any]:
+        async with semaphore:
+            try:
+                return i, await map_chain.ainvoke(map_input)
+            except Exception as e:
+                return i, e
+
+    tasks = [asyncio.create_task(run(i, x)) for i, x in enumerate(inputs)]
+    raw_results = [None] * len(inputs)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            i, raw_result = await next_done
+            raw_results[i] = raw_result
+            if _blocks(raw_result, config):
+                return raw_results, True
+    finally:
+        for task in tasks:
+            task.cancel()
+    return raw_results, False
+
+
+def _early_exit_verdict(
+    raw_results: list, summaries: list[dict], config: Config, mime_type: str
+) -> Tuple[int, int, str, bool, str]:
+    """Verdict from the map results in hand when the phase stopped early"""
+    trigger = max(
+        (s for s in summaries if _blocks(s, config)), key=lambda s: s["harm_score"]
+    )
+    analyzed = sum(1 for raw_result in raw_results if raw_result is not None)
+    logger.debug(
+        f"Map phase stopped early after {analyzed} of {len(raw_results)} chunks"
+    )
+    return (
+        trigger["harm_score"],
+        trigger.get("complexity_score", 0),
+        f"{EARLY_EXIT_PREFIX}a section scored harm {trigger['harm_score']}, "
+        f"so {len(raw_results) - analyzed} of {len(raw_results)} sections were "
+        f"not analyzed. {trigger.get('explanation', '')}",
+        any(s.get("requires_root") is True for s in summaries),
+        mime_type,
+    )
+
+
+def _reduce_input(summaries: list[dict]) -> dict:
+    logger.debug(f"Summaries to combine: {summaries}")
+    return {"summaries": "\n".join(str(s) for s in summaries)}
+
+
+def _batch_summaries(summaries: list[dict], config: Config) -> list[list[dict]]:
+    """Group summaries, in order, into reduce requests of at most
+    reduce_fan_in summaries that fit the reduce budget. A batch always takes
+    at least two summaries so every level of the tree shrinks."""
+    budget = plan_budget(config)
+    fan_in = max(config.reduce_fan_in, 2)
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for summary in summaries:
+        tokens = (
+            count_tokens(str(summary), budget.model, mode=config.token_count_mode) + 1
+        )
+        if len(batch) >= 2 and (
+            len(batch) >= fan_in or batch_tokens + tokens > budget.reduce_capacity
+        ):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(summary)
+        batch_tokens += tokens
+    batches.append(batch)
+    return batches
+
+
+def _reduce_level(batches: list[list[dict]], results: list) -> list[dict]:
+    """Summaries for the next level. A batch of one is passed up as is."""
+    results = iter(results)
+    return [
+        _check_result(next(results), "reduce result") if len(batch) > 1 else batch[0]
+        for batch in batches
+    ]
+
+
+def _tree_reduce(
+    summaries: list[dict], config: Config, results_mgr: ResultsManager
+) -> Any:
+    """Reduce summaries batch by batch, level by level, until one request
+    can combine what is left"""
+    reduce_chain = REDUCE_PROMPT | get_llm(config, results_mgr) | CustomJsonParser()
+    logger.debug("Starting reduce phase...")
+    while True:
+        batches = _batch_summaries(summaries, config)
+        if len(batches) == 1:
+            return reduce_chain.invoke(_reduce_input(batches[0]))
+
+        logger.debug(f"Reducing {len(summaries)} summaries in {len(batches)} batches")
+        results = reduce_chain.batch(
+            [_reduce_input(batch) for batch in batches if len(batch) > 1],
+            config={"max_concurrency": config.llm.max_concurrency},
+        )
+        summaries = _reduce_level(batches, results)
+
+
+async def _tree_reduce_async(
+    summaries: list[dict], config: Config, results_mgr: ResultsManager
+) -> Any:
+    reduce_chain = REDUCE_PROMPT | get_llm(config, results_mgr) | CustomJsonParser()
+    logger.debug("Starting reduce phase...")
+    while True:
+        batches = _batch_summaries(summaries, config)
+        if len(batches) == 1:
+            return await reduce_chain.ainvoke(_reduce_input(batches[0]))
+
+        logger.debug(f"Reducing {len(summaries)} summaries in {len(batches)} batches")
+        results = await reduce_chain.abatch(
+            [_reduce_input(batch) for batch in batches if len(batch) > 1],
+            config={"max_concurrency": config.llm.max_concurrency},
+        )
+        summaries = _reduce_level(batches, results)
 
 
 def analyze_chunks(
@@ -137,66 +557,69 @@ def analyze_chunks(
     results_mgr: ResultsManager,
     debug: bool,
 ) -> Tuple[int, int, str, bool, str]:
-    # Map phase - analyze each chunk
-    summaries = []
+    # Map phase - analyze distinct chunks concurrently, results come back in
+    # chunk order
+    chunks, counts = _dedupe_chunks(chunks)
     map_chain = MAP_PROMPT | get_llm(config, results_mgr) | CustomJsonParser()
+    max_concurrency = config.llm.max_concurrency
 
-    for i, chunk in enumerate(chunks):
-        logger.debug(f"Analyzing chunk {i+1}/{len(chunks)}")
-        logger.debug(f"Chunk size: {len(chunk)} characters")
-        logger.debug("Sending chunk to LLM...")
-        try:
-            raw_result = map_chain.invoke(
-                {
-                    "content": chunk,
-                    "mime_type": mime_type,
-                    "file_type": "unknown",
-                    "file_type_explanation": "",
-                }
-            )
-
-            logger.debug(f"Raw map result: {raw_result}")
-
-            if not isinstance(raw_result, dict):
-                raise ValueError(f"Expected dict, got {type(raw_result)}: {raw_result}")
-
-            if "harm_score" not in raw_result:
-                raise ValueError(f"Missing harm_score in map result: {raw_result}")
-
-            summaries.append(raw_result)
-        except Exception as e:
-            logger.debug(f"Error analyzing chunk {i+1}: {str(e)}")
-            logger.debug(f"Full error: {repr(e)}")
-            continue
+    logger.debug(
+        f"Analyzing {len(chunks)} chunks with max_concurrency={max_concurrency}"
+    )
+    with stage("map"):
+        raw_results, stopped = _run_map(map_chain, chunks, mime_type, config)
 
+    summaries = _collect_summaries(raw_results, counts)
     if not summaries:
         return 0, 0, "Failed to analyze script chunks", False, mime_type
+    if stopped:
+        return _early_exit_verdict(raw_results, summaries, config, mime_type)
 
-    # Reduce phase - combine summaries
+    # Reduce phase - combine summaries, in a tree if they don't fit one request
     try:
-        logger.debug("Starting reduce phase...")
-        logger.debug(f"Summaries to combine: {summaries}")
-
-        reduce_chain = REDUCE_PROMPT | get_llm(config, results_mgr) | CustomJsonParser()
-        raw_result = reduce_chain.invoke(
-            {"summaries": "\n".join(str(s) for s in summaries)}
-        )
+        with stage("reduce"):
+            raw_result = _tree_reduce(summaries, config, results_mgr)
 
         logger.debug(f"Raw reduce result: {raw_result}")
+        return _verdict(_check_result(raw_result, "reduce result"), mime_type)
+    except Exception as e:
+        logger.debug(f"Error combining summaries: {str(e)}")
+        logger.debug(f"Full error: {repr(e)}")
+        return 0, 0, str(e), False, mime_type
 
-        if not isinstance(raw_result, dict):
-            raise ValueError(f"Expected dict, got {type(raw_result)}: {raw_result}")
 
-        if "harm_score" not in raw_result:
-            raise ValueError(f"Missing harm_score in reduce result: {raw_result}")
+async def analyze_chunks_async(
+    chunks: list[str],
+    mime_type: str,
+    config: Config,
+    results_mgr: ResultsManager,
+    debug: bool,
+) -> Tuple[int, int, str, bool, str]:
+    """Async counterpart of analyze_chunks, using abatch and ainvoke"""
+    chunks, counts = _dedupe_chunks(chunks)
+    map_chain = MAP_PROMPT | get_llm(config, results_mgr) | CustomJsonParser()
+    max_concurrency = config.llm.max_concurrency
 
-        return (
-            raw_result["harm_score"],
-            raw_result["complexity_score"],
-            raw_result["explanation"],
-            raw_result["requires_root"],
-            mime_type,
+    logger.debug(
+        f"Analyzing {len(chunks)} chunks with max_concurrency={max_concurrency}"
+    )
+    with stage("map"):
+        raw_results, stopped = await _run_map_async(
+            map_chain, chunks, mime_type, config
         )
+
+    summaries = _collect_summaries(raw_results, counts)
+    if not summaries:
+        return 0, 0, "Failed to analyze script chunks", False, mime_type
+    if stopped:
+        return _early_exit_verdict(raw_results, summaries, config, mime_type)
+
+    try:
+        with stage("reduce"):
+            raw_result = await _tree_reduce_async(summaries, config, results_mgr)
+
+        logger.debug(f"Raw reduce result: {raw_result}")
+        return _verdict(_check_result(raw_result, "reduce result"), mime_type)
     except Exception as e:
         logger.debug(f"Error combining summaries: {str(e)}")
         logger.debug(f"Full error: {repr(e)}")
@@ -0,0 +1,274 @@
+"""Rule-based verdicts for trivial shell scripts.
+
+Runs after YARA and before the LLM. A verdict is only given when every
+command in the script is on the allowlist below and nothing in the script
+can run code the filter can't see (substitutions, subshells, redirects to
+files, ...). Anything else returns None and goes to the LLM as usual, so
+the filter can only ever skip work, never hide a script from analysis.
+"""
+
+import re
+import shlex
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger()
+
+# Larger scripts are never "trivial", don't bother tokenizing them
+STATIC_MAX_BYTES = 8 * 1024
+
+SHELL_MIME_TYPES = ["text/x-shellscript"]
+# Starts the explanation of every static verdict
+STATIC_PREFIX = "Static analysis: "
+
+
+@dataclass(frozen=True)
+class _Rule:
+    harm: int = 1
+    # The first argument must be one of these, e.g. apt-get install
+    subcommands: Optional[frozenset] = None
+    # Options that may be given, None allows any option
+    flags: Optional[frozenset] = None
+    # Remaining arguments must be plain package names
+    packages: bool = False
+    requires_root: bool = False
+
+
+_APT = _Rule(
+    harm=2,
+    subcommands=frozenset({"install", "update"}),
+    flags=frozenset(
+        {
+            "-y",
+            "--yes",
+            "--assume-yes",
+            "-q",
+            "-qq",
+            "--quiet",
+            "--no-install-recommends",
+        }
+    ),
+    packages=True,
+    requires_root=True,
+)
+_YUM = _Rule(
+    harm=2,
+    subcommands=frozenset({"install"}),
+    flags=frozenset({"-y", "--assumeyes", "-q", "--quiet"}),
+    packages=True,
+    requires_root=True,
+)
+_PIP = _Rule(
+    harm=2,
+    subcommands=frozenset({"install"}),
+    flags=frozenset({"-U", "--upgrade", "--user", "-q", "--quiet", "--no-cache-dir"}),
+    packages=True,
+)
+
+COMMANDS = {
+    # Builtins and read-only utilities
+    # printf -v and test -v evaluate array subscripts, which can run
+    # command substitutions, so neither is here
+    "echo": _Rule(),
+    "true": _Rule(),
+    "false": _Rule(),
+    "exit": _Rule(),
+    "set": _Rule(),
+    "export": _Rule(),
+    "cd": _Rule(),
+    "pwd": _Rule(),
+    "ls": _Rule(),
+    "cat": _Rule(),
+    "grep": _Rule(),
+    "head": _Rule(),
+    "tail": _Rule(),
+    "wc": _Rule(),
+    "sleep": _Rule(),
+    "date": _Rule(),
+    "whoami": _Rule(),
+    "id": _Rule(),
+    "uname": _Rule(),
+    "which": _Rule(),
+    "mkdir": _Rule(),
+    "command": _Rule(subcommands=frozenset({"-v", "-V"})),
+    # Package installs from the configured repositories
+    "apt-get": _APT,
+    "apt": _APT,
+    "yum": _YUM,
+    "dnf": _YUM,
+    "apk": _Rule(
+        harm=2,
+        subcommands=frozenset({"add", "update"}),
+        flags=frozenset({"--no-cache", "--update", "-q", "--quiet"}),
+        packages=True,
+        requires_root=True,
+    ),
+    "brew": _Rule(
+        harm=2,
+        subcommands=frozenset({"install", "update"}),
+        flags=frozenset({"-q", "--quiet"}),
+        packages=True,
+    ),
+    "pip": _PIP,
+    "pip3": _PIP,
+    "npm": _Rule(
+        harm=2,
+        subcommands=frozenset({"install", "i", "ci"}),
+        flags=frozenset({"-g", "--global", "-D", "--save-dev", "--silent"}),
+        packages=True,
+    ),
+}
+
+SEPARATORS = {";", "&&", "||", "|", "&"}
+# Redirects are only accepted to /dev/null or between file descriptors
+FILE_REDIRECTS = {">", ">>", "<", "&>", "&>>"}
+FD_REDIRECTS = {">&"}
+
+# Constructs that can run code the filter doesn't see. Escaped "$", "(" and
+# backticks are unquoted by the lexer but still run when bash evaluates them
+# again, e.g. in an array subscript.
+_DYNAMIC_RE = re.compile(r"\$\(|`|\$'|<<|\\[$(`]")
+_ASSIGNMENT_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)=")
+# The only variables a script may set. Most tools read some variable that
+# changes where they download from or what they execute (PIP_INDEX_URL,
+# NODE_OPTIONS, LD_PRELOAD, ...), so anything else needs an LLM analysis.
+_SAFE_VARIABLES_RE = re.compile(
+    r"^(DEBIAN_FRONTEND|NONINTERACTIVE|LANG|LANGUAGE|LC_[A-Z]+|TZ|TERM)$"
+)
+# Plain package names with an optional version, npm scopes allowed. No URLs,
+# paths or VCS references.
+_PACKAGE_RE = re.compile(
+    r"^(@[\w.-]+/)?[A-Za-z0-9][\w.+-]*([=<>~!^@][\w.*<>=~!^@,-]*)?$"
+)
+
+
+class _Ambiguous(Exception):
+    """The script needs a real analysis"""
+
+    pass
+
+
+def _logical_lines(content: str) -> list[str]:
+    """Join backslash continuations and drop blank and comment lines"""
+    lines = content.replace("\\\n", " ").splitlines()
+    return [
+        line.strip()
+        for line in lines
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+def _tokenize(line: str) -> list[str]:
+    # shlex would treat a "#" inside a word as a comment, which bash doesn't,
+    # so anything with a "#" after the start of the line is left to the LLM
+    if "#" in line or _DYNAMIC_RE.search(line):
+        raise _Ambiguous(line)
+    lexer = shlex.shlex(line, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    try:
+        return list(lexer)
+    except ValueError as e:  # unbalanced quotes, usually a multi-line string
+        raise _Ambiguous(line) from e
+
+
+def _split_commands(tokens: list[str]) -> list[list[str]]:
+    commands = [[]]
+    for token in tokens:
+        if token in SEPARATORS:
+            commands.append([])
+        else:
+            commands[-1].append(token)
+    return [command for command in commands if command]
+
+
+def _check_command(words: list[str]) -> Tuple[str, _Rule, bool]:
+    """Validate one simple command, returning its name, rule and whether it
+    runs under sudo"""
+    # Redirects
+    args = []
+    words = iter(words)
+    for word in words:
+        if word in FILE_REDIRECTS:
+            if next(words, None) != "/dev/null":
+                raise _Ambiguous(word)
+        elif word in FD_REDIRECTS:
+            if next(words, "") not in ("1", "2"):
+                raise _Ambiguous(word)
+        elif set(word) <= set("();<>|&"):
+            raise _Ambiguous(word)  # subshells, process substitution, ...
+        elif "[" in word:
+            raise _Ambiguous(word)  # array subscripts are evaluated
+        else:
+            args.append(word)
+
+    # Leading variable assignments
+    while args and _ASSIGNMENT_RE.match(args[0]):
+        _check_assignment(args.pop(0))
+    if not args:
+        return "", _Rule(), False
+
+    sudo = args[0] == "sudo"
+    if sudo:
+        args.pop(0)
+        if not args or args[0].startswith("-"):
+            raise _Ambiguous("sudo")
+
+    name, args = args[0], args[1:]
+    rule = COMMANDS.get(name)
+    if rule is None:
+        raise _Ambiguous(name)
+
+    if rule.subcommands is not None:
+        if not args or args[0] not in rule.subcommands:
+            raise _Ambiguous(name)
+        args = args[1:]
+
+    for arg in args:
+        if arg.startswith("-"):
+            if rule.flags is not None and arg not in rule.flags:
+                raise _Ambiguous(arg)
+        elif name == "export" and _ASSIGNMENT_RE.match(arg):
+            _check_assignment(arg)
+        elif rule.packages and ("$" in arg or not _PACKAGE_RE.match(arg)):
+            raise _Ambiguous(arg)
+
+    return name, rule, sudo
+
+
+def _check_assignment(word: str) -> None:
+    if not _SAFE_VARIABLES_RE.match(_ASSIGNMENT_RE.match(word).group(1)):
+        raise _Ambiguous(word)
+
+
+def static_verdict(
+    content: str, mime_type: str
+) -> Optional[Tuple[int, int, str, bool, str]]:
+    """Return a verdict for scripts made only of allowlisted commands, or
+    None if the script needs an LLM analysis"""
+    if mime_type not in SHELL_MIME_TYPES or len(content) > STATIC_MAX_BYTES:
+        return None
+
+    harm = 1
+    requires_root = False
+    names = set()
+    try:
+        for line in _logical_lines(content):
+            for words in _split_commands(_tokenize(line)):
+                name, rule, sudo = _check_command(words)
+                if name:
+                    names.add(name)
+                harm = max(harm, rule.harm)
+                requires_root = requires_root or sudo or rule.requires_root
+    except _Ambiguous as e:
+        logger.debug(f"Static filter can't decide, needs LLM analysis: {e}")
+        return None
+
+    explanation = (
+        f"{STATIC_PREFIX}the script only runs allowlisted commands"
+        + (f" ({', '.join(sorted(names))})" if names else "")
+        + ", so no LLM analysis was needed."
+    )
+    return harm, 1, explanation, requires_root, mime_type
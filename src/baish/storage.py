@@ -1,11 +1,94 @@
+import hashlib
 import json
+import mmap
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, Optional
 
 from .config import Config
-from .file_analyzer import detect_file_type
+from .file_analyzer import detect_file_type, is_binary
+from .retention import day_dir
+from .timings import stage
+
+BLOCK_SIZE = 64 * 1024
+
+
+class InputError(Exception):
+    """Input was rejected before analysis"""
+
+    pass
+
+
+@dataclass
+class SpooledScript:
+    """Input that has been streamed to disk, with its hash"""
+
+    path: Path
+    sha256: str
+    size: int
+
+    def read_text(self) -> str:
+        """Decode the spooled file straight from a memory map"""
+        if not self.size:
+            return ""
+        with self.path.open("rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, "utf-8")
+
+    def discard(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def spool_input(
+    stream: BinaryIO,
+    config: Config,
+    date_str: str,
+    unique_id: str,
+) -> SpooledScript:
+    """Stream input to the scripts directory block by block, hashing it as it
+    goes, so large inputs are never held in memory as bytes.
+
+    Raises InputError if the first block looks binary or the input is larger
+    than config.max_input_bytes. Nothing is left on disk in that case.
+    """
+    scripts_dir = day_dir(Path(config.baish_dir) / "scripts", date_str)
+    scripts_dir.mkdir(parents=True, exist_ok=True)
+    path = scripts_dir / f"{date_str}_{unique_id}_script.partial"
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with path.open("wb") as f:
+            while True:
+                block = stream.read(BLOCK_SIZE)
+                if size == 0 and is_binary(block):
+                    raise InputError("Input appears to be binary data")
+                size += len(block)
+                if size > config.max_input_bytes:
+                    raise InputError(
+                        f"Input is larger than max_input_bytes "
+                        f"({config.max_input_bytes} bytes)"
+                    )
+                digest.update(block)
+                f.write(block)
+                # Buffered reads only come back short at EOF
+                if len(block) < BLOCK_SIZE:
+                    break
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    return SpooledScript(path=path, sha256=digest.hexdigest(), size=size)
+
+
+def _script_extension(mime_type: str) -> str:
+    if "python" in mime_type:
+        return ".py"
+    if "shellscript" not in mime_type:
+        return ".txt"
+    return ".sh"
 
 
 def save_script(
@@ -13,7 +96,14 @@ def save_script(
     config: Optional[Config] = None,
     date_str: Optional[str] = None,
     unique_id: Optional[str] = None,
+    spooled: Optional[SpooledScript] = None,
+    file_info: Optional[dict] = None,
 ) -> str:
+    """Save a script to the scripts directory.
+
+    If the script was already spooled to disk by spool_input, the spool file
+    is moved into place instead of writing the script a second time.
+    """
     if config is None:
         config = Config().load()
 
@@ -23,20 +113,22 @@ def save_script(
     if unique_id is None:
         unique_id = str(uuid.uuid4())[:8]
 
-    scripts_dir = Path(config.baish_dir) / "scripts"
+    scripts_dir = day_dir(Path(config.baish_dir) / "scripts", date_str)
     scripts_dir.mkdir(parents=True, exist_ok=True)
 
-    file_info = detect_file_type(script)
-    extension = ".sh"
-    if "python" in file_info["mime_type"]:
-        extension = ".py"
-    elif "shellscript" not in file_info["mime_type"]:
-        extension = ".txt"
+    if file_info is None:
+        with stage("libmagic"):
+            file_info = detect_file_type(script)
+    extension = _script_extension(file_info["mime_type"])
 
     filename = f"{date_str}_{unique_id}_script{extension}"
     script_path = scripts_dir / filename
-    script_path.write_text(script)
-    script_path.chmod(0o755)
+    with stage("save_script"):
+        if spooled:
+            spooled.path.replace(script_path)
+        else:
+            script_path.write_text(script)
+        script_path.chmod(0o755)
 
     return str(script_path)
 
@@ -51,13 +143,13 @@ def save_results_json(
     if config is None:
         config = Config().load()
 
-    results_dir = Path(config.baish_dir) / "results"
+    results_dir = day_dir(Path(config.baish_dir) / "results", date_str)
     results_dir.mkdir(parents=True, exist_ok=True)
 
     filename = f"{date_str}_{unique_id}_results.json"
     results_path = results_dir / filename
 
-    with open(results_path, "w") as f:
+    with stage("save_results"), open(results_path, "w") as f:
         json.dump(results, f, indent=2)
 
     return results_path
@@ -0,0 +1,85 @@
+"""Per-stage timings of an analysis.
+
+`collect()` makes a Timings collector current for the calling context, and
+the stages of the pipeline record into it with `stage()`. When nothing is
+collecting a stage costs a context variable lookup. LLM requests are timed by
+a callback in llm.py that get_llm attaches while a collector is current.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+_current: ContextVar[Optional["Timings"]] = ContextVar("baish_timings", default=None)
+
+
+@dataclass
+class StageTiming:
+    calls: int = 0
+    seconds: float = 0.0
+    tokens: int = 0
+
+
+class Timings:
+    """Wall time, calls and tokens per stage. The threads of a batch record
+    into the same collector."""
+
+    def __init__(self):
+        self.stages: Dict[str, StageTiming] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def add(self, name: str, seconds: float, tokens: int = 0) -> None:
+        with self._lock:
+            timing = self.stages.setdefault(name, StageTiming())
+            timing.calls += 1
+            timing.seconds += seconds
+            timing.tokens += tokens
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            stages = {
+                name: {
+                    "calls": timing.calls,
+                    "seconds": round(timing.seconds, 6),
+                    "tokens": timing.tokens,
+                }
+                for name, timing in self.stages.items()
+            }
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": stages,
+        }
+
+
+def current_timings() -> Optional[Timings]:
+    return _current.get()
+
+
+@contextmanager
+def collect(timings: Optional[Timings]) -> Iterator[Optional[Timings]]:
+    """Record stages run in this context into timings, or nowhere if None"""
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[StageTiming]:
+    """Time the block as one call of a stage. Set tokens on the yielded
+    record to count them too."""
+    record = StageTiming()
+    timings = _current.get()
+    if timings is None:
+        yield record
+        return
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        timings.add(name, time.perf_counter() - start, record.tokens)
@@ -0,0 +1,89 @@
+"""Token budgets for LLM requests.
+
+The prompt overhead of each template is counted once per model and token
+count mode, so planning a request only costs counting the script itself.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .config import Config
+from .logger import setup_logger
+from .prompts.security import PROMPT as SECURITY_PROMPT
+from .prompts.security_map_reduce import MAP_PROMPT, REDUCE_PROMPT
+from .token_counter import count_tokens
+
+logger = setup_logger()
+
+PROMPTS = {
+    "security": SECURITY_PROMPT,
+    "map": MAP_PROMPT,
+    "reduce": REDUCE_PROMPT,
+}
+
+# Chat formats add a few tokens per message for roles and separators, and a
+# few more to prime the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+# Never plan chunks smaller than this, even if the prompt leaves less room
+MIN_CHUNK_TOKENS = 256
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    model: str
+    token_limit: int
+    response_tokens: int
+    # Script tokens that fit in one request with the full security prompt
+    direct_capacity: int
+    # Script tokens per map-reduce chunk
+    chunk_capacity: int
+    # Summary tokens per reduce request
+    reduce_capacity: int
+
+
+@lru_cache(maxsize=32)
+def prompt_overhead(prompt_name: str, model: str, mode: str) -> int:
+    """Tokens a prompt template uses with empty inputs"""
+    prompt = PROMPTS[prompt_name]
+    messages = prompt.format_messages(**{var: "" for var in prompt.input_variables})
+    return REPLY_OVERHEAD_TOKENS + sum(
+        count_tokens(message.content, model, mode=mode) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+@lru_cache(maxsize=32)
+def _plan(model: str, token_limit: int, response_tokens: int, mode: str) -> TokenBudget:
+    available = token_limit - response_tokens
+    direct_capacity = available - prompt_overhead("security", model, mode)
+    chunk_capacity = available - prompt_overhead("map", model, mode)
+    reduce_capacity = available - prompt_overhead("reduce", model, mode)
+    if chunk_capacity < MIN_CHUNK_TOKENS:
+        logger.warning(
+            f"token_limit {token_limit} leaves only {chunk_capacity} tokens per "
+            f"chunk for {model}, using {MIN_CHUNK_TOKENS}"
+        )
+        chunk_capacity = MIN_CHUNK_TOKENS
+
+    budget = TokenBudget(
+        model=model,
+        token_limit=token_limit,
+        response_tokens=response_tokens,
+        direct_capacity=max(direct_capacity, 0),
+        chunk_capacity=chunk_capacity,
+        reduce_capacity=max(reduce_capacity, 0),
+    )
+    logger.debug(f"Token budget: {budget}")
+    return budget
+
+
+def plan_budget(config: Config) -> TokenBudget:
+    """Budget for the LLM the config has selected"""
+    llm_config = config.llm
+    return _plan(
+        llm_config.model,
+        llm_config.token_limit,
+        llm_config.response_tokens,
+        config.token_count_mode,
+    )
@@ -1,11 +1,93 @@
+import math
+import re
+import threading
+from typing import Optional
+
 import tiktoken
 
+from .logger import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_ENCODING = "cl100k_base"
+
+# Average UTF-8 bytes per token on shell scripts, by model name prefix. The
+# values are deliberately on the low side so approximate counts err towards
+# overestimating, which is the safe direction for budget checks.
+BYTES_PER_TOKEN = {
+    "gpt-4o": 3.6,
+    "o1": 3.6,
+    "gpt": 3.2,
+    "claude": 3.0,
+    "llama": 3.2,
+    "mistral": 2.8,
+    "mixtral": 2.8,
+    "command": 3.2,
+}
+DEFAULT_BYTES_PER_TOKEN = 3.0
+
+# Rough stand-in for tiktoken's pre-tokenizer, used when no encoding is available
+_PRETOKEN_RE = re.compile(r" ?\w+| ?[^\s\w]+|\s+(?!\S)|\s+")
+
+_encodings: dict[str, Optional[tiktoken.Encoding]] = {}
+_encodings_lock = threading.Lock()
+
+
+def get_encoding(model: str = DEFAULT_MODEL) -> Optional[tiktoken.Encoding]:
+    """Return the tiktoken encoding for a model, building it once per process.
+
+    Models tiktoken doesn't know about use cl100k_base. Returns None when no
+    encoding can be loaded (e.g. the BPE file can't be downloaded), and that
+    failure is remembered too so it isn't retried on every call.
+    """
+    if model in _encodings:
+        return _encodings[model]
+
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception as e:
+                logger.debug(f"No tiktoken encoding for {model}, approximating: {e}")
+                encoding = None
+            _encodings[model] = encoding
+    return _encodings[model]
+
+
+def bytes_per_token(model: str) -> float:
+    for prefix, ratio in BYTES_PER_TOKEN.items():
+        if model.startswith(prefix):
+            return ratio
+    return DEFAULT_BYTES_PER_TOKEN
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL, mode: str = "exact") -> int:
+    """Count the number of tokens in a text string.
+
+    In "approximate" mode the count is estimated from the UTF-8 length and the
+    model's calibrated bytes-per-token, without running the tokenizer.
+    """
+    if mode == "approximate":
+        return math.ceil(len(text.encode("utf-8")) / bytes_per_token(model))
+
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(_PRETOKEN_RE.findall(text))
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def token_offsets(text: str, model: str = DEFAULT_MODEL) -> list[int]:
+    """Encode text once and return the character offset where each token starts.
 
-def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
-    """Count the number of tokens in a text string."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-        return len(encoding.encode(text))
-    except Exception:
-        # Fallback to approximate count if tiktoken fails
-        return len(text.split()) * 1.3  # Rough approximation
+    The length of the result is the token count, and the offsets let callers
+    cut the text at token boundaries without encoding it again.
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return [match.start() for match in _PRETOKEN_RE.finditer(text)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode_with_offsets(tokens)[1]
@@ -0,0 +1,198 @@
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import Config
+from .logger import setup_logger
+
+logger = setup_logger()
+
+PROMPT_FILES = ["security.py", "security_map_reduce.py"]
+# Seconds to wait for another process (e.g. a parallel scan worker) to
+# release its write lock
+DB_TIMEOUT = 30
+# Cache lookups are written out once this many are pending
+USAGE_FLUSH_EVERY = 100
+
+
+@dataclass
+class _Usage:
+    last_used: Dict[str, float] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+
+    def __len__(self) -> int:
+        return self.hits + self.misses
+
+
+# Lookups not yet written to each database. Lookups only read, so parallel
+# workers don't queue up behind each other's write lock.
+_usage_lock = threading.Lock()
+_usage: Dict[Path, _Usage] = {}
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    db = sqlite3.connect(path, timeout=DB_TIMEOUT)
+    db.execute("PRAGMA journal_mode=WAL")
+    return db
+
+
+def _flush_all() -> None:
+    for path in list(_usage):
+        try:
+            db = _connect(path)
+        except sqlite3.Error:
+            continue  # baish_dir is gone, nothing to keep the counts for
+        try:
+            _flush_usage(db, path)
+        except sqlite3.Error:
+            pass
+        finally:
+            db.close()
+
+
+def _flush_usage(db: sqlite3.Connection, path: Path) -> None:
+    with _usage_lock:
+        usage = _usage.pop(path, None)
+    if not usage:
+        return
+    with db:
+        db.executemany(
+            "UPDATE verdicts SET last_used = MAX(last_used, ?) WHERE key = ?",
+            [(used, key) for key, used in usage.last_used.items()],
+        )
+        for name in ("hits", "misses"):
+            db.execute(
+                "INSERT INTO stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, getattr(usage, name)),
+            )
+
+
+atexit.register(_flush_all)
+
+
+@lru_cache(maxsize=1)
+def prompt_version() -> str:
+    """Hash of the prompt sources, so editing a prompt invalidates old verdicts"""
+    prompts_dir = Path(__file__).parent / "prompts"
+    digest = hashlib.sha256()
+    for name in PROMPT_FILES:
+        digest.update((prompts_dir / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class VerdictCache:
+    """Persistent, content-addressed cache of analysis verdicts.
+
+    Entries are keyed on the script hash plus everything that can change the
+    LLM's answer (provider, model, temperature, provider options and prompt
+    version). Eviction is LRU, bounded by entry count and entry age.
+
+    Lookups are counted in memory and written out in batches, when a verdict
+    is stored and when the process exits. Use the cache as a context manager,
+    or call close(), to release the database connection.
+    """
+
+    def __init__(self, config: Config):
+        self.cache_dir = Path(config.baish_dir) / "cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = config.cache_max_entries
+        self.max_age = config.cache_max_age_days * 86400
+        self.path = self.cache_dir / "verdicts.db"
+        self.db = _connect(self.path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                verdict TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """)
+
+    def __enter__(self) -> "VerdictCache":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    @staticmethod
+    def make_key(script: str, config: Config) -> str:
+        llm = config.llm
+        parts = [
+            hashlib.sha256(script.encode("utf-8")).hexdigest(),
+            llm.provider,
+            llm.model,
+            str(llm.temperature),
+            # Provider options such as the fake provider's canned verdict
+            json.dumps(llm.options, sort_keys=True, default=str),
+            prompt_version(),
+        ]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple]:
+        now = time.time()
+        row = self.db.execute(
+            "SELECT verdict, created FROM verdicts WHERE key = ?", (key,)
+        ).fetchone()
+        # Expired entries are removed by the next put()
+        if row and now - row[1] > self.max_age:
+            row = None
+
+        with _usage_lock:
+            usage = _usage.setdefault(self.path, _Usage())
+            if row is None:
+                usage.misses += 1
+            else:
+                usage.hits += 1
+                usage.last_used[key] = now
+            pending = len(usage)
+        if pending >= USAGE_FLUSH_EVERY:
+            _flush_usage(self.db, self.path)
+
+        return None if row is None else tuple(json.loads(row[0]))
+
+    def put(self, key: str, verdict: Tuple) -> None:
+        # Pending lookups go first so eviction sees recent use
+        _flush_usage(self.db, self.path)
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO verdicts (key, verdict, created, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(list(verdict)), now, now),
+            )
+            self._evict(now)
+
+    def stats(self) -> dict:
+        counters = dict(self.db.execute("SELECT name, value FROM stats").fetchall())
+        entries = self.db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        with _usage_lock:
+            usage = _usage.get(self.path, _Usage())
+            return {
+                "hits": counters.get("hits", 0) + usage.hits,
+                "misses": counters.get("misses", 0) + usage.misses,
+                "entries": entries,
+            }
+
+    def _evict(self, now: float) -> None:
+        self.db.execute("DELETE FROM verdicts WHERE created < ?", (now - self.max_age,))
+        self.db.execute(
+            "DELETE FROM verdicts WHERE key NOT IN "
+            "(SELECT key FROM verdicts ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
@@ -1,22 +1,65 @@
+import hashlib
+import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
 import yara
 
+from .logger import setup_logger
+
+logger = setup_logger()
+
 
 class YaraChecker:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[Path] = None):
         self.rules_dir = Path(__file__).parent / "yara"
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.compiled_rules = None
         self._load_rules()
 
     def _load_rules(self):
-        """Load and compile all YARA rules from the rules directory"""
+        """Load all YARA rules, preferring a previously compiled copy on disk"""
         rules = {}
-        for rule_file in self.rules_dir.glob("*.yar"):
+        for rule_file in sorted(self.rules_dir.glob("*.yar")):
             rules[rule_file.stem] = str(rule_file)
-        if rules:
-            self.compiled_rules = yara.compile(filepaths=rules)
+        if not rules:
+            return
+
+        cache_file = self._cache_file(rules) if self.cache_dir else None
+        if cache_file and cache_file.exists():
+            try:
+                self.compiled_rules = yara.load(str(cache_file))
+                return
+            except yara.Error as e:
+                logger.debug(f"Ignoring unreadable compiled YARA rules: {e}")
+
+        self.compiled_rules = yara.compile(filepaths=rules)
+        if cache_file:
+            self._save_rules(cache_file)
+
+    def _cache_file(self, rules: Dict[str, str]) -> Path:
+        """Name the compiled rules after the rule files and the YARA version"""
+        digest = hashlib.sha256(yara.YARA_VERSION.encode())
+        for namespace, path in rules.items():
+            stat = os.stat(path)
+            digest.update(f"{namespace}\0{path}\0{stat.st_mtime_ns}\0".encode())
+            digest.update(hashlib.sha256(Path(path).read_bytes()).digest())
+        return self.cache_dir / f"yara-{digest.hexdigest()[:16]}.yarc"
+
+    def _save_rules(self, cache_file: Path) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so concurrent runs never load a
+            # partially written file
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            self.compiled_rules.save(str(tmp_file))
+            os.replace(tmp_file, cache_file)
+            for stale in self.cache_dir.glob("yara-*.yarc"):
+                if stale != cache_file:
+                    stale.unlink(missing_ok=True)
+        except (OSError, yara.Error) as e:
+            logger.debug(f"Could not save compiled YARA rules: {e}")
 
     def check_content(self, content: str) -> Tuple[bool, Optional[Dict]]:
         """
@@ -38,3 +81,9 @@ class YaraChecker:
             "explanations": [match.meta.get("explanation", "") for match in matches],
         }
         return True, details
+
+
+@lru_cache(maxsize=None)
+def get_yara_checker(cache_dir: Optional[Path] = None) -> YaraChecker:
+    """Return a process-wide checker so rules are loaded once per process"""
+    return YaraChecker(cache_dir)
@@ -0,0 +1,229 @@
+"""Micro-benchmarks for the analysis hot paths.
+
+Run from the repository root:
+
+    python -m tests.benchmarks.bench --json baseline.json
+    python -m tests.benchmarks.bench --baseline baseline.json
+
+Every benchmark runs over small, medium and pathological inputs. Results are
+the best and median time per call over --repeat samples. With --baseline the
+best times are compared against a saved run, and the exit status is 1 if any
+benchmark got slower by more than --threshold.
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Tuple
+
+from langchain_core.messages import AIMessage
+
+from src.baish.__version__ import __version__
+from src.baish.config import Config, LLMConfig
+from src.baish.content_processor import chunk_content
+from src.baish.file_analyzer import detect_file_type
+from src.baish.llm import CustomJsonParser
+from src.baish.script_analyzer import analyze_script
+from src.baish.token_budget import _plan, plan_budget, prompt_overhead
+from src.baish.token_counter import count_tokens
+from src.baish.yara_checker import YaraChecker
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+# Each sample runs enough loops to take at least this long
+MIN_SAMPLE_SECONDS = 0.05
+CHUNK_TOKENS = 1000
+
+VERDICT = {
+    "harm_score": 2,
+    "complexity_score": 3,
+    "requires_root": False,
+    "explanation": "Installs packages from the distribution repositories.",
+}
+
+
+def _pathological_script() -> str:
+    """Long lines, many tiny lines and an embedded payload in one script"""
+    long_line = "echo " + "a-very-long-argument " * 12000
+    tiny_lines = "\n".join(f"x{i}=1" for i in range(20000))
+    payload = base64.b64encode(os.urandom(96 * 1024)).decode()
+    payload_lines = "\n".join(payload[i : i + 76] for i in range(0, len(payload), 76))
+    return (
+        "#!/bin/bash\n"
+        f"{long_line}\n{tiny_lines}\n"
+        f"base64 -d <<'EOF' | tar xz\n{payload_lines}\nEOF\n"
+    )
+
+
+def scripts() -> Dict[str, str]:
+    return {
+        "small": (FIXTURES / "hello-world.sh").read_text(),
+        "medium": (FIXTURES / "install-docker.sh").read_text(),
+        "pathological": _pathological_script(),
+    }
+
+
+def responses() -> Dict[str, AIMessage]:
+    verdict = json.dumps(VERDICT)
+    python_style = str(VERDICT).replace("false", "False")
+    return {
+        "small": AIMessage(content=verdict),
+        "medium": AIMessage(
+            content=f"Here is my analysis:\n```json\n{json.dumps(VERDICT, indent=2)}\n```"
+        ),
+        # Pages of prose and Python-style JSON that needs the cleanup pass
+        "pathological": AIMessage(
+            content="The script is an installer. " * 4000 + python_style
+        ),
+    }
+
+
+def benchmarks(
+    baish_dir: Path,
+) -> Iterator[Tuple[str, Callable[[], object]]]:
+    """(name, function) for every benchmark and input size"""
+    config = Config(
+        llms={
+            "bench": LLMConfig(
+                name="bench",
+                provider="fake",
+                model="llama3-8b",
+                options={"verdict": VERDICT},
+            )
+        },
+        default_llm="bench",
+        baish_dir=baish_dir,
+        static_filter_enabled=False,
+    )
+    yara_checker = YaraChecker(baish_dir / "cache")
+    parser = CustomJsonParser()
+
+    def plan_cold():
+        prompt_overhead.cache_clear()
+        _plan.cache_clear()
+        return plan_budget(config)
+
+    yield "plan_budget", plan_cold
+
+    for size, script in scripts().items():
+        yield f"chunk_content/{size}", lambda s=script: chunk_content(s, CHUNK_TOKENS)
+        yield f"count_tokens/{size}", lambda s=script: count_tokens(s)
+        yield f"count_tokens_approximate/{size}", lambda s=script: count_tokens(
+            s, mode="approximate"
+        )
+        yield f"yara_check_content/{size}", lambda s=script: yara_checker.check_content(
+            s
+        )
+        yield f"detect_file_type/{size}", lambda s=script: detect_file_type(s)
+        yield f"analyze_script/{size}", lambda s=script: analyze_script(
+            s, config=config, use_cache=False
+        )
+
+    for size, response in responses().items():
+        yield f"json_parser/{size}", lambda r=response: parser.invoke(r)
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict:
+    timer = timeit.Timer(func)
+    loops = 1
+    # The calibration runs double as warm-up for caches and lazy imports
+    while timer.timeit(loops) < MIN_SAMPLE_SECONDS:
+        loops *= 2
+    samples = [timer.timeit(loops) / loops for _ in range(repeat)]
+    return {
+        "best": min(samples),
+        "median": statistics.median(samples),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def run(pattern: str = "", repeat: int = 5) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, func in benchmarks(Path(temp_dir)):
+            if pattern in name:
+                results[name] = measure(func, repeat)
+                print(f"{name:<40} {_format(results[name]['best'])}", file=sys.stderr)
+    return {
+        "meta": {
+            "baish": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Best times against a baseline run, for benchmarks present in both"""
+    rows = []
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = result["best"] / before["best"] - 1
+        rows.append(
+            {
+                "name": name,
+                "baseline": before["best"],
+                "best": result["best"],
+                "change": change,
+                "regression": change > threshold,
+            }
+        )
+    return rows
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds * 1e9:.0f} ns"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", default="", help="Only run benchmarks matching this")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark")
+    parser.add_argument("--json", help="Write results to this file, - for stdout")
+    parser.add_argument("--baseline", help="Compare against a saved --json file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Slowdown that counts as a regression (default: 0.2, i.e. 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.k, args.repeat)
+    if args.json == "-":
+        print(json.dumps(results, indent=2))
+    elif args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n")
+
+    if not args.baseline:
+        return 0
+    rows = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"\n{'BENCHMARK':<40} {'BASELINE':>10} {'NOW':>10} {'CHANGE':>8}", file=out)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<40} {_format(row['baseline']):>10} "
+            f"{_format(row['best']):>10} {row['change']:>+8.1%}{flag}",
+            file=out,
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
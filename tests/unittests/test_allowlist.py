@@ -0,0 +1,114 @@
+import hashlib
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.baish.allowlist import (
+    ALLOWLISTED_TYPE,
+    Allowlist,
+    BloomFilter,
+    hash_script,
+)
+from src.baish.config import Config, LLMConfig
+
+
+class TestAllowlist(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "test_llm": LLMConfig(
+                    name="test_llm",
+                    provider="groq",
+                    model="test-model",
+                    api_key="test-key",
+                )
+            },
+            default_llm="test_llm",
+            baish_dir=self.temp_dir,
+        )
+        self.script = "#!/bin/sh\ncurl -fsSL https://example.com/setup | sh\n"
+        self.sha256 = hash_script(self.script)
+
+    def test_bloom_filter_round_trip(self):
+        bloom = BloomFilter.for_capacity(100)
+        hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(100)]
+        for sha256 in hashes:
+            bloom.add(sha256)
+
+        loaded = BloomFilter.from_bytes(bloom.to_bytes())
+        self.assertTrue(all(sha256 in loaded for sha256 in hashes))
+        misses = [hashlib.sha256(f"x{i}".encode()).hexdigest() for i in range(1000)]
+        self.assertLess(sum(sha256 in loaded for sha256 in misses), 50)
+
+    def test_add_and_contains(self):
+        allowlist = Allowlist(self.config)
+        self.assertFalse(allowlist.contains(self.sha256))
+
+        self.assertEqual(allowlist.add([(self.sha256, "vetted")]), 1)
+        self.assertEqual(allowlist.add([(self.sha256, "again")]), 0)
+        self.assertTrue(Allowlist(self.config).contains(self.sha256))
+        self.assertEqual(len(allowlist), 1)
+
+    def test_bloom_negative_skips_database(self):
+        allowlist = Allowlist(self.config)
+        allowlist.add([(self.sha256, "vetted")])
+
+        with patch.object(Allowlist, "_connect") as mock_connect:
+            self.assertFalse(allowlist.contains(hash_script("echo other")))
+            mock_connect.assert_not_called()
+
+    def test_import_file(self):
+        hashes_file = self.temp_dir / "hashes.txt"
+        hashes_file.write_text(
+            f"# vetted installers\n{self.sha256.upper()}  install.sh\nnot-a-hash\n"
+        )
+
+        self.assertEqual(Allowlist(self.config).import_file(str(hashes_file)), 1)
+        self.assertTrue(Allowlist(self.config).contains(self.sha256))
+
+    def test_import_results(self):
+        scripts_dir = self.temp_dir / "scripts"
+        results_dir = self.temp_dir / "results"
+        scripts_dir.mkdir()
+        results_dir.mkdir()
+        shell = "text/x-shellscript"
+        for name, script, harm, file_type, explanation in [
+            ("safe", self.script, 2, shell, "Installs a package"),
+            ("risky", "#!/bin/sh\nrm -rf ~\n", 9, shell, "Deletes home"),
+            # Verdicts no LLM gave are never imported
+            ("static", "#!/bin/sh\necho a\n", 1, shell, "Static analysis: ..."),
+            ("listed", "#!/bin/sh\necho b\n", 1, ALLOWLISTED_TYPE, "Known-good"),
+            ("text", "notes\n", 1, "text/plain", "Non-script file detected: ..."),
+            ("old", "#!/bin/sh\necho c\n", 1, None, None),
+        ]:
+            script_path = scripts_dir / f"{name}.sh"
+            script_path.write_text(script)
+            results = {"harm_score": harm, "script_path": str(script_path)}
+            if file_type:
+                results.update(file_type=file_type, explanation=explanation)
+            (results_dir / f"{name}_results.json").write_text(json.dumps(results))
+
+        self.assertEqual(Allowlist(self.config).import_results(max_harm=2), 1)
+        self.assertTrue(Allowlist(self.config).contains(self.sha256))
+
+    @patch("src.baish.script_analyzer.get_yara_checker")
+    def test_analyze_script_skips_all_checks(self, mock_yara):
+        from src.baish.script_analyzer import analyze_script
+
+        Allowlist(self.config).add([(self.sha256, "vetted")])
+
+        result = analyze_script(self.script, config=self.config)
+
+        mock_yara.assert_not_called()
+        self.assertEqual(result[0], 1)
+        self.assertEqual(result[4], ALLOWLISTED_TYPE)
+        self.assertIn(self.sha256, result[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
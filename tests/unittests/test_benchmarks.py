@@ -0,0 +1,36 @@
+import unittest
+
+from tests.benchmarks.bench import compare, main
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare_flags_regressions(self):
+        baseline = {
+            "results": {
+                "chunk_content/small": {"best": 1.0},
+                "count_tokens/small": {"best": 1.0},
+                "removed/small": {"best": 1.0},
+            }
+        }
+        results = {
+            "results": {
+                "chunk_content/small": {"best": 1.5},
+                "count_tokens/small": {"best": 0.9},
+                "added/small": {"best": 1.0},
+            }
+        }
+
+        rows = compare(results, baseline, threshold=0.2)
+
+        self.assertEqual(
+            [(row["name"], row["regression"]) for row in rows],
+            [("chunk_content/small", True), ("count_tokens/small", False)],
+        )
+        self.assertAlmostEqual(rows[0]["change"], 0.5)
+
+    def test_runs_selected_benchmarks(self):
+        self.assertEqual(main(["-k", "json_parser/small", "--repeat", "1"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 import tempfile
@@ -9,6 +10,7 @@ from unittest.mock import Mock, mock_open, patch
 from src.baish.__version__ import __version__
 from src.baish.cli import BaishCLI, parse_args
 from src.baish.config import Config, LLMConfig
+from src.baish.file_analyzer import is_binary
 
 
 class TestCLI(unittest.TestCase):
@@ -77,12 +79,12 @@ class TestCLI(unittest.TestCase):
 
     def test_is_binary(self):
         # Restore detailed binary tests
-        self.assertTrue(self.cli._is_binary(b"\x89PNG"), "PNG detection failed")
-        self.assertTrue(self.cli._is_binary(b"GIF8"), "GIF detection failed")
-        self.assertTrue(self.cli._is_binary(b"\xFF\xD8\xFF"), "JPEG detection failed")
-        self.assertTrue(self.cli._is_binary(b"\x00test"), "Null byte detection failed")
+        self.assertTrue(is_binary(b"\x89PNG"), "PNG detection failed")
+        self.assertTrue(is_binary(b"GIF8"), "GIF detection failed")
+        self.assertTrue(is_binary(b"\xFF\xD8\xFF"), "JPEG detection failed")
+        self.assertTrue(is_binary(b"\x00test"), "Null byte detection failed")
         self.assertFalse(
-            self.cli._is_binary(b"#!/bin/bash"), "Shell script misidentified as binary"
+            is_binary(b"#!/bin/bash"), "Shell script misidentified as binary"
         )
 
     def test_get_harm_color(self):
@@ -164,6 +166,32 @@ class TestCLI(unittest.TestCase):
                                 self.assertIn('"complexity_score": 2', call_args)
                                 self.assertIn('"explanation": "Safe script"', call_args)
 
+    def test_shield_mode_enables_early_exit(self):
+        self.mock_args.shield = True
+        self.mock_config.block_harm_score = 9
+        cli = BaishCLI(self.mock_args)
+        cli.config = self.mock_config
+
+        with patch("sys.stdin.isatty", return_value=False):
+            with patch("sys.stdin.buffer.read", return_value=b'echo "test"'):
+                with patch("src.baish.cli.analyze_script") as mock_analyze:
+                    with patch("src.baish.cli.save_script") as mock_save:
+                        mock_analyze.return_value = (
+                            8,
+                            2,
+                            "Risky script",
+                            False,
+                            "text/plain",
+                        )
+                        mock_save.return_value = "/tmp/script.sh"
+                        with patch("builtins.print"):
+                            result = cli.run()
+
+        self.assertEqual(result, 0)
+        self.assertEqual(
+            mock_analyze.call_args.kwargs["config"].early_exit, "always"
+        )
+
     def test_shield_mode(self):
         self.mock_args.shield = True
         cli = BaishCLI(self.mock_args)
@@ -342,6 +370,84 @@ class TestCLI(unittest.TestCase):
                             mock_save.return_value = str(Path(temp_dir) / "test.sh")
                             cli.run()
 
+    def test_json_output_timings(self):
+        """Test --timings adds per-stage timings to the output and results file"""
+        self.mock_args.output = "json"
+        self.mock_args.timings = True
+        cli = BaishCLI(self.mock_args)
+        cli.config = self.mock_config
+
+        with patch("sys.stdin.isatty", return_value=False):
+            with patch("sys.stdin.buffer.read", return_value=b'#!/bin/bash\necho "test"'):
+                with patch("src.baish.cli.analyze_script") as mock_analyze:
+                    with patch("builtins.print") as mock_print:
+                        mock_analyze.return_value = (
+                            3,
+                            2,
+                            "Safe script",
+                            False,
+                            "text/x-shellscript",
+                        )
+                        self.assertEqual(cli.run(), 0)
+
+        output = json.loads(mock_print.call_args[0][0])
+        self.assertEqual(
+            list(output["timings"]["stages"]),
+            ["libmagic", "import", "save_script", "save_results"],
+        )
+        results_file = next(
+            cli.config.baish_dir.glob(f"results/*/*_{cli.unique_id}_results.json")
+        )
+        saved = json.loads(results_file.read_text())
+        self.assertIn("save_script", saved["timings"]["stages"])
+        self.assertNotIn("save_results", saved["timings"]["stages"])
+
+    def test_daemon_served_check_skips_libmagic(self):
+        """Test the client leaves file type detection to the daemon"""
+        self.mock_args.output = "json"
+        self.mock_args.record = None
+        self.mock_args.timings = False
+        self.mock_args.no_daemon = False
+        cli = BaishCLI(self.mock_args)
+        cli.config = self.mock_config
+
+        with patch("sys.stdin.isatty", return_value=False):
+            with patch("sys.stdin.buffer.read", return_value=b'echo "test"'):
+                with patch("src.baish.cli.analyze_via_daemon") as mock_daemon:
+                    with patch("src.baish.file_analyzer.get_magic") as mock_magic:
+                        with patch("builtins.print"):
+                            mock_daemon.return_value = (
+                                2,
+                                1,
+                                "Safe script",
+                                False,
+                                "text/x-shellscript",
+                            )
+                            self.assertEqual(cli.run(), 0)
+
+        mock_magic.assert_not_called()
+        self.assertIsNone(mock_daemon.call_args.kwargs["file_info"])
+        saved = cli.config.baish_dir.glob(f"scripts/*/*_{cli.unique_id}_script.sh")
+        self.assertEqual(len(list(saved)), 1)
+
+    def test_failed_run_removes_spool_file(self):
+        """Test no .partial file is left when the run fails before saving"""
+        self.mock_args.output = "json"
+        cli = BaishCLI(self.mock_args)
+        cli.config = self.mock_config
+
+        with patch("sys.stdin.isatty", return_value=False):
+            with patch("sys.stdin.buffer.read", return_value=b"#!/bin/sh\necho hi\n"):
+                with patch(
+                    "src.baish.cli.detect_file_type", side_effect=RuntimeError("boom")
+                ):
+                    with patch.object(cli, "_error"):
+                        self.assertEqual(cli.run(), 1)
+
+        self.assertIsNotNone(cli.spooled)
+        partial = cli.config.baish_dir.glob(f"scripts/*/*_{cli.unique_id}_*")
+        self.assertEqual(list(partial), [])
+
     def test_shield_mode_error_output(self):
         """Test shield mode error output format"""
         self.mock_args.shield = True
@@ -410,7 +516,6 @@ class TestCLI(unittest.TestCase):
 
     def test_is_binary_detailed(self):
         """Test binary file detection for specific formats"""
-        cli = BaishCLI(self.mock_args)
         test_cases = [
             (b"\x89PNG", True, "PNG"),
             (b"GIF8", True, "GIF"),
@@ -422,7 +527,7 @@ class TestCLI(unittest.TestCase):
         ]
         for data, expected, file_type in test_cases:
             self.assertEqual(
-                cli._is_binary(data), expected, f"{file_type} detection failed"
+                is_binary(data), expected, f"{file_type} detection failed"
             )
 
     def test_get_bar_graph_edge_cases(self):
@@ -123,3 +123,53 @@ default_llm: nonexistent_llm
             with self.assertRaises(BaishConfigError) as cm:
                 Config.load()
             self.assertIn("Default LLM 'nonexistent_llm' not found", str(cm.exception))
+
+    @patch("os.path.exists", return_value=True)
+    def test_plugin_provider_accepted_without_api_key(self, mock_exists):
+        test_config = """
+llms:
+  local:
+    provider: myplugin
+    model: test
+default_llm: local
+"""
+        with (
+            patch("builtins.open", mock_open(read_data=test_config)),
+            patch.object(Config, "_plugin_providers", return_value=["myplugin"]),
+        ):
+            config = Config.load()
+        self.assertEqual(config.llm.provider, "myplugin")
+
+    @patch("os.path.exists", return_value=True)
+    def test_fake_provider_options(self, mock_exists):
+        test_config = """
+llms:
+  fake:
+    provider: fake
+    model: fake
+    options:
+      latency: 0.2
+      error_rate: 0.1
+default_llm: fake
+"""
+        with patch("builtins.open", mock_open(read_data=test_config)):
+            config = Config.load()
+        self.assertIsNone(config.llm.api_key)
+        self.assertEqual(config.llm.options, {"latency": 0.2, "error_rate": 0.1})
+
+    @patch("os.path.exists", return_value=True)
+    def test_unknown_provider_rejected(self, mock_exists):
+        test_config = """
+llms:
+  local:
+    provider: myplugin
+    model: test
+default_llm: local
+"""
+        with (
+            patch("builtins.open", mock_open(read_data=test_config)),
+            patch.object(Config, "_plugin_providers", return_value=[]),
+        ):
+            with self.assertRaises(BaishConfigError) as cm:
+                Config.load()
+        self.assertIn("Unsupported provider: myplugin", str(cm.exception))
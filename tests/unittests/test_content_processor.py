@@ -1,9 +1,11 @@
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 from src.baish.config import Config, LLMConfig
 from src.baish.content_processor import chunk_content
+from src.baish.token_counter import token_offsets
 
 
 class TestContentProcessor(unittest.TestCase):
@@ -59,3 +61,23 @@ class TestContentProcessor(unittest.TestCase):
         chunks = chunk_content(content, chunk_size)
         self.assertTrue(len(chunks) > 1)
         self.assertTrue(all(len(chunk.split()) <= chunk_size for chunk in chunks))
+
+    def test_chunk_content_preserves_lines_in_order(self):
+        content = "\n".join(f"echo line {i}" for i in range(500))
+        chunks = chunk_content(content, chunk_size=50)
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual("\n".join(chunks), content)
+
+    def test_chunk_content_long_line_keeps_surrounding_order(self):
+        content = "first\n" + "word " * 300 + "\nlast"
+        chunks = chunk_content(content, chunk_size=100)
+        self.assertEqual(chunks[0], "first")
+        self.assertEqual(chunks[-1], "last")
+
+    def test_chunk_content_reuses_offsets(self):
+        content = "\n".join(["line " + str(i) for i in range(100)])
+        offsets = token_offsets(content)
+        with patch("src.baish.content_processor.token_offsets") as mock_offsets:
+            chunks = chunk_content(content, chunk_size=20, offsets=offsets)
+            mock_offsets.assert_not_called()
+        self.assertEqual(chunks, chunk_content(content, chunk_size=20))
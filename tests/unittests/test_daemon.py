@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.baish.config import Config, LLMConfig
+from src.baish.daemon import (
+    BaishDaemon,
+    DaemonError,
+    analyze_via_daemon,
+    socket_path,
+)
+from src.baish.results_manager import ResultsManager
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "test_llm": LLMConfig(
+                    name="test_llm",
+                    provider="groq",
+                    model="test-model",
+                    api_key="test-key",
+                )
+            },
+            default_llm="test_llm",
+            baish_dir=Path(self.temp_dir),
+        )
+        self.results_mgr = ResultsManager(self.config)
+        self.results_mgr.current_date = "2024-01-01"
+        self.results_mgr.current_id = "abc123"
+
+    def start_daemon(self):
+        daemon = BaishDaemon(self.config)
+        thread = threading.Thread(target=daemon.serve, daemon=True)
+        thread.start()
+        for _ in range(100):
+            if daemon.server is not None and socket_path(self.config).exists():
+                break
+            thread.join(0.01)
+
+        def stop():
+            daemon.shutdown()
+            thread.join(5)
+
+        self.addCleanup(stop)
+        return daemon
+
+    def test_no_daemon_returns_none(self):
+        self.assertIsNone(analyze_via_daemon(self.config, "echo hi", self.results_mgr))
+
+    @patch("src.baish.script_analyzer.analyze_script")
+    def test_round_trip(self, mock_analyze):
+        mock_analyze.return_value = (1, 1, "Prints hi", False, "text/x-shellscript")
+        self.start_daemon()
+
+        results = analyze_via_daemon(
+            self.config, "echo hi", self.results_mgr, cli_provider="test_llm"
+        )
+
+        self.assertEqual(results, mock_analyze.return_value)
+        args, kwargs = mock_analyze.call_args
+        self.assertEqual(args[0], "echo hi")
+        self.assertEqual(args[1].current_id, "abc123")
+        self.assertEqual(kwargs["cli_provider"], "test_llm")
+        # The daemon analyzes with its own copy of the config
+        self.assertIsNot(kwargs["config"], self.config)
+
+    @patch("src.baish.script_analyzer.analyze_script")
+    def test_error_is_raised(self, mock_analyze):
+        mock_analyze.side_effect = RuntimeError("boom")
+        self.start_daemon()
+
+        with self.assertRaisesRegex(DaemonError, "boom"):
+            analyze_via_daemon(self.config, "echo hi", self.results_mgr)
+
+    @patch("src.baish.script_analyzer.analyze_script")
+    def test_config_mismatch_falls_back(self, mock_analyze):
+        self.start_daemon()
+        other = Config(**{**self.config.__dict__, "config_file": "/other.yaml"})
+
+        self.assertIsNone(analyze_via_daemon(other, "echo hi", self.results_mgr))
+        mock_analyze.assert_not_called()
+
+    def test_stale_socket_is_replaced(self):
+        socket_path(self.config).touch()
+        self.start_daemon()
+        with patch("src.baish.script_analyzer.analyze_script") as mock_analyze:
+            mock_analyze.return_value = (1, 1, "ok", False, "text/plain")
+            self.assertIsNotNone(
+                analyze_via_daemon(self.config, "echo hi", self.results_mgr)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
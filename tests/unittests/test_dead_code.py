@@ -32,6 +32,17 @@ class TestDeadCode(unittest.TestCase):
             "serialized",
             "kwargs",  # Callback parameters
             "write_log_entry",  # Internal logging method
+            "handle",
+            "verify_request",
+            "client_address",  # socketserver hooks
+            "whitespace_split",
+            "commenters",  # shlex options
+            "row_factory",  # sqlite3 connection option
+            "_llm_type",
+            "_identifying_params",
+            "_generate",
+            "_agenerate",  # LangChain chat model hooks
+            "model_config",  # pydantic model options
         ]
 
     def test_no_dead_code_in_src(self):
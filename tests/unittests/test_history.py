@@ -0,0 +1,103 @@
+import hashlib
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.baish.config import Config, LLMConfig
+from src.baish.history import History
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "test_llm": LLMConfig(
+                    name="test_llm",
+                    provider="groq",
+                    model="test-model",
+                    api_key="test-key",
+                )
+            },
+            default_llm="test_llm",
+            baish_dir=self.temp_dir,
+        )
+
+    def _results(self, timestamp, harm, file_type="text/x-shellscript"):
+        return {
+            "timestamp": timestamp,
+            "script_path": "/tmp/script.sh",
+            "harm_score": harm,
+            "complexity_score": 2,
+            "uses_root": harm > 5,
+            "file_type": file_type,
+            "explanation": "test",
+        }
+
+    def test_record_and_query(self):
+        history = History(self.config)
+        history.record(
+            "run1", self._results("2024-01-01T10:00:00", 2), "ab" * 32, "groq", "m1"
+        )
+        history.record(
+            "run2", self._results("2024-02-01T10:00:00", 8), "cd" * 32, "groq", "m2"
+        )
+        history.record(
+            "run3",
+            self._results("2024-03-01T10:00:00", 1, "text/plain"),
+            "ab" * 32,
+            "openai",
+            "m1",
+        )
+
+        runs = history.query()
+        self.assertEqual([r["run_id"] for r in runs], ["run3", "run2", "run1"])
+        self.assertIs(runs[1]["uses_root"], True)
+
+        self.assertEqual(
+            [r["run_id"] for r in history.query(sha256="ABAB")], ["run3", "run1"]
+        )
+        self.assertEqual([r["run_id"] for r in history.query(min_harm=6)], ["run2"])
+        self.assertEqual(
+            [r["run_id"] for r in history.query(since="2024-02-01", max_harm=5)],
+            ["run3"],
+        )
+        self.assertEqual(
+            [r["run_id"] for r in history.query(file_type="shellscript", model="m1")],
+            ["run1"],
+        )
+        self.assertEqual(len(history.query(limit=1)), 1)
+
+    def test_import_results(self):
+        results_dir = self.temp_dir / "results"
+        scripts_dir = self.temp_dir / "scripts"
+        results_dir.mkdir()
+        scripts_dir.mkdir()
+        script_path = scripts_dir / "2024-01-01_10-00-00_abcd1234_script.sh"
+        script_path.write_text("#!/bin/sh\nmake\n")
+        results = {
+            **self._results("2024-01-01T10:00:00", 3),
+            "script_path": str(script_path),
+        }
+        (results_dir / "2024-01-01_10-00-00_abcd1234_results.json").write_text(
+            json.dumps(results)
+        )
+        (results_dir / "broken_results.json").write_text("{")
+
+        history = History(self.config)
+        self.assertEqual(history.import_results(), 1)
+        self.assertEqual(history.import_results(), 1)  # re-import updates in place
+
+        runs = history.query()
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]["run_id"], "2024-01-01_10-00-00_abcd1234")
+        self.assertEqual(
+            runs[0]["sha256"], hashlib.sha256(script_path.read_bytes()).hexdigest()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
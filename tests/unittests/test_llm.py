@@ -348,7 +348,8 @@ default_llm: mistral
         callback.on_llm_error(Exception("test error"))
 
         # Read the log file
-        log_file = list(Path(self.temp_dir).glob("logs/*_llm.jsonl"))[0]
+        callback.results_mgr.flush()
+        log_file = list(Path(self.temp_dir).glob("logs/*/*_llm.jsonl"))[0]
         with open(log_file) as f:
             logs = [json.loads(line) for line in f]
 
@@ -378,7 +379,8 @@ default_llm: mistral
         callback.on_llm_end(Mock(generations=[[Mock(text="test response")]]))
 
         # Read the log file
-        log_file = list(Path(self.temp_dir).glob("logs/*_llm.jsonl"))[0]
+        callback.results_mgr.flush()
+        log_file = list(Path(self.temp_dir).glob("logs/*/*_llm.jsonl"))[0]
         with open(log_file) as f:
             logs = [json.loads(line) for line in f]
 
@@ -388,6 +390,45 @@ default_llm: mistral
         self.assertEqual(logs[1]["provider"], "ChatCohere")
         self.assertEqual(logs[1]["model"], "command-r-plus-08-2024")
 
+    def test_provider_integrations_imported_lazily(self):
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, src.baish.llm; "
+            "print(any(m in sys.modules for m in "
+            "('langchain_groq', 'langchain_openai', 'langchain_anthropic', "
+            "'langchain_cohere', 'langchain_ollama')))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_get_llm_unsupported_provider(self):
+        self.mock_config.llms["test-llm"].provider = "nonexistent"
+        with patch("src.baish.llm.entry_points", return_value=[]):
+            with self.assertRaises(APIError) as cm:
+                get_llm(self.mock_config)
+        self.assertIn("Unsupported LLM provider", str(cm.exception))
+
+    def test_get_llm_plugin_provider_from_entry_point(self):
+        from src.baish import llm
+
+        factory = Mock(return_value="plugin_instance")
+        entry_point = Mock()
+        entry_point.name = "plugin"
+        entry_point.load.return_value = factory
+        self.mock_config.llms["test-llm"].provider = "plugin"
+        self.addCleanup(llm.PROVIDERS.pop, "plugin", None)
+
+        with patch("src.baish.llm.entry_points", return_value=[entry_point]):
+            result = get_llm(self.mock_config)
+
+        self.assertEqual(result, "plugin_instance")
+        factory.assert_called_once()
+        self.assertIs(factory.call_args[0][0], self.mock_config.llms["test-llm"])
+
 
 if __name__ == "__main__":
     unittest.main()
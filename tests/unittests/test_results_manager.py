@@ -7,7 +7,7 @@ from pathlib import Path
 from unittest.mock import mock_open, patch
 
 from src.baish.config import Config
-from src.baish.results_manager import ResultsManager
+from src.baish.results_manager import LOG_FLUSH_BYTES, ResultsManager
 
 
 class TestResultsManager(unittest.TestCase):
@@ -33,9 +33,14 @@ class TestResultsManager(unittest.TestCase):
             }
 
             results_mgr.write_log_entry("2024-12-05_11-21-07", "12345678", log_entry)
+            mock_file.assert_not_called()  # buffered until the end of the run
+            results_mgr.flush()
 
             expected_filename = (
-                Path(temp_dir) / "logs" / "2024-12-05_11-21-07_12345678_llm.jsonl"
+                Path(temp_dir)
+                / "logs"
+                / "2024-12-05"
+                / "2024-12-05_11-21-07_12345678_llm.jsonl"
             )
             mock_file.assert_called_once_with(expected_filename, "a")
 
@@ -50,3 +55,42 @@ class TestResultsManager(unittest.TestCase):
             expected_log_dir = Path(temp_dir) / "logs"
             self.assertEqual(results_mgr.log_dir, expected_log_dir)
             self.assertTrue(expected_log_dir.exists())
+
+    def test_flush_threshold_and_latest_pointer(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = Config(llms={}, default_llm=None, baish_dir=Path(temp_dir))
+            results_mgr = ResultsManager(config)
+            log_file = (
+                Path(temp_dir)
+                / "logs"
+                / "2024-12-05"
+                / "2024-12-05_11-21-07_abcd1234_llm.jsonl"
+            )
+
+            results_mgr.write_log_entry(
+                "2024-12-05_11-21-07", "abcd1234", {"response": "short"}
+            )
+            self.assertFalse(log_file.exists())
+
+            results_mgr.write_log_entry(
+                "2024-12-05_11-21-07", "abcd1234", {"response": "x" * LOG_FLUSH_BYTES}
+            )
+            self.assertEqual(len(log_file.read_text().splitlines()), 2)
+
+            pointer = Path(temp_dir) / "logs" / "latest"
+            self.assertEqual(pointer.read_text(), "2024-12-05_11-21-07 abcd1234\n")
+            self.assertEqual(
+                ResultsManager(config).get_latest_log(),
+                ("2024-12-05_11-21-07", "abcd1234"),
+            )
+
+    def test_latest_log_without_pointer(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = Config(llms={}, default_llm=None, baish_dir=Path(temp_dir))
+            results_mgr = ResultsManager(config)
+            (results_mgr.log_dir / "2024-12-05_11-21-07_abcd1234_llm.jsonl").touch()
+
+            self.assertEqual(
+                results_mgr.get_latest_log(), ("2024-12-05_11-21-07", "abcd1234")
+            )
+            self.assertTrue((results_mgr.log_dir / "latest").exists())
@@ -0,0 +1,143 @@
+import json
+import shutil
+import tarfile
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from src.baish.config import Config
+from src.baish.retention import Retention, locate
+from src.baish.storage import save_results_json, save_script
+
+
+def _day(days_ago: int) -> str:
+    return (date.today() - timedelta(days=days_ago)).isoformat()
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(llms={}, default_llm=None, baish_dir=self.temp_dir)
+
+    def _write_flat_run(self, days_ago: int, run_id: str) -> None:
+        """A run stored in the flat layout used before day directories"""
+        prefix = f"{_day(days_ago)}_10-00-00_{run_id}"
+        for kind, suffix in [
+            ("scripts", "_script.sh"),
+            ("results", "_results.json"),
+            ("logs", "_llm.jsonl"),
+        ]:
+            (self.temp_dir / kind).mkdir(exist_ok=True)
+            (self.temp_dir / kind / f"{prefix}{suffix}").write_text("x" * 100)
+
+    def test_runs_are_stored_by_day(self):
+        script_path = save_script(
+            "echo test",
+            self.config,
+            "2024-12-05_11-21-07",
+            "abcd1234",
+            file_info={"mime_type": "text/x-shellscript"},
+        )
+        results_path = save_results_json(
+            {}, Path(script_path), "2024-12-05_11-21-07", "abcd1234", self.config
+        )
+
+        self.assertEqual(Path(script_path).parent, self.temp_dir / "scripts/2024-12-05")
+        self.assertEqual(results_path.parent, self.temp_dir / "results/2024-12-05")
+        self.assertEqual(
+            locate(self.temp_dir / "scripts" / Path(script_path).name),
+            Path(script_path),
+        )
+
+    def test_sweep_moves_archives_and_deletes(self):
+        self._write_flat_run(0, "today")
+        self._write_flat_run(1, "recent")
+        self._write_flat_run(10, "old")
+        self._write_flat_run(200, "expired")
+
+        stats = Retention(self.config).sweep()
+
+        self.assertEqual((stats.moved, stats.archived, stats.deleted), (12, 2, 1))
+        self.assertEqual(stats.freed_bytes, 300)
+        for kind in ["scripts", "results", "logs"]:
+            self.assertTrue((self.temp_dir / kind / _day(0)).is_dir())
+            self.assertTrue((self.temp_dir / kind / _day(1)).is_dir())
+            self.assertFalse((self.temp_dir / kind / _day(200)).exists())
+        self.assertTrue((self.temp_dir / "scripts" / _day(10)).is_dir())
+
+        archive = self.temp_dir / "logs" / f"{_day(10)}.tar.gz"
+        self.assertFalse((self.temp_dir / "logs" / _day(10)).exists())
+        with tarfile.open(archive) as tar:
+            self.assertEqual(
+                tar.getnames(), [f"{_day(10)}/{_day(10)}_10-00-00_old_llm.jsonl"]
+            )
+
+    def test_size_and_run_limits(self):
+        for days_ago in range(4):
+            self._write_flat_run(days_ago, f"run{days_ago}")
+        self.config.retention_max_runs = 2
+
+        stats = Retention(self.config).sweep()
+
+        self.assertEqual(stats.deleted, 2)
+        self.assertEqual(
+            sorted(p.name for p in (self.temp_dir / "scripts").iterdir()),
+            [_day(1), _day(0)],
+        )
+
+        self.config.retention_max_bytes = 1
+        Retention(self.config).sweep()
+
+        # Today's runs are never deleted
+        self.assertEqual(
+            [p.name for p in (self.temp_dir / "scripts").iterdir()], [_day(0)]
+        )
+
+    def test_sweep_reuses_cached_sizes(self):
+        self._write_flat_run(10, "old")
+        retention = Retention(self.config)
+        retention.sweep()
+
+        state = json.loads((self.temp_dir / "retention.json").read_text())
+        self.assertEqual(state["units"][f"logs/{_day(10)}.tar.gz"][2], 1)
+        self.assertFalse(retention.due())
+
+        with patch("src.baish.retention.tarfile.open") as mock_open:
+            retention.sweep()
+        mock_open.assert_not_called()
+
+    def test_import_after_sweep_reads_archives(self):
+        from src.baish.allowlist import Allowlist
+        from src.baish.history import History
+
+        for days_ago, run_id in [(0, "recent"), (10, "old")]:
+            date_str = f"{_day(days_ago)}_10-00-00"
+            script_path = self.temp_dir / "scripts" / f"{date_str}_{run_id}_script.sh"
+            script_path.parent.mkdir(exist_ok=True)
+            script_path.write_text(f"#!/bin/sh\necho {run_id}\n")
+            results = {
+                "harm_score": 1,
+                "complexity_score": 1,
+                "file_type": "text/x-shellscript",
+                "explanation": "Prints a word",
+                "script_path": str(script_path),
+            }
+            save_results_json(results, script_path, date_str, run_id, self.config)
+
+        stats = Retention(self.config).sweep()
+
+        self.assertEqual(stats.archived, 1)
+        self.assertTrue((self.temp_dir / "results" / f"{_day(10)}.tar.gz").exists())
+        self.assertEqual(History(self.config).import_results(), 2)
+        self.assertEqual(Allowlist(self.config).import_results(max_harm=2), 2)
+
+    def test_automatic_sweep_disabled(self):
+        self.config.retention_sweep_hours = 0
+        self.assertFalse(Retention(self.config).due())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.baish.config import Config, LLMConfig
+from src.baish.scanner import iter_candidates, scan_paths
+
+
+class TestScanner(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "test_llm": LLMConfig(
+                    name="test_llm",
+                    provider="groq",
+                    model="test-model",
+                    api_key="test-key",
+                )
+            },
+            default_llm="test_llm",
+            baish_dir=self.temp_dir / ".baish",
+        )
+
+        self.repo = self.temp_dir / "repo"
+        (self.repo / "tools").mkdir(parents=True)
+        (self.repo / ".git").mkdir()
+        (self.repo / "install.sh").write_text("#!/bin/bash\necho install\n")
+        (self.repo / "tools" / "build.sh").write_text("#!/bin/sh\nmake\n")
+        (self.repo / "README.md").write_text("# Readme\n\nSome docs.\n")
+        (self.repo / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\xff\xfe\x00")
+        (self.repo / ".git" / "hook.sh").write_text("#!/bin/sh\necho hook\n")
+
+    def test_iter_candidates_walks_dirs_and_globs(self):
+        found = list(iter_candidates([str(self.repo)]))
+        names = sorted(p.name for p in found)
+        self.assertEqual(names, ["README.md", "build.sh", "install.sh", "logo.png"])
+
+        globbed = list(
+            iter_candidates([str(self.repo / "**" / "*.sh"), str(self.repo)])
+        )
+        # Files matched by both arguments are only returned once
+        self.assertEqual(len(globbed), 4)
+
+    @patch("src.baish.script_analyzer.analyze_script")
+    def test_scan_streams_jsonl_for_scripts(self, mock_analyze):
+        mock_analyze.return_value = (2, 1, "Runs a build", False, "text/x-shellscript")
+        out = io.StringIO()
+
+        status = scan_paths([str(self.repo)], self.config, workers=2, out=out)
+
+        self.assertEqual(status, 0)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            sorted(Path(r["path"]).name for r in results), ["build.sh", "install.sh"]
+        )
+        self.assertEqual(results[0]["harm_score"], 2)
+        # Each file gets its own session and its own copy of the config
+        sessions = {call.args[1].current_id for call in mock_analyze.call_args_list}
+        self.assertEqual(len(sessions), 2)
+        for call in mock_analyze.call_args_list:
+            self.assertIsNot(call.kwargs["config"], self.config)
+
+    @patch("src.baish.script_analyzer.analyze_script")
+    def test_scan_reports_errors(self, mock_analyze):
+        mock_analyze.return_value = (0, 0, "rate limited", False, "text/x-shellscript")
+        out = io.StringIO()
+
+        status = scan_paths([str(self.repo / "install.sh")], self.config, out=out)
+
+        self.assertEqual(status, 1)
+        result = json.loads(out.getvalue())
+        self.assertEqual(result["error"], "rate limited")
+
+    @patch("src.baish.script_analyzer.analyze_script")
+    def test_scan_timings(self, mock_analyze):
+        mock_analyze.return_value = (2, 1, "Runs a build", False, "text/x-shellscript")
+        out = io.StringIO()
+
+        scan_paths([str(self.repo / "install.sh")], self.config, out=out, timings=True)
+
+        result = json.loads(out.getvalue())
+        self.assertEqual(result["timings"]["stages"]["libmagic"]["calls"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+import re
 import tempfile
+import time
 import unittest
 from io import StringIO
 from pathlib import Path
@@ -6,8 +8,8 @@ from unittest import mock
 from unittest.mock import Mock, patch
 
 from src.baish.config import Config, LLMConfig
-from src.baish.script_analyzer import (analyze_chunks, analyze_script,
-                                       calculate_chunk_size)
+from src.baish.script_analyzer import (analyze_chunks, analyze_chunks_async,
+                                       analyze_script, analyze_script_async)
 
 
 class TestScriptAnalyzer(unittest.TestCase):
@@ -248,24 +250,6 @@ class TestScriptAnalyzer(unittest.TestCase):
             self.assertTrue(mock_chunk_content.called)
             self.assertEqual(results["security_analysis"]["harm_score"], 5)
 
-    def test_calculate_chunk_size(self):
-        with (
-            patch("src.baish.script_analyzer.MAP_PROMPT") as mock_prompt,
-            patch("src.baish.script_analyzer.count_tokens") as mock_count,
-        ):
-
-            mock_prompt.format_prompt.return_value = "test prompt"
-            mock_count.return_value = 500  # Mock token count for prompt
-
-            result = calculate_chunk_size(self.mock_config)
-
-            # Verify result matches expected calculation:
-            # token_limit (4000) - prompt_tokens (500) - response_reserve (1000) = 2500
-            expected = 4000 - 500 - 1000
-            self.assertEqual(result, expected)
-            self.assertIsInstance(result, int)
-            self.assertGreater(result, 0)
-
     @patch("src.baish.script_analyzer.create_security_chain")
     async def test_analyze_script_chain_exception(self, mock_chain):
         mock_chain.return_value.invoke.side_effect = Exception("Chain error")
@@ -354,6 +338,343 @@ class TestScriptAnalyzer(unittest.TestCase):
                 ),
             )
 
+    @patch("src.baish.script_analyzer.get_llm")
+    def test_analyze_chunks_concurrent_map_keeps_order(self, mock_get_llm):
+        import json
+        import threading
+        import time
+
+        from langchain_core.runnables import RunnableLambda
+
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+        reduce_inputs = []
+
+        def fake_llm(prompt):
+            text = prompt.to_string()
+            if "Combine these analyses" in text:
+                reduce_inputs.append(text)
+                return json.dumps(
+                    {
+                        "harm_score": 2,
+                        "complexity_score": 3,
+                        "requires_root": False,
+                        "explanation": "combined",
+                    }
+                )
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            if "chunk2" in text:
+                raise RuntimeError("provider error")
+            chunk = text.rsplit("\n", 1)[-1]
+            return json.dumps(
+                {
+                    "harm_score": 1,
+                    "complexity_score": 1,
+                    "requires_root": False,
+                    "explanation": chunk,
+                }
+            )
+
+        mock_get_llm.return_value = RunnableLambda(fake_llm)
+        self.mock_config.llm.max_concurrency = 2
+
+        result = analyze_chunks(
+            ["chunk1", "chunk2", "chunk3", "chunk4"],
+            "text/x-shellscript",
+            self.mock_config,
+            None,
+            False,
+        )
+
+        self.assertEqual(result[0], 2)
+        self.assertEqual(active["peak"], 2)
+        # The failed chunk is skipped and the rest stay in chunk order
+        combined = reduce_inputs[0]
+        self.assertNotIn("chunk2", combined)
+        self.assertLess(combined.index("chunk1"), combined.index("chunk3"))
+        self.assertLess(combined.index("chunk3"), combined.index("chunk4"))
+
+
+    @patch("src.baish.script_analyzer._analyze_with_llm")
+    @patch("src.baish.script_analyzer.detect_file_type")
+    def test_analyze_script_reuses_file_info(self, mock_detect, mock_analyze):
+        file_info = {"mime_type": "text/x-shellscript", "is_text": True}
+        mock_analyze.return_value = (1, 1, "ok", False, "text/x-shellscript")
+
+        analyze_script(
+            "#!/bin/sh\nmake\n",
+            config=self.mock_config,
+            use_cache=False,
+            file_info=file_info,
+        )
+
+        mock_detect.assert_not_called()
+        self.assertIs(mock_analyze.call_args[0][1], file_info)
+
+
+    @patch("src.baish.llm.get_llm")
+    def test_analyze_script_async_runs_concurrently(self, mock_get_llm):
+        import asyncio
+        import json
+
+        from langchain_core.runnables import RunnableLambda
+
+        active = {"now": 0, "peak": 0}
+
+        async def fake_llm(prompt):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.05)
+            active["now"] -= 1
+            return json.dumps(
+                {
+                    "harm_score": 2,
+                    "complexity_score": 1,
+                    "requires_root": False,
+                    "explanation": "Prints a number",
+                }
+            )
+
+        mock_get_llm.return_value = RunnableLambda(fake_llm)
+        file_info = {"mime_type": "text/x-shellscript", "is_text": True}
+
+        async def run_all():
+            return await asyncio.gather(
+                *(
+                    analyze_script_async(
+                        f"#!/bin/sh\nmake -j{i}\n",
+                        config=self.mock_config,
+                        use_cache=False,
+                        file_info=file_info,
+                    )
+                    for i in range(10)
+                )
+            )
+
+        results = asyncio.run(run_all())
+
+        self.assertEqual(active["peak"], 10)
+        for result in results:
+            self.assertEqual(
+                result, (2, 1, "Prints a number", False, "text/x-shellscript")
+            )
+
+    @patch("src.baish.script_analyzer.get_llm")
+    def test_analyze_chunks_async_keeps_order(self, mock_get_llm):
+        import asyncio
+        import json
+
+        from langchain_core.runnables import RunnableLambda
+
+        reduce_inputs = []
+
+        async def fake_llm(prompt):
+            text = prompt.to_string()
+            if "Combine these analyses" in text:
+                reduce_inputs.append(text)
+                explanation = "combined"
+            elif "chunk2" in text:
+                raise RuntimeError("provider error")
+            else:
+                explanation = text.rsplit("\n", 1)[-1]
+            return json.dumps(
+                {
+                    "harm_score": 3,
+                    "complexity_score": 2,
+                    "requires_root": False,
+                    "explanation": explanation,
+                }
+            )
+
+        mock_get_llm.return_value = RunnableLambda(fake_llm)
+
+        result = asyncio.run(
+            analyze_chunks_async(
+                ["chunk1", "chunk2", "chunk3"],
+                "text/x-shellscript",
+                self.mock_config,
+                None,
+                False,
+            )
+        )
+
+        self.assertEqual(result, (3, 2, "combined", False, "text/x-shellscript"))
+        combined = reduce_inputs[0]
+        self.assertNotIn("chunk2", combined)
+        self.assertLess(combined.index("chunk1"), combined.index("chunk3"))
+
+
+    @patch("src.baish.script_analyzer.get_llm")
+    def test_analyze_chunks_dedupes_identical_chunks(self, mock_get_llm):
+        import json
+
+        from langchain_core.runnables import RunnableLambda
+
+        map_inputs = []
+        reduce_inputs = []
+
+        def fake_llm(prompt):
+            text = prompt.to_string()
+            if "Combine these analyses" in text:
+                reduce_inputs.append(text)
+            else:
+                map_inputs.append(text.rsplit("\n", 1)[-1])
+            return json.dumps(
+                {
+                    "harm_score": 1,
+                    "complexity_score": 1,
+                    "requires_root": False,
+                    "explanation": "ok",
+                }
+            )
+
+        mock_get_llm.return_value = RunnableLambda(fake_llm)
+
+        analyze_chunks(
+            ["vendored()", "main", "vendored()", "vendored()"],
+            "text/x-shellscript",
+            self.mock_config,
+            None,
+            False,
+        )
+
+        self.assertEqual(sorted(map_inputs), ["main", "vendored()"])
+        self.assertIn("'occurrences': 3", reduce_inputs[0])
+        self.assertEqual(reduce_inputs[0].count("'occurrences'"), 1)
+
+
+    @patch("src.baish.script_analyzer.create_security_chain")
+    def test_embedded_payload_not_chunked(self, mock_chain):
+        import base64
+        import os
+
+        payload = base64.encodebytes(os.urandom(200 * 1024)).decode()
+        script = f"#!/bin/sh\nbase64 -d > /tmp/a.tgz <<EOF\n{payload}EOF\nmake\n"
+        mock_chain.return_value.invoke.return_value = {
+            "harm_score": 3,
+            "complexity_score": 2,
+            "requires_root": False,
+            "explanation": "installer",
+        }
+
+        result = analyze_script(script, config=self.mock_config, use_cache=False)
+
+        self.assertEqual(result[0], 3)
+        sent = mock_chain.return_value.invoke.call_args[0][0]["content"]
+        self.assertIn("[baish: removed", sent)
+        self.assertLess(len(sent), 1000)
+
+
+    @patch("src.baish.script_analyzer.get_llm")
+    def test_analyze_chunks_tree_reduce(self, mock_get_llm):
+        import asyncio
+        import json
+
+        from langchain_core.runnables import RunnableLambda
+
+        reduce_sizes = []
+
+        def fake_llm(prompt):
+            text = prompt.to_string()
+            if "Combine these analyses" in text:
+                summaries = text.split("Combine these analyses:")[1].strip()
+                reduce_sizes.append(len(summaries.splitlines()))
+                harm = max(int(h) for h in re.findall(r"'harm_score': (\d+)", text))
+            else:
+                harm = 9 if "chunk17" in text else 1
+            return json.dumps(
+                {
+                    "harm_score": harm,
+                    "complexity_score": 1,
+                    "requires_root": False,
+                    "explanation": "ok",
+                }
+            )
+
+        mock_get_llm.return_value = RunnableLambda(fake_llm)
+        self.mock_config.reduce_fan_in = 4
+        chunks = [f"chunk{i}" for i in range(20)]
+
+        result = analyze_chunks(
+            chunks, "text/x-shellscript", self.mock_config, None, False
+        )
+
+        # 20 summaries -> 5 -> 2 (a batch of four and one passed up) -> 1
+        self.assertEqual(result[0], 9)
+        self.assertEqual(sorted(reduce_sizes), [2, 4, 4, 4, 4, 4, 4])
+
+        reduce_sizes.clear()
+        result = asyncio.run(
+            analyze_chunks_async(
+                chunks, "text/x-shellscript", self.mock_config, None, False
+            )
+        )
+        self.assertEqual(result[0], 9)
+        self.assertEqual(sorted(reduce_sizes), [2, 4, 4, 4, 4, 4, 4])
+
+
+    @patch("src.baish.script_analyzer.get_llm")
+    def test_analyze_chunks_early_exit(self, mock_get_llm):
+        import asyncio
+        import json
+
+        from langchain_core.runnables import RunnableLambda
+
+        calls = []
+
+        def fake_llm(prompt):
+            text = prompt.to_string()
+            calls.append(text)
+            harm = 9 if text.endswith("chunk2") else 1
+            time.sleep(0.05)
+            return json.dumps(
+                {
+                    "harm_score": harm,
+                    "complexity_score": 3,
+                    "requires_root": False,
+                    "explanation": f"harm {harm}",
+                }
+            )
+
+        mock_get_llm.return_value = RunnableLambda(fake_llm)
+        self.mock_config.llm.max_concurrency = 1
+        self.mock_config.early_exit = "always"
+        chunks = [f"chunk{i}" for i in range(10)]
+
+        result = analyze_chunks(
+            chunks, "text/x-shellscript", self.mock_config, None, False
+        )
+
+        # The chunk already in flight when chunk2 came back may still run
+        self.assertLessEqual(len(calls), 4)
+        self.assertEqual(result[0], 9)
+        self.assertTrue(result[2].startswith("Early termination: "))
+        self.assertIn("of 10 sections were not analyzed", result[2])
+
+        calls.clear()
+        result = asyncio.run(
+            analyze_chunks_async(
+                chunks, "text/x-shellscript", self.mock_config, None, False
+            )
+        )
+        self.assertLessEqual(len(calls), 4)
+        self.assertTrue(result[2].startswith("Early termination: "))
+
+        # Outside shield mode every chunk is analyzed and reduced
+        calls.clear()
+        self.mock_config.early_exit = "shield"
+        result = analyze_chunks(
+            chunks, "text/x-shellscript", self.mock_config, None, False
+        )
+        # 10 map calls, then reduces of 8 and 2 summaries and a final one
+        self.assertEqual(len(calls), 13)
+        self.assertFalse(result[2].startswith("Early termination: "))
+
 
 if __name__ == "__main__":
     unittest.main()
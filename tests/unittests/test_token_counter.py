@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import patch
+
+from src.baish import token_counter
+from src.baish.token_counter import (
+    bytes_per_token,
+    count_tokens,
+    get_encoding,
+    token_offsets,
+)
+
+
+class TestTokenCounter(unittest.TestCase):
+    def setUp(self):
+        token_counter._encodings.clear()
+        self.addCleanup(token_counter._encodings.clear)
+
+    def test_encoding_built_once_per_model(self):
+        with patch("src.baish.token_counter.tiktoken.encoding_for_model") as mock_for:
+            mock_for.return_value.encode.return_value = [1, 2, 3]
+            self.assertEqual(count_tokens("a b c", "gpt-4"), 3)
+            self.assertEqual(count_tokens("a b c", "gpt-4"), 3)
+            mock_for.assert_called_once_with("gpt-4")
+
+    def test_unknown_model_uses_default_encoding(self):
+        with (
+            patch(
+                "src.baish.token_counter.tiktoken.encoding_for_model",
+                side_effect=KeyError("claude"),
+            ),
+            patch("src.baish.token_counter.tiktoken.get_encoding") as mock_get,
+        ):
+            self.assertIs(get_encoding("claude-3-5-haiku"), mock_get.return_value)
+            mock_get.assert_called_once_with("cl100k_base")
+
+    def test_unavailable_encoding_is_remembered_and_returns_int(self):
+        with patch(
+            "src.baish.token_counter.tiktoken.encoding_for_model",
+            side_effect=ConnectionError("offline"),
+        ) as mock_for:
+            first = count_tokens("echo hello world")
+            second = count_tokens("echo hello world")
+            self.assertIsInstance(first, int)
+            self.assertEqual(first, second)
+            self.assertEqual(first, len(token_offsets("echo hello world")))
+            mock_for.assert_called_once()
+
+    def test_approximate_mode_skips_tokenizer(self):
+        with patch("src.baish.token_counter.get_encoding") as mock_get:
+            result = count_tokens("x" * 100, "claude-3-5-haiku", mode="approximate")
+            mock_get.assert_not_called()
+        self.assertIsInstance(result, int)
+        self.assertEqual(result, 34)  # ceil(100 / 3.0)
+
+    def test_bytes_per_token_prefix_match(self):
+        self.assertEqual(bytes_per_token("gpt-4o-mini"), 3.6)
+        self.assertEqual(bytes_per_token("gpt-3.5-turbo"), 3.2)
+        self.assertEqual(bytes_per_token("some-local-model"), 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
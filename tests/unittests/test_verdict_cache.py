@@ -0,0 +1,147 @@
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.baish.config import Config, LLMConfig
+from src.baish.verdict_cache import VerdictCache, _flush_all
+
+
+class TestVerdictCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir))
+        self.config = Config(
+            llms={
+                "test_llm": LLMConfig(
+                    name="test_llm",
+                    provider="groq",
+                    model="test-model",
+                    api_key="test-key",
+                )
+            },
+            default_llm="test_llm",
+            baish_dir=Path(self.temp_dir),
+        )
+        self.verdict = (2, 3, "Installs a package", True, "text/x-shellscript")
+
+    def test_miss_then_hit(self):
+        cache = VerdictCache(self.config)
+        key = VerdictCache.make_key("echo hi", self.config)
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, self.verdict)
+        self.assertEqual(cache.get(key), self.verdict)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_persists_across_instances(self):
+        key = VerdictCache.make_key("echo hi", self.config)
+        VerdictCache(self.config).put(key, self.verdict)
+        self.assertEqual(VerdictCache(self.config).get(key), self.verdict)
+
+    def test_key_depends_on_model_and_temperature(self):
+        key = VerdictCache.make_key("echo hi", self.config)
+        self.config.llm.model = "other-model"
+        other_model = VerdictCache.make_key("echo hi", self.config)
+        self.config.llm.temperature = 0.9
+        other_temp = VerdictCache.make_key("echo hi", self.config)
+
+        self.assertEqual(len({key, other_model, other_temp}), 3)
+        self.assertNotEqual(key, VerdictCache.make_key("echo bye", self.config))
+
+    def test_key_depends_on_provider_options(self):
+        self.config.llm.provider = "fake"
+        self.config.llm.options = {"verdict": {"harm_score": 1}}
+        key = VerdictCache.make_key("echo hi", self.config)
+        self.config.llm.options = {"verdict": {"harm_score": 9}}
+        self.assertNotEqual(key, VerdictCache.make_key("echo hi", self.config))
+
+    def test_lru_eviction_by_count(self):
+        self.config.cache_max_entries = 2
+        cache = VerdictCache(self.config)
+        keys = [VerdictCache.make_key(f"echo {i}", self.config) for i in range(3)]
+
+        cache.put(keys[0], self.verdict)
+        cache.put(keys[1], self.verdict)
+        # Touch the oldest entry so the middle one becomes least recently used
+        cache.db.execute(
+            "UPDATE verdicts SET last_used = last_used + 10 WHERE key = ?", (keys[0],)
+        )
+        cache.put(keys[2], self.verdict)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+
+    def test_expired_entry_is_a_miss(self):
+        self.config.cache_max_age_days = 1
+        cache = VerdictCache(self.config)
+        key = VerdictCache.make_key("echo hi", self.config)
+        cache.put(key, self.verdict)
+
+        with patch(
+            "src.baish.verdict_cache.time.time", return_value=time.time() + 2 * 86400
+        ):
+            self.assertIsNone(cache.get(key))
+
+    def test_lookups_do_not_take_the_write_lock(self):
+        key = VerdictCache.make_key("echo hi", self.config)
+        with VerdictCache(self.config) as cache:
+            cache.put(key, self.verdict)
+            self.assertEqual(
+                cache.db.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+            )
+
+        # Another worker holds the write lock while this one looks up verdicts
+        writer = sqlite3.connect(cache.path)
+        self.addCleanup(writer.close)
+        writer.execute("BEGIN IMMEDIATE")
+        with VerdictCache(self.config) as cache:
+            self.assertEqual(cache.get(key), self.verdict)
+            self.assertIsNone(cache.get("missing"))
+            self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+        writer.rollback()
+
+    def test_lookups_are_written_in_batches(self):
+        key = VerdictCache.make_key("echo hi", self.config)
+        with VerdictCache(self.config) as cache:
+            cache.put(key, self.verdict)
+            cache.db.execute("UPDATE verdicts SET last_used = 0")
+            cache.db.commit()
+            cache.get(key)
+            cache.get(key)
+
+            stored = cache.db.execute("SELECT COUNT(*) FROM stats").fetchone()[0]
+            self.assertEqual(stored, 0)
+
+            _flush_all()
+
+            last_used = cache.db.execute("SELECT last_used FROM verdicts").fetchone()
+            self.assertGreater(last_used[0], 0)
+            self.assertEqual(cache.stats()["hits"], 2)
+
+    @patch("src.baish.script_analyzer.create_security_chain")
+    def test_analyze_script_uses_cache(self, mock_chain):
+        from src.baish.script_analyzer import analyze_script
+
+        mock_chain.return_value.invoke.return_value = {
+            "harm_score": 2,
+            "complexity_score": 1,
+            "requires_root": False,
+            "explanation": "Prints a greeting",
+        }
+        script = "#!/bin/bash\nmake install\n"
+
+        first = analyze_script(script, config=self.config)
+        second = analyze_script(script, config=self.config)
+        analyze_script(script, config=self.config, use_cache=False)
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_chain.return_value.invoke.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()